@@ -0,0 +1,368 @@
+"""Headless JSON API over the model layer, for mobile clients and automation.
+
+Serves transactions, budgets, categories, analytics, classification and chat
+without the Streamlit rerun model. The API attaches to the database the app
+created (DB_INIT_SCHEMA defaults to 0 here, however the module is started)
+and runs API_WORKERS processes:
+
+    python api.py
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Set API_TOKEN to require an ``Authorization: Bearer <token>`` header.
+"""
+import asyncio
+import base64
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+# Set before any model import: every worker process imports this module and
+# should attach to the existing schema rather than run the schema step
+os.environ.setdefault('DB_INIT_SCHEMA', '0')
+
+from models.async_database import get_async_database
+from models.budget import AsyncBudget
+from models.category import Category
+from models.transaction import AsyncTransaction
+from services.ai_clients import get_ai_service
+from utils import metrics
+from utils.tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+API_HOST = os.environ.get('API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('API_PORT', 8000))
+API_WORKERS = int(os.environ.get('API_WORKERS', 4))
+API_TOKEN = os.environ.get('API_TOKEN')
+# Default AI provider ("OpenAI" or "Ollama") when a request does not name one
+API_AI_PROVIDER = os.environ.get('API_AI_PROVIDER', "OpenAI")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Items accepted by one batch request
+MAX_BATCH = int(os.environ.get('API_MAX_BATCH', 500))
+
+REQUEST_SECONDS = metrics.histogram('api_request_duration_seconds', "API request latency.", ['method', 'route'])
+
+Provider = Literal["OpenAI", "Ollama"]
+Cycle = Literal["none", "daily", "weekly", "monthly", "yearly"]
+
+
+class TransactionIn(BaseModel):
+    description: str
+    amount: float = Field(gt=0)
+    type: Literal["income", "expense"]
+    category: str
+    cycle: Cycle = "none"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    due_date: Optional[date] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class TransactionBatchIn(BaseModel):
+    transactions: List[TransactionIn] = Field(min_length=1, max_length=MAX_BATCH)
+
+
+class TransactionUpdate(BaseModel):
+    description: Optional[str] = None
+    amount: Optional[float] = Field(default=None, gt=0)
+    type: Optional[Literal["income", "expense"]] = None
+    category: Optional[str] = None
+    cycle: Optional[Cycle] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    due_date: Optional[date] = None
+
+
+class BudgetIn(BaseModel):
+    category: str
+    amount: float = Field(gt=0)
+    period: Literal["monthly", "yearly"]
+    start_date: date
+    end_date: Optional[date] = None
+    notification_threshold: float = Field(default=0.8, ge=0, le=1)
+
+
+class ClassifyIn(BaseModel):
+    description: str
+    provider: Optional[Provider] = None
+
+
+class ClassifyBatchIn(BaseModel):
+    descriptions: List[str] = Field(min_length=1, max_length=MAX_BATCH)
+    provider: Optional[Provider] = None
+
+
+class ChatIn(BaseModel):
+    query: str
+    provider: Optional[Provider] = None
+    history: Optional[List[Dict[str, str]]] = None
+    summary: Optional[str] = None
+    stream: bool = False
+
+
+def require_token(authorization: Optional[str] = Header(default=None)):
+    """Reject requests without the bearer token when API_TOKEN is set."""
+    if API_TOKEN and authorization != f"Bearer {API_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid or missing API token")
+
+
+def get_transaction_model() -> AsyncTransaction:
+    return AsyncTransaction()
+
+
+def get_budget_model() -> AsyncBudget:
+    return AsyncBudget()
+
+
+def get_category_model() -> Category:
+    return Category()
+
+
+_chat_services = {}
+
+
+def get_chat_service(provider: str):
+    """Return a chat service per provider, built once per worker (it syncs the RAG index)."""
+    from services.financial_chat_service import FinancialChatService
+
+    service = _chat_services.get(provider)
+    if service is None:
+        service = _chat_services.setdefault(provider, FinancialChatService(provider=provider))
+    return service
+
+
+def to_json(value):
+    """Encode rows and analytics results, including Decimal, dates and numpy scalars."""
+    return jsonable_encoder(value, custom_encoder={np.integer: int, np.floating: float, np.bool_: bool})
+
+
+def encode_cursor(row: dict) -> str:
+    key = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+app = FastAPI(title="Personal Finance Manager API", dependencies=[Depends(require_token)])
+
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Time each request per route template and trace it as one root span."""
+    started = time.perf_counter()
+    with start_trace("api.request", method=request.method, path=request.url.path):
+        response = await call_next(request)
+    route = request.scope.get('route')
+    REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                            route=route.path if route else "unmatched")
+    return response
+
+
+@app.get("/health")
+def health():
+    return {'status': 'ok'}
+
+
+@app.get("/transactions")
+async def list_transactions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    category: Optional[str] = None,
+    type: Optional[Literal["income", "expense"]] = None,
+    transaction_model: AsyncTransaction = Depends(get_transaction_model),
+):
+    """Page through transactions, newest first; pass ``next_cursor`` back as ``cursor``."""
+    before = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page follows
+    rows = await transaction_model.get_transactions_page(limit + 1, before, start, end, category, type)
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return to_json({'items': rows[:limit], 'next_cursor': next_cursor})
+
+
+@app.post("/transactions", status_code=201)
+async def create_transaction(transaction: TransactionIn,
+                             transaction_model: AsyncTransaction = Depends(get_transaction_model)):
+    return to_json(await transaction_model.create_transaction(**transaction.model_dump()))
+
+
+@app.post("/transactions/batch", status_code=201)
+async def create_transactions(batch: TransactionBatchIn,
+                              transaction_model: AsyncTransaction = Depends(get_transaction_model)):
+    """Create many transactions concurrently in one request; failed items are reported by index."""
+    results = await asyncio.gather(
+        *(transaction_model.create_transaction(**transaction.model_dump()) for transaction in batch.transactions),
+        return_exceptions=True
+    )
+    created, errors = [], []
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            logger.error(f"Error creating transaction {index} of batch: {str(result)}")
+            errors.append({'index': index, 'error': str(result)})
+        else:
+            created.append(result)
+    return to_json({'created': created, 'errors': errors})
+
+
+@app.patch("/transactions/{transaction_id}")
+async def update_transaction(transaction_id: int, update: TransactionUpdate,
+                             transaction_model: AsyncTransaction = Depends(get_transaction_model)):
+    updated = await transaction_model.update_transaction(transaction_id, update.model_dump(exclude_unset=True))
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return {'id': transaction_id}
+
+
+@app.delete("/transactions/{transaction_id}", status_code=204)
+async def delete_transaction(transaction_id: int,
+                             transaction_model: AsyncTransaction = Depends(get_transaction_model)):
+    if not await transaction_model.delete_transaction(transaction_id):
+        raise HTTPException(status_code=404, detail="Transaction not found")
+
+
+@app.get("/categories")
+async def list_categories(category_model: Category = Depends(get_category_model)):
+    return to_json(await get_async_database().run(category_model.get_category_usage))
+
+
+@app.get("/budgets")
+async def list_budgets(budget_model: AsyncBudget = Depends(get_budget_model)):
+    return to_json(await budget_model.get_all_budgets())
+
+
+@app.post("/budgets", status_code=201)
+async def create_budget(budget: BudgetIn, budget_model: AsyncBudget = Depends(get_budget_model)):
+    created = await budget_model.create_budget(**budget.model_dump())
+    if not created:
+        raise HTTPException(status_code=500, detail="Budget was not created")
+    return to_json(created)
+
+
+@app.get("/budgets/progress")
+async def budget_progress(ids: Optional[List[int]] = Query(None, max_length=MAX_BATCH),
+                          budget_model: AsyncBudget = Depends(get_budget_model)):
+    """Progress of the given budgets (all when ``ids`` is omitted) in one request."""
+    if ids is None:
+        ids = [budget['id'] for budget in await budget_model.get_all_budgets()]
+    progress = await budget_model.get_budgets_progress(ids)
+    return to_json([dict(item, id=budget_id) for budget_id, item in zip(ids, progress)])
+
+
+@app.delete("/budgets/{budget_id}", status_code=204)
+async def delete_budget(budget_id: int, budget_model: AsyncBudget = Depends(get_budget_model)):
+    if not await budget_model.delete_budget(budget_id):
+        raise HTTPException(status_code=404, detail="Budget not found")
+
+
+@app.get("/analytics/aggregates")
+async def aggregates(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    category: Optional[str] = None,
+    type: Optional[Literal["income", "expense"]] = None,
+    group_by: Optional[Literal["category", "month"]] = None,
+    limit: int = Query(12, ge=1, le=MAX_PAGE_SIZE),
+    transaction_model: AsyncTransaction = Depends(get_transaction_model),
+):
+    """Totals, counts, averages and maxima per type, optionally per category or month."""
+    return to_json(await transaction_model.get_aggregates(start, end, category, type, group_by, limit))
+
+
+@app.get("/analytics/insights")
+async def insights(start: Optional[date] = None, end: Optional[date] = None,
+                   transaction_model: AsyncTransaction = Depends(get_transaction_model)):
+    """Spending insights for a period, the last 90 days by default."""
+    # Imported here so workers that never serve insights do not load statsmodels and scikit-learn
+    from utils.analytics import get_spending_insights
+
+    end = end or date.today()
+    start = start or end - timedelta(days=90)
+    rows = await transaction_model.get_transactions_for_period(start, end)
+    if not rows:
+        return {}
+    df = pd.DataFrame(rows)
+    df['amount'] = df['amount'].astype(float)
+    # Model fitting is CPU-bound; keep it off the event loop
+    return to_json(await asyncio.to_thread(get_spending_insights, df))
+
+
+@app.get("/summary")
+async def summary(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  transaction_model: AsyncTransaction = Depends(get_transaction_model),
+                  budget_model: AsyncBudget = Depends(get_budget_model)):
+    """Dashboard figures for a period (the current month by default); independent queries run concurrently."""
+    start = start or datetime.combine(date.today().replace(day=1), datetime.min.time())
+    totals, by_category, largest, budgets = await asyncio.gather(
+        transaction_model.get_aggregates(start, end),
+        transaction_model.get_aggregates(start, end, type='expense', group_by='category'),
+        transaction_model.get_largest_transactions(start, end, type='expense'),
+        budget_model.get_all_budgets(),
+    )
+    progress = await budget_model.get_budgets_progress([budget['id'] for budget in budgets])
+    return to_json({
+        'totals': totals,
+        'expenses_by_category': by_category,
+        'largest_expenses': largest,
+        'budgets': [dict(budget, **item) for budget, item in zip(budgets, progress)],
+    })
+
+
+@app.post("/classify")
+def classify(request: ClassifyIn):
+    result = get_ai_service(request.provider or API_AI_PROVIDER).classify_transaction(request.description)
+    if result is None:
+        raise HTTPException(status_code=502, detail="Classification failed")
+    return to_json(result)
+
+
+@app.post("/classify/batch")
+def classify_batch(request: ClassifyBatchIn):
+    """Classify many descriptions with the provider's batched, rate-limited classifier."""
+    service = get_ai_service(request.provider or API_AI_PROVIDER)
+    return to_json(service.classify_transactions(request.descriptions))
+
+
+@app.post("/chat")
+def chat(request: ChatIn):
+    """Answer a question about the user's finances; ``stream`` returns plain text as it is generated."""
+    result = get_chat_service(request.provider or API_AI_PROVIDER).get_chat_response(
+        request.query, stream=request.stream, history=request.history, summary=request.summary
+    )
+    if result.get('response') is None:
+        raise HTTPException(status_code=502, detail=result.get('error', "Chat failed"))
+    if request.stream:
+        return StreamingResponse(iter(result['response']), media_type='text/plain; charset=utf-8')
+    return to_json({key: value for key, value in result.items() if key != 'prompt_report'})
+
+
+@app.exception_handler(ValueError)
+def value_error(request: Request, exc: ValueError):
+    return JSONResponse(status_code=400, content={'detail': str(exc)})
+
+
+def main():
+    import uvicorn
+
+    uvicorn.run("api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
+
+
+if __name__ == "__main__":
+    main()
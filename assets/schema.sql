@@ -1,30 +1,73 @@
--- Drop existing indices if they exist
-DROP INDEX IF EXISTS idx_transactions_created_at;
-DROP INDEX IF EXISTS idx_transactions_type;
-DROP INDEX IF EXISTS idx_transactions_metadata;
-DROP INDEX IF EXISTS idx_budgets_category;
-DROP INDEX IF EXISTS idx_budgets_period;
-
--- Drop existing tables if they exist
-DROP TABLE IF EXISTS transactions;
-DROP TABLE IF EXISTS budgets;
-
-CREATE TABLE transactions (
+-- Idempotent: creates whatever is missing and leaves existing tables and rows alone.
+-- Concurrent workers starting together run it one at a time.
+SELECT pg_advisory_xact_lock(hashtext('assets/schema.sql'));
+
+CREATE TABLE IF NOT EXISTS categories (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE,
+    usage_count INTEGER NOT NULL DEFAULT 0,
+    total_expenses DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_income DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
     id SERIAL PRIMARY KEY,
     description TEXT NOT NULL,
     amount DECIMAL(10,2) NOT NULL,
     type VARCHAR(10) NOT NULL,
-    category VARCHAR(50) NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
     cycle VARCHAR(10) NOT NULL,
     start_date DATE,
     end_date DATE,
     due_date DATE,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     transaction_text TEXT,
-    metadata JSONB
+    metadata JSONB,
+    -- Hash of date, amount, type, normalized description and bank reference of imported rows
+    fingerprint CHAR(40)
 );
 
-CREATE TABLE budgets (
+-- Columns added after the table was first created
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS fingerprint CHAR(40);
+
+-- Databases created before categories got their own table store the name on each transaction
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'transactions' AND column_name = 'category'
+    ) THEN
+        INSERT INTO categories (name)
+        SELECT DISTINCT category FROM transactions
+        ON CONFLICT (name) DO NOTHING;
+
+        ALTER TABLE transactions ADD COLUMN IF NOT EXISTS category_id INTEGER;
+        UPDATE transactions t SET category_id = c.id FROM categories c WHERE c.name = t.category;
+        ALTER TABLE transactions ALTER COLUMN category_id SET NOT NULL;
+        ALTER TABLE transactions ADD CONSTRAINT transactions_category_id_fkey
+            FOREIGN KEY (category_id) REFERENCES categories(id);
+        ALTER TABLE transactions DROP COLUMN category;
+
+        -- The usage trigger only counts later writes; start the counters from the migrated rows
+        UPDATE categories c SET
+            usage_count = usage.count,
+            total_expenses = usage.expenses,
+            total_income = usage.income
+        FROM (
+            SELECT category_id, COUNT(*) AS count,
+                   COALESCE(SUM(amount) FILTER (WHERE type = 'expense'), 0) AS expenses,
+                   COALESCE(SUM(amount) FILTER (WHERE type = 'income'), 0) AS income
+            FROM transactions
+            GROUP BY category_id
+        ) usage
+        WHERE c.id = usage.category_id;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS budgets (
     id SERIAL PRIMARY KEY,
     category VARCHAR(50) NOT NULL,
     amount DECIMAL(10,2) NOT NULL,
@@ -39,6 +82,75 @@ CREATE TABLE budgets (
 -- Create indices
 CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_at);
 CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
+CREATE INDEX IF NOT EXISTS idx_transactions_category_id ON transactions(category_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_updated_at ON transactions(updated_at);
 CREATE INDEX IF NOT EXISTS idx_transactions_metadata ON transactions USING GIN (metadata);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions(fingerprint);
 CREATE INDEX IF NOT EXISTS idx_budgets_category ON budgets(category);
 CREATE INDEX IF NOT EXISTS idx_budgets_period ON budgets(period);
+
+
+-- Keep category usage counters in sync with the transactions that reference them
+CREATE OR REPLACE FUNCTION update_category_usage() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE categories SET
+            usage_count = usage_count - 1,
+            total_expenses = total_expenses - CASE WHEN OLD.type = 'expense' THEN OLD.amount ELSE 0 END,
+            total_income = total_income - CASE WHEN OLD.type = 'income' THEN OLD.amount ELSE 0 END
+        WHERE id = OLD.category_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE categories SET
+            usage_count = usage_count + 1,
+            total_expenses = total_expenses + CASE WHEN NEW.type = 'expense' THEN NEW.amount ELSE 0 END,
+            total_income = total_income + CASE WHEN NEW.type = 'income' THEN NEW.amount ELSE 0 END
+        WHERE id = NEW.category_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_transactions_category_usage ON transactions;
+CREATE TRIGGER trg_transactions_category_usage
+AFTER INSERT OR DELETE OR UPDATE OF category_id, amount, type ON transactions
+FOR EACH ROW EXECUTE FUNCTION update_category_usage();
+
+-- Bump a per-table version on every write so caches can detect changed data cheaply
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO data_versions (name) VALUES ('transactions') ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_transactions_data_version ON transactions;
+CREATE TRIGGER trg_transactions_data_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON transactions
+FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+-- Track modification times so derived indexes (embeddings) can sync incrementally
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_transactions_updated_at ON transactions;
+CREATE TRIGGER trg_transactions_updated_at
+BEFORE UPDATE ON transactions
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Only renames matter to transaction documents; usage counter updates are ignored
+DROP TRIGGER IF EXISTS trg_categories_updated_at ON categories;
+CREATE TRIGGER trg_categories_updated_at
+BEFORE UPDATE OF name ON categories
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
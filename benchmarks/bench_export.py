@@ -0,0 +1,89 @@
+"""Compare the pandas CSV export path with the server-side COPY path.
+
+Run from the project root against a scratch database:
+
+    python -m benchmarks.bench_export --rows 500000
+"""
+import argparse
+import io
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from models.category import Category
+from models.database import Database
+from models.transaction import Transaction
+from utils.helpers import prepare_export_data, export_to_csv
+
+
+def seed_transactions(db: Database, rows: int, years: int):
+    """Insert synthetic transactions spread evenly over the given number of years."""
+    categories = ['groceries', 'utilities', 'entertainment', 'transportation', 'housing']
+    category_ids = [Category().get_category_id(name) for name in categories]
+    query = """
+    INSERT INTO transactions (description, amount, type, category_id, cycle, created_at, transaction_text)
+    SELECT
+        'Benchmark transaction ' || g,
+        ROUND((random() * 1000)::numeric, 2),
+        CASE WHEN g %% 5 = 0 THEN 'income' ELSE 'expense' END,
+        (%s::integer[])[1 + g %% 5],
+        'none',
+        NOW() - (random() * %s * INTERVAL '365 days'),
+        'Benchmark transaction ' || g
+    FROM generate_series(1, %s) AS g
+    """
+    db.execute(query, (category_ids, years, rows))
+
+
+def pandas_export(transaction: Transaction, start_date: date, end_date: date) -> bytes:
+    """Export the way the Streamlit page does: fetch all rows, filter and format in pandas."""
+    df = pd.DataFrame(transaction.get_all_transactions())
+    df['created_at'] = pd.to_datetime(df['created_at'])
+    mask = (df['created_at'].dt.date >= start_date) & (df['created_at'].dt.date <= end_date)
+    return export_to_csv(prepare_export_data(df[mask]))
+
+
+def copy_export(transaction: Transaction, start_date: date, end_date: date) -> bytes:
+    """Export with PostgreSQL producing the CSV through COPY TO STDOUT."""
+    buffer = io.BytesIO()
+    transaction.export_csv(start_date, end_date, buffer)
+    return buffer.getvalue()
+
+
+def run(label, func, *args, repeat: int = 3):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(func(*args))
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"{label:<10} best {best:8.3f}s  mean {sum(timings) / len(timings):8.3f}s  {size / 1e6:8.1f} MB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-seed', action='store_true', help="Use the rows already in the database")
+    args = parser.parse_args()
+
+    db = Database()
+    if not args.no_seed:
+        print(f"Seeding {args.rows} transactions over {args.years} years...")
+        seed_transactions(db, args.rows, args.years)
+
+    transaction = Transaction()
+    end_date = date.today()
+    start_date = end_date - timedelta(days=365 * args.years)
+
+    pandas_time = run("pandas", pandas_export, transaction, start_date, end_date, repeat=args.repeat)
+    copy_time = run("COPY", copy_export, transaction, start_date, end_date, repeat=args.repeat)
+    print(f"COPY speedup: {pandas_time / copy_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
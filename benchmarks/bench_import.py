@@ -0,0 +1,94 @@
+"""Time the stages of the bank-statement import on a synthetic CSV export.
+
+Parsing, normalization and local classification run without a database:
+
+    python -m benchmarks.bench_import --rows 100000
+
+With ``--db`` the full import (duplicate check and COPY) also runs against a
+scratch database, twice, the second time with every row already stored:
+
+    python -m benchmarks.bench_import --rows 100000 --db
+"""
+import argparse
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from services.rule_classifier import CategoryPredictor
+from services.statement_import import CategoryAssigner, StatementImporter, normalize_statement, read_statement
+
+MERCHANTS = [
+    "BIEDRONKA 1234 WARSZAWA", "LIDL SP. Z O.O.", "ORLEN STACJA 77", "NETFLIX.COM", "PGE OBROT SA",
+    "UBER *TRIP", "Czynsz za mieszkanie", "Wynagrodzenie za {month}", "ALLEGRO.PL", "Restauracja Pod Lipami",
+    "APTEKA DOZ", "Przelew od Jan Kowalski", "KINO HELIOS", "ZABKA Z{number}", "Apple.com/bill",
+]
+
+
+def generate_csv(rows: int, seed: int = 0) -> bytes:
+    """Build a bank-style CSV export: account preamble, Polish headers, comma decimals."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365)
+    lines = [
+        "Numer rachunku;PL61 1090 1014 0000 0712 1981 2874",
+        "Waluta;PLN",
+        "",
+        "Data operacji;Data księgowania;Opis operacji;Kontrahent;Kwota;Waluta",
+    ]
+    for index in range(rows):
+        day = start + timedelta(days=rng.randrange(365))
+        description = rng.choice(MERCHANTS).format(month=day.strftime('%m/%Y'), number=rng.randrange(9999))
+        income = description.startswith(("Wynagrodzenie", "Przelew od"))
+        amount = rng.uniform(1000, 8000) if income else -rng.uniform(3, 600)
+        formatted = f"{amount:,.2f}".replace(',', ' ').replace('.', ',')
+        lines.append(f"{day:%d.%m.%Y};{day:%d.%m.%Y};{description} #{index % 97};;{formatted};PLN")
+    return "\n".join(lines).encode('utf-8')
+
+
+def timed(label: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {elapsed:8.3f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--chunk-rows', type=int, default=20_000)
+    parser.add_argument('--db', action='store_true', help="Also run the full import against the database")
+    args = parser.parse_args()
+
+    data = generate_csv(args.rows)
+    print(f"{args.rows} rows, {len(data) / 1e6:.1f} MB")
+
+    def parse():
+        return list(read_statement(io.BytesIO(data), 'statement.csv', args.chunk_rows)[1])
+
+    def normalize(chunks):
+        return [normalize_statement(chunk)[0] for chunk in chunks]
+
+    def classify(frames):
+        assigner = CategoryAssigner(predictor=CategoryPredictor())
+        for frame in frames:
+            assigner.assign(frame['description'], frame['type'])
+        return assigner
+
+    chunks, parse_time = timed("parse", parse)
+    frames, normalize_time = timed("normalize", normalize, chunks)
+    assigner, classify_time = timed("classify", classify, frames)
+    total = parse_time + normalize_time + classify_time
+    print(f"{'total':<12} {total:8.3f}s  {args.rows / total:,.0f} rows/s  "
+          f"({assigner.local} of {len(assigner._categories)} descriptions categorized locally)")
+
+    if args.db:
+        importer = StatementImporter(chunk_rows=args.chunk_rows)
+        for label in ("import", "re-import"):
+            summary = importer.run(io.BytesIO(data), 'statement.csv')
+            print(f"{label:<12} {summary['seconds']:8.3f}s  {summary['inserted']} inserted, "
+                  f"{summary['duplicates']} duplicates, {summary['rows'] / summary['seconds']:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Profile import time of the app shell and each page against a startup budget.
+
+Each measurement runs in a fresh interpreter with warm bytecode caches. The
+shell (``main.py`` without the RAG warm-up) must import within ``--budget``
+seconds; pages are reported as the extra time their first visit costs:
+
+    python -m benchmarks.bench_startup --budget 1.0 --top 15
+
+Exits with status 1 when the shell is over budget.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import namedtuple
+
+SHELL_MODULE = 'main'
+PAGE_MODULES = [
+    'components.dashboard',
+    'components.transaction_form',
+    'components.manage_transactions',
+    'components.manage_categories',
+    'components.manage_budgets',
+    'components.chat_assistant',
+]
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+ImportRecord = namedtuple('ImportRecord', 'module self_us cumulative_us depth')
+
+
+def _run(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ, RAG_WARM_UP='0', PYTHONWARNINGS='ignore')
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    return subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+
+
+def wall_time(modules, repeat: int) -> float:
+    """Best-of-``repeat`` wall time to import the modules in a fresh interpreter."""
+    code = (
+        "import time; started = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in modules)
+        + "print(time.perf_counter() - started)"
+    )
+    return min(float(_run(code).stdout.strip().splitlines()[-1]) for _ in range(repeat))
+
+
+def import_profile(modules) -> list:
+    """Parse ``-X importtime`` output for importing the modules."""
+    stderr = _run("".join(f"import {module}\n" for module in modules), importtime=True).stderr
+    records = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def top_level_packages(records, top: int) -> list:
+    """Sum cumulative time per top-level package imported directly (depth 0)."""
+    totals = {}
+    for record in records:
+        if record.depth == 0:
+            package = record.module.split('.')[0]
+            totals[package] = totals.get(package, 0) + record.cumulative_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def print_profile(label: str, records, top: int):
+    print(f"\n{label}: slowest imports (cumulative)")
+    for package, microseconds in top_level_packages(records, top):
+        print(f"  {package:<32} {microseconds / 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=float(os.environ.get('STARTUP_BUDGET_SECONDS', 1.0)),
+                        help="Maximum seconds to import the app shell")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--no-pages', action='store_true', help="Only measure the app shell")
+    args = parser.parse_args()
+
+    # Run from the project root so the app modules are importable
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    shell_time = wall_time([SHELL_MODULE], args.repeat)
+    print_profile("shell", import_profile([SHELL_MODULE]), args.top)
+
+    if not args.no_pages:
+        print("\nFirst visit cost per page (on top of the shell):")
+        for module in PAGE_MODULES:
+            page_time = wall_time([SHELL_MODULE, module], args.repeat) - shell_time
+            print(f"  {module:<32} {page_time * 1000:9.1f} ms")
+
+    status = "OK" if shell_time <= args.budget else "OVER BUDGET"
+    print(f"\nShell import: {shell_time * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms) {status}")
+    sys.exit(0 if shell_time <= args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare query latency and recall of the Chroma and FAISS vector stores.
+
+Uses synthetic clustered vectors of the embedding model's dimension, so no
+database or model is needed:
+
+    python -m benchmarks.bench_vector_search --sizes 100000 1000000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from services.vector_store import ChromaVectorStore, FaissVectorStore
+
+DIM = 384
+INSERT_BATCH = 5000
+
+
+class ArrayEmbeddingFunction:
+    """Resolve synthetic documents ("doc-<row>") to precomputed vectors."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def __call__(self, input):
+        return self.vectors[[int(doc.split('-')[1]) for doc in input]]
+
+
+def random_vectors(count: int, seed: int, clusters: int = 1000, noise: float = 1.0) -> np.ndarray:
+    """Normalized vectors grouped around random centres, like sentence embeddings.
+
+    Uniformly random vectors are a worst case for approximate indexes and
+    understate their recall on real data.
+    """
+    rng = np.random.default_rng(seed)
+    centres = np.random.default_rng(0).standard_normal((clusters, DIM), dtype=np.float32)
+    vectors = centres[rng.integers(clusters, size=count)]
+    vectors += noise * rng.standard_normal((count, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> list:
+    """Brute-force top-k ids (as strings) for each query."""
+    truth = []
+    for query in queries:
+        scores = vectors @ query
+        top = np.argpartition(-scores, k)[:k]
+        truth.append({str(id_) for id_ in top})
+    return truth
+
+
+def fill(store, size: int):
+    for start in range(0, size, INSERT_BATCH):
+        rows = range(start, min(start + INSERT_BATCH, size))
+        store.upsert(
+            [str(row) for row in rows],
+            [f"doc-{row}" for row in rows],
+            [{"content_hash": str(row)} for row in rows]
+        )
+    store.flush()
+
+
+def measure(label: str, store, queries: np.ndarray, truth: list, k: int):
+    timings, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = store.query(query, k)
+        timings.append(time.perf_counter() - started)
+        recalls.append(len({result['id'] for result in results} & expected) / k)
+    p50, p95 = np.percentile(timings, [50, 95]) * 1000
+    print(f"{label:<12} p50 {p50:8.2f}ms  p95 {p95:8.2f}ms  recall@{k} {np.mean(recalls):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--backends', nargs='+', default=['chroma', 'flat', 'ivf', 'hnsw'])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n{size} vectors")
+        vectors = random_vectors(size, seed=1)
+        queries = random_vectors(args.queries, seed=2)
+        truth = exact_neighbours(vectors, queries, args.k)
+        embedding_function = ArrayEmbeddingFunction(vectors)
+
+        for backend in args.backends:
+            with tempfile.TemporaryDirectory() as path:
+                if backend == 'chroma':
+                    import chromadb
+                    store = ChromaVectorStore(chromadb.PersistentClient(path=path), embedding_function, path=path)
+                else:
+                    store = FaissVectorStore(embedding_function, DIM, path=path, index_type=backend)
+                started = time.perf_counter()
+                fill(store, size)
+                print(f"{backend:<12} built in {time.perf_counter() - started:.1f}s")
+                measure(backend, store, queries, truth, args.k)
+
+
+if __name__ == "__main__":
+    main()
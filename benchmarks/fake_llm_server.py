@@ -0,0 +1,214 @@
+"""Local stand-in for Ollama and the OpenAI API with deterministic latency.
+
+Implements Ollama's ``/api/generate`` and ``/api/tags`` and the OpenAI-compatible
+``/v1/chat/completions`` (streaming and not) and ``/v1/models``. Every
+response waits ``--latency`` seconds before the first token and then
+generates ``--tokens-per-second``. Classification prompts get canned JSON
+answers; other prompts get ``--response-tokens`` tokens of filler text.
+
+    python -m benchmarks.fake_llm_server --port 8089 --latency 0.2 --tokens-per-second 40
+    OLLAMA_BASE_URL=http://127.0.0.1:8089/api OPENAI_BASE_URL=http://127.0.0.1:8089/v1 streamlit run main.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional
+
+DEFAULT_MODELS = ["llama2", "gpt-3.5-turbo", "gpt-4"]
+DEFAULT_CLASSIFICATION = {'amount': 42.0, 'type': 'expense', 'category': 'groceries', 'cycle': 'none'}
+
+# Numbered descriptions in the batch classification prompt: 3. "description"
+BATCH_ITEM_RE = re.compile(r'^\s*(\d+)\.\s+"', re.MULTILINE)
+FILLER_WORDS = "Based on your recent transactions your spending looks stable this month".split()
+
+
+class FakeLLMConfig:
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 50.0, response_tokens: int = 60,
+                 classification: Optional[dict] = None, models: Optional[List[str]] = None):
+        """Timing and canned outputs shared by all requests to one server."""
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.classification = classification or DEFAULT_CLASSIFICATION
+        self.models = models or DEFAULT_MODELS
+
+    def answer(self, prompt: str) -> List[str]:
+        """Return the response tokens for a prompt."""
+        if "Return a JSON object" not in prompt:
+            return [f"{FILLER_WORDS[index % len(FILLER_WORDS)]} " for index in range(self.response_tokens)]
+        if '"results"' in prompt:
+            indexes = [int(index) for index in BATCH_ITEM_RE.findall(prompt)]
+            text = json.dumps({'results': [dict(self.classification, index=index) for index in indexes]})
+        else:
+            text = json.dumps(self.classification)
+        # Stream JSON in word-sized pieces, like a real model would
+        return re.findall(r'\S+\s*', text)
+
+    def generate(self, prompt: str) -> Iterator[str]:
+        """Yield the response tokens with the configured latency and rate."""
+        time.sleep(self.latency)
+        for token in self.answer(prompt):
+            time.sleep(1 / self.tokens_per_second)
+            yield token
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = FakeLLMConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_chunk(self, data: str):
+        encoded = data.encode('utf-8')
+        self.wfile.write(f"{len(encoded):X}\r\n".encode('ascii') + encoded + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/api/tags':
+            self._send_json({'models': [{'name': name, 'model': name} for name in self.config.models]})
+        elif path in ('/v1/models', '/models'):
+            self._send_json({'object': 'list', 'data': [
+                {'id': name, 'object': 'model', 'owned_by': 'fake'} for name in self.config.models
+            ]})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        request = self._read_json()
+        if path == '/api/generate':
+            self._ollama_generate(request)
+        elif path in ('/v1/chat/completions', '/chat/completions'):
+            self._openai_chat(request)
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def _ollama_generate(self, request: dict):
+        model = request.get('model', self.config.models[0])
+        prompt = request.get('prompt', '')
+        counts = {'prompt_eval_count': count_tokens(prompt)}
+        if not request.get('stream', True):
+            tokens = list(self.config.generate(prompt))
+            self._send_json(dict(counts, model=model, response="".join(tokens), done=True,
+                                 eval_count=len(tokens)))
+            return
+
+        self._start_chunked('application/x-ndjson')
+        generated = 0
+        for token in self.config.generate(prompt):
+            generated += 1
+            self._write_chunk(json.dumps({'model': model, 'response': token, 'done': False}) + "\n")
+        self._write_chunk(json.dumps(dict(counts, model=model, response='', done=True,
+                                          eval_count=generated)) + "\n")
+        self._end_chunked()
+
+    def _openai_chat(self, request: dict):
+        model = request.get('model', self.config.models[0])
+        prompt = "\n".join(str(message.get('content', '')) for message in request.get('messages', []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        if not request.get('stream'):
+            tokens = list(self.config.generate(prompt))
+            self._send_json({
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': "".join(tokens)}}],
+                'usage': {'prompt_tokens': count_tokens(prompt), 'completion_tokens': len(tokens),
+                          'total_tokens': count_tokens(prompt) + len(tokens)},
+            })
+            return
+
+        def event(delta: dict, finish_reason: Optional[str] = None) -> str:
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                     'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        self._start_chunked('text/event-stream')
+        self._write_chunk(event({'role': 'assistant', 'content': ''}))
+        for token in self.config.generate(prompt):
+            self._write_chunk(event({'content': token}))
+        self._write_chunk(event({}, 'stop'))
+        self._write_chunk("data: [DONE]\n\n")
+        self._end_chunked()
+
+
+def start_fake_llm_server(config: Optional[FakeLLMConfig] = None, host: str = '127.0.0.1',
+                          port: int = 0) -> ThreadingHTTPServer:
+    """Serve the fake endpoints on a background thread; ``port=0`` picks a free port."""
+    handler = type('ConfiguredFakeLLMHandler', (FakeLLMHandler,), {'config': config or FakeLLMConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    return server
+
+
+def server_urls(server: ThreadingHTTPServer) -> dict:
+    """Base URLs to point the AI services at, as OLLAMA_BASE_URL and OPENAI_BASE_URL."""
+    host, port = server.server_address[:2]
+    return {
+        'OLLAMA_BASE_URL': f"http://{host}:{port}/api",
+        'OPENAI_BASE_URL': f"http://{host}:{port}/v1",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--response-tokens', type=int, default=60, help="Length of free-text answers")
+    parser.add_argument('--classification', help="JSON object returned for classification prompts")
+    parser.add_argument('--models', default=",".join(DEFAULT_MODELS))
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        classification=json.loads(args.classification) if args.classification else None,
+        models=[name.strip() for name in args.models.split(',') if name.strip()],
+    )
+    server = start_fake_llm_server(config, args.host, args.port)
+    for name, url in server_urls(server).items():
+        print(f"{name}={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Drive concurrent simulated sessions over the app's page mix and report latency per page.
+
+Two drivers are available:
+
+* ``headless`` (default) runs, in one thread per session, the model and
+  service calls each page makes, without Streamlit;
+* ``apptest`` runs one Streamlit ``AppTest`` of ``main.py`` per session and
+  navigates it between pages, so widget and script-rerun costs are included.
+
+The AI services talk to the local fake LLM server (``benchmarks.fake_llm_server``)
+with fixed latency and token rate, and the database is seeded with synthetic
+transactions and budgets. Run from the project root against a scratch database:
+
+    python -m benchmarks.load_test --sessions 20 --duration 60 --seed-rows 50000
+"""
+import argparse
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict, namedtuple
+from typing import Dict, List
+
+from benchmarks.fake_llm_server import FakeLLMConfig, server_urls, start_fake_llm_server
+
+# Page name -> navigation translation key; the default mix weights the pages by how often users open them
+PAGE_KEYS = {
+    'dashboard': 'navigation.dashboard',
+    'add': 'navigation.add_transaction',
+    'manage': 'navigation.manage_transactions',
+    'categories': 'navigation.manage_categories',
+    'budgets': 'navigation.budget_planning',
+    'chat': 'navigation.chat_assistant',
+}
+DEFAULT_MIX = "dashboard=4,add=2,manage=2,budgets=1,chat=1"
+
+DESCRIPTIONS = [
+    "czynsz 1500 PLN",
+    "wypłata 5000 złotych",
+    "internet domowy 20zł miesięcznie",
+    "zakupy w biedronce 86,40",
+    "kino z rodziną",
+    "naprawa roweru u znajomego",
+]
+QUESTIONS = [
+    "How much did I spend on groceries last month?",
+    "What are my top spending categories this year?",
+    "Am I spending more on entertainment than in March?",
+    "Can you suggest ways to reduce my monthly expenses?",
+    "What was my largest expense in the last 30 days?",
+]
+
+Sample = namedtuple('Sample', 'page seconds ok')
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "page=weight,..." into page weights."""
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        page, _, weight = item.partition('=')
+        if page not in PAGE_KEYS:
+            raise ValueError(f"Unknown page {page!r}; expected one of {', '.join(PAGE_KEYS)}")
+        mix[page] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    rank = math.ceil(q / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, dict]:
+    """Throughput and latency percentiles per page, plus an ``all`` row."""
+    by_page = defaultdict(list)
+    for sample in samples:
+        by_page[sample.page].append(sample)
+        by_page['all'].append(sample)
+
+    summary = {}
+    for page, page_samples in by_page.items():
+        latencies = sorted(sample.seconds for sample in page_samples if sample.ok)
+        summary[page] = {
+            'requests': len(page_samples),
+            'errors': sum(1 for sample in page_samples if not sample.ok),
+            'throughput': len(page_samples) / elapsed if elapsed else 0.0,
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else float('nan'),
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, dict], sessions: int, elapsed: float):
+    print(f"\n{sessions} sessions, {elapsed:.1f}s")
+    print(f"{'page':<12}{'requests':>9}{'errors':>8}{'req/s':>8}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    pages = sorted(page for page in summary if page != 'all') + ['all']
+    for page in pages:
+        row = summary[page]
+        print(f"{page:<12}{row['requests']:>9}{row['errors']:>8}{row['throughput']:>8.2f}"
+              + "".join(f"{row[key] * 1000:>9.0f}" for key in ('p50', 'p90', 'p95', 'p99', 'max')))
+
+
+def install_ai_services(base_urls: dict, provider: str):
+    """Point both providers at the fake LLM server through the shared service registry.
+
+    Returns the service sessions use for the selected provider.
+    """
+    from services import ai_clients
+    from services.ollama_service import OllamaService
+    from services.openai_service import OpenAIService
+
+    os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+    services = {
+        "OpenAI": OpenAIService(base_url=base_urls['OPENAI_BASE_URL']),
+        "Ollama": OllamaService(base_url=base_urls['OLLAMA_BASE_URL']),
+    }
+    with ai_clients._lock:
+        ai_clients._services[("OpenAI", os.environ['OPENAI_API_KEY'])] = services["OpenAI"]
+        ai_clients._services[("Ollama", None)] = services["Ollama"]
+    return services[provider]
+
+
+class HeadlessSession:
+    def __init__(self, rng: random.Random, ai_service):
+        """One simulated user calling the model layer the way each page does."""
+        from models.budget import Budget
+        from models.category import Category
+        from models.transaction import Transaction
+
+        self.rng = rng
+        self.ai_service = ai_service
+        self.transaction_model = Transaction()
+        self.category_model = Category()
+        self.budget_model = Budget()
+        self.chat_service = None
+
+    def visit(self, page: str):
+        getattr(self, f"page_{page}")()
+
+    def page_dashboard(self):
+        from utils.helpers import (
+            calculate_category_trends, calculate_monthly_income_expenses,
+            get_top_spending_categories, predict_next_month_spending, prepare_transaction_data
+        )
+        df = prepare_transaction_data(self.transaction_model.get_all_transactions())
+        calculate_monthly_income_expenses(df)
+        calculate_category_trends(df)
+        get_top_spending_categories(df)
+        predict_next_month_spending(df)
+
+    def page_add(self):
+        description = self.rng.choice(DESCRIPTIONS)
+        classification = self.ai_service.classify_transaction(description)
+        if classification and classification.get('amount'):
+            self.transaction_model.create_transaction(
+                description=description,
+                amount=classification['amount'],
+                type=classification['type'],
+                category=classification['category'],
+                cycle=classification['cycle']
+            )
+
+    def page_manage(self):
+        import pandas as pd
+        from utils.helpers import prepare_export_data
+        prepare_export_data(pd.DataFrame(self.transaction_model.get_all_transactions()))
+
+    def page_categories(self):
+        self.category_model.get_all_categories()
+
+    def page_budgets(self):
+        for budget in self.budget_model.get_all_budgets():
+            self.budget_model.get_budget_progress(budget['id'])
+
+    def page_chat(self):
+        if self.chat_service is None:
+            from services.financial_chat_service import FinancialChatService
+            from services.ollama_service import OllamaService
+            self.chat_service = FinancialChatService()
+            # Outside a Streamlit run there is no session state to pick the provider from
+            provider = ("ollama", "llama2") if isinstance(self.ai_service, OllamaService) else ("openai", "gpt-3.5-turbo")
+            self.chat_service._get_ai_service = lambda: self.ai_service
+            self.chat_service._get_model = lambda: provider
+        response = self.chat_service.get_chat_response(self.rng.choice(QUESTIONS), stream=True)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        for _ in response['response']:
+            pass
+
+
+class AppTestSession:
+    def __init__(self, rng: random.Random, ai_service, timeout: float = 120):
+        """One simulated user driving a Streamlit AppTest of the whole app."""
+        from streamlit.testing.v1 import AppTest
+        from services.ollama_service import OllamaService
+
+        self.rng = rng
+        self.app = AppTest.from_file("main.py", default_timeout=timeout)
+        self.app.session_state['ai_model'] = "Ollama" if isinstance(ai_service, OllamaService) else "OpenAI"
+        self.app.run()
+
+    def visit(self, page: str):
+        from utils.helpers import get_text
+
+        self.app.sidebar.radio[0].set_value(get_text(PAGE_KEYS[page])).run()
+        if page == 'chat':
+            self.app.chat_input[0].set_value(self.rng.choice(QUESTIONS)).run()
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].message)
+
+
+def run_session(session_factory, index: int, mix: Dict[str, float], deadline: float,
+                think_time: float, seed: int, samples: List[Sample], lock: threading.Lock):
+    rng = random.Random(seed + index)
+    session = session_factory(rng)
+    pages, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        page = rng.choices(pages, weights)[0]
+        started = time.perf_counter()
+        try:
+            session.visit(page)
+            ok = True
+        except Exception as e:
+            print(f"session {index}: {page} failed: {e}")
+            ok = False
+        with lock:
+            samples.append(Sample(page, time.perf_counter() - started, ok))
+        if think_time:
+            time.sleep(rng.expovariate(1 / think_time))
+
+
+def run_load(session_factory, sessions: int, duration: float, mix: Dict[str, float],
+             think_time: float = 0.0, seed: int = 0):
+    """Run ``sessions`` concurrent sessions for ``duration`` seconds; return samples and elapsed time."""
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(target=run_session, name=f"session-{index}",
+                         args=(session_factory, index, mix, deadline, think_time, seed, samples, lock))
+        for index in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def seed_database(rows: int, years: int):
+    """Insert synthetic transactions and one budget per seeded category."""
+    from benchmarks.bench_export import seed_transactions
+    from models.budget import Budget
+    from models.database import Database
+
+    print(f"Seeding {rows} transactions over {years} years...")
+    seed_transactions(Database(), rows, years)
+    budget = Budget()
+    if not budget.get_all_budgets():
+        for category in ['groceries', 'utilities', 'entertainment', 'transportation', 'housing']:
+            budget.create_budget(category, 1000.0, 'monthly')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to keep the sessions running")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Page weights, e.g. dashboard=4,chat=1")
+    parser.add_argument('--driver', choices=['headless', 'apptest'], default='headless')
+    parser.add_argument('--think-time', type=float, default=0.0, help="Mean pause between page visits")
+    parser.add_argument('--provider', choices=['OpenAI', 'Ollama'], default='OpenAI',
+                        help="AI service the sessions use; both talk to the fake LLM server")
+    parser.add_argument('--llm-url', help="Use an already running fake LLM server, e.g. http://127.0.0.1:8089")
+    parser.add_argument('--llm-latency', type=float, default=0.3, help="Fake LLM latency before the first token")
+    parser.add_argument('--llm-tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--seed-rows', type=int, default=20_000)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--no-seed', action='store_true', help="Use the rows already in the database")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the page sequence")
+    args = parser.parse_args()
+    if args.no_seed:
+        # Models are imported lazily below; keep Database() from recreating the schema over the existing rows
+        os.environ.setdefault('DB_INIT_SCHEMA', '0')
+
+    # Run from the project root so main.py and assets/schema.sql are found
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    mix = parse_mix(args.mix)
+    if not args.no_seed:
+        seed_database(args.seed_rows, args.years)
+
+    if args.llm_url:
+        base = args.llm_url.rstrip('/')
+        base_urls = {'OLLAMA_BASE_URL': f"{base}/api", 'OPENAI_BASE_URL': f"{base}/v1"}
+    else:
+        server = start_fake_llm_server(FakeLLMConfig(args.llm_latency, args.llm_tokens_per_second))
+        base_urls = server_urls(server)
+    ai_service = install_ai_services(base_urls, args.provider)
+    if 'chat' in mix:
+        # Load the embedding model and sync the index before the clock starts
+        from services.rag_service import get_rag_service
+        get_rag_service()
+
+    session_class = HeadlessSession if args.driver == 'headless' else AppTestSession
+    print(f"Running {args.sessions} {args.driver} sessions for {args.duration:.0f}s, mix {args.mix}")
+    samples, elapsed = run_load(lambda rng: session_class(rng, ai_service), args.sessions, args.duration,
+                                mix, args.think_time, args.seed)
+    print_summary(summarize(samples, elapsed), args.sessions, elapsed)
+
+
+if __name__ == "__main__":
+    main()
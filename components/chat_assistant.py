@@ -1,10 +1,13 @@
 import streamlit as st
 from utils.helpers import get_text
 from services.financial_chat_service import FinancialChatService
+from services.prompt_budget import bound_history
 import logging
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+@traced()
 def render_chat_assistant():
     """Render the financial chat assistant interface."""
     st.subheader(get_text('chat.title'))
@@ -17,6 +20,8 @@ def render_chat_assistant():
         # Initialize chat history if not exists
         if 'chat_history' not in st.session_state:
             st.session_state.chat_history = []
+        if 'chat_summary' not in st.session_state:
+            st.session_state.chat_summary = None
         
         # Show chat introduction
         st.write(get_text('chat.intro'))
@@ -44,25 +49,54 @@ def render_chat_assistant():
             # Get AI response
             with st.chat_message("assistant"):
                 try:
+                    # The spinner only covers retrieval; tokens render as they arrive
                     with st.spinner(get_text('chat.analyzing')):
-                        response = st.session_state.chat_service.get_chat_response(prompt)
+                        response = st.session_state.chat_service.get_chat_response(
+                            prompt,
+                            stream=True,
+                            history=st.session_state.chat_history[:-1],
+                            summary=st.session_state.chat_summary
+                        )
+                    
+                    if "error" in response:
+                        st.error(response["error"])
+                    else:
+                        stream = response["response"]
+                        content = st.write_stream(stream)
                         
-                        if "error" in response:
-                            st.error(response["error"])
-                        else:
-                            st.write(response["response"])
-                            
-                            # Show context if available
-                            if response.get("context_used"):
-                                with st.expander(get_text('chat.context_title')):
-                                    st.write(response["context_used"])
-                            
-                            # Add assistant response to chat history
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": response["response"],
-                                "context": response.get("context_used")
-                            })
+                        metrics = stream.metrics
+                        if response.get("cached"):
+                            st.caption(get_text('chat.cached_answer'))
+                        elif metrics.time_to_first_token is not None and metrics.tokens_per_second:
+                            st.caption(get_text('chat.stream_metrics').format(
+                                ttft=metrics.time_to_first_token,
+                                rate=metrics.tokens_per_second
+                            ))
+                        report = response.get("prompt_report")
+                        if report:
+                            st.caption(get_text('chat.prompt_size').format(
+                                tokens=report['prompt_tokens'],
+                                budget=report['budget'],
+                                items=report['context_items'],
+                                messages=report['history_messages']
+                            ))
+                        
+                        # Show context if available
+                        if response.get("context_used"):
+                            with st.expander(get_text('chat.context_title')):
+                                st.write(response["context_used"])
+                        
+                        # Add assistant response to chat history
+                        st.session_state.chat_history.append({
+                            "role": "assistant",
+                            "content": content,
+                            "context": response.get("context_used")
+                        })
+                        
+                        # Keep the history bounded; older turns live on in the rolling summary
+                        st.session_state.chat_history, st.session_state.chat_summary = bound_history(
+                            st.session_state.chat_history, st.session_state.chat_summary
+                        )
                 except Exception as e:
                     logger.error(f"Error getting chat response: {str(e)}")
                     st.error(get_text('chat.error'))
@@ -70,6 +104,7 @@ def render_chat_assistant():
         # Clear chat button
         if st.button(get_text('chat.clear_chat')):
             st.session_state.chat_history = []
+            st.session_state.chat_summary = None
             st.rerun()
             
     except Exception as e:
@@ -12,9 +12,16 @@ from utils.helpers import (
     prepare_export_data, export_to_csv
 )
 import logging
+from utils import metrics
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+RENDER_SECONDS = metrics.histogram('dashboard_render_duration_seconds',
+                                   "Time to render the dashboard and each of its tabs.", ['view'])
+
+@traced()
+@RENDER_SECONDS.timed(view='dashboard')
 def render_dashboard():
     """Render the financial dashboard."""
     st.subheader(get_text('dashboard.financial_dashboard'))
@@ -100,6 +107,8 @@ def calculate_monthly_income_expenses(df: pd.DataFrame) -> pd.DataFrame:
     monthly.columns = ['Income' if x == 'income' else 'Expenses' for x in monthly.columns]
     return monthly
 
+@traced()
+@RENDER_SECONDS.timed(view='overview')
 def render_overview_tab(df: pd.DataFrame):
     """Render overview section."""
     # Calculate totals
@@ -124,6 +133,8 @@ def render_overview_tab(df: pd.DataFrame):
         fig.update_layout(showlegend=False)
         st.plotly_chart(fig, use_container_width=True)
 
+@traced()
+@RENDER_SECONDS.timed(view='income_expenses')
 def render_income_expenses_tab(df: pd.DataFrame):
     """Render income vs expenses analysis."""
     st.subheader(get_text('analytics.monthly_income_expenses'))
@@ -137,6 +148,8 @@ def render_income_expenses_tab(df: pd.DataFrame):
         )
         st.plotly_chart(fig, use_container_width=True)
 
+@traced()
+@RENDER_SECONDS.timed(view='category_analysis')
 def render_category_analysis_tab(df: pd.DataFrame):
     """Render category analysis."""
     st.subheader(get_text('analytics.category_analysis'))
@@ -152,6 +165,8 @@ def render_category_analysis_tab(df: pd.DataFrame):
             )
             st.plotly_chart(fig, use_container_width=True)
 
+@traced()
+@RENDER_SECONDS.timed(view='spending_patterns')
 def render_spending_patterns_tab(df: pd.DataFrame):
     """Render spending patterns analysis."""
     st.subheader(get_text('analytics.spending_patterns'))
@@ -163,6 +178,8 @@ def render_spending_patterns_tab(df: pd.DataFrame):
             fig = px.line(daily_spending, title=get_text('analytics.spending_behavior'))
             st.plotly_chart(fig, use_container_width=True)
 
+@traced()
+@RENDER_SECONDS.timed(view='insights')
 def render_insights_tab(df: pd.DataFrame):
     """Render insights and forecasting."""
     st.subheader(get_text('analytics.insights_forecasting'))
@@ -186,6 +203,8 @@ def render_insights_tab(df: pd.DataFrame):
                 f"{mom_changes['last_month_change']*100:.1f}%"
             )
 
+@traced()
+@RENDER_SECONDS.timed(view='advanced_analytics')
 def render_advanced_analytics_tab(df: pd.DataFrame):
     """Render advanced analytics."""
     st.subheader(get_text('analytics.advanced_analytics'))
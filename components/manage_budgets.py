@@ -3,6 +3,7 @@ from models.budget import Budget
 from utils.helpers import format_currency, get_text
 from datetime import datetime, date
 import logging
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ def get_unique_budgets():
         unique_budgets[key] = budget
     return list(unique_budgets.values())
 
+@traced()
 def render_budget_planning():
     st.subheader(get_text('budget.title'))
     
@@ -38,6 +40,7 @@ def render_budget_planning():
     with tabs[2]:
         render_manage_budgets()
 
+@traced()
 def render_budget_overview():
     """Render budget overview section."""
     budgets = get_unique_budgets()
@@ -68,6 +71,7 @@ def render_budget_overview():
             progress_percentage = min((float(progress['spent']) / float(budget['amount'])) * 100, 100)
             st.progress(progress_percentage / 100)
 
+@traced()
 def render_create_budget():
     """Render create budget form."""
     budget_model = Budget()
@@ -110,6 +114,7 @@ def render_create_budget():
         logger.error(f"Error in budget creation form: {str(e)}")
         st.error(get_text('error.loading_dashboard'))
 
+@traced()
 def render_manage_budgets():
     """Render budget management section."""
     budgets = get_unique_budgets()
@@ -1,72 +1,49 @@
 import streamlit as st
-from models.transaction import Transaction
-from models.database import Database
+from models.category import Category
 import pandas as pd
 import logging
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 def get_all_categories():
-    """Get all unique categories from transactions."""
-    db = Database()
-    query = """
-    SELECT DISTINCT category 
-    FROM transactions 
-    ORDER BY category;
-    """
+    """Get all category names from the cached category list."""
     try:
-        categories = db.fetch_all(query)
-        return [cat['category'] for cat in categories]
+        return Category().get_all_categories()
     except Exception as e:
         logger.error(f"Error fetching categories: {str(e)}")
         return []
 
 def get_category_usage():
     """Get usage count for each category."""
-    db = Database()
-    query = """
-    SELECT category, COUNT(*) as usage_count, 
-           SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) as total_expenses,
-           SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) as total_income
-    FROM transactions 
-    GROUP BY category 
-    ORDER BY usage_count DESC;
-    """
     try:
-        return db.fetch_all(query)
+        return Category().get_category_usage()
     except Exception as e:
         logger.error(f"Error fetching category usage: {str(e)}")
         return []
 
 def update_category(old_category, new_category):
-    """Update category name in transactions."""
+    """Rename a category, merging into an existing category of the same name."""
     if old_category == new_category:
         return
         
-    db = Database()
-    query = """
-    UPDATE transactions 
-    SET category = %s 
-    WHERE category = %s;
-    """
     try:
-        db.execute(query, (new_category, old_category))
+        Category().rename_category(old_category, new_category)
         st.success(f"✅ Category '{old_category}' renamed to '{new_category}'")
     except Exception as e:
         logger.error(f"Error updating category: {str(e)}")
         st.error(f"❌ Error updating category: {str(e)}")
 
 def delete_category(category):
-    """Delete all transactions with given category."""
-    db = Database()
-    query = "DELETE FROM transactions WHERE category = %s;"
+    """Delete a category and all its transactions."""
     try:
-        db.execute(query, (category,))
+        Category().delete_category(category)
         st.success(f"✅ Category '{category}' and all its transactions deleted")
     except Exception as e:
         logger.error(f"Error deleting category: {str(e)}")
         st.error(f"❌ Error deleting category: {str(e)}")
 
+@traced()
 def render_manage_categories():
     st.subheader("Manage Categories")
     
@@ -114,9 +91,10 @@ def render_manage_categories():
     st.write("### Add New Category")
     st.info("""
     ℹ️ Note: New categories are added automatically when you create transactions. 
-    You can also rename existing categories above.
+    You can also rename existing categories above; renaming to an existing name merges the two.
     """)
 
+@traced()
 def render_category_selector(key=None, help_text=None):
     """Reusable category selector component with autocomplete."""
     categories = get_all_categories()
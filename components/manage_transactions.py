@@ -3,9 +3,12 @@ from models.transaction import Transaction
 from utils.helpers import format_currency, prepare_export_data, export_to_csv, export_to_excel
 from datetime import datetime, timedelta, date
 from components.manage_categories import render_category_selector
+import io
 import json
 import pandas as pd
+from utils.tracing import traced
 
+@traced()
 def render_manage_transactions():
     st.subheader("Manage Transactions")
     
@@ -26,8 +29,9 @@ def render_manage_transactions():
         render_transaction_management(transactions, transaction_model)
     
     with export_tab:
-        render_export_section(transactions)
+        render_export_section(transactions, transaction_model)
 
+@traced()
 def render_transaction_management(transactions, transaction_model):
     """Render the transaction management interface."""
     # Create a form for editing
@@ -85,7 +89,8 @@ def render_transaction_management(transactions, transaction_model):
         
         st.divider()
 
-def render_export_section(transactions):
+@traced()
+def render_export_section(transactions, transaction_model):
     """Render the data export interface."""
     st.write("### Export Transactions")
     
@@ -115,8 +120,18 @@ def render_export_section(transactions):
         help="CSV is better for importing into other software. Excel includes formatting and is better for viewing."
     )
     
-    # Show export button and handle download
+    # Server-side export is only available for CSV
+    server_side = False
     if export_format == "CSV":
+        server_side = st.checkbox(
+            "Server-side export (large date ranges)",
+            help="PostgreSQL formats the CSV itself with COPY. Recommended for multi-year exports."
+        )
+    
+    # Show export button and handle download
+    if server_side:
+        render_server_side_export(transaction_model, start_date, end_date)
+    elif export_format == "CSV":
         if st.download_button(
             "📥 Download CSV",
             data=export_to_csv(filtered_df),
@@ -140,6 +155,29 @@ def render_export_section(transactions):
     
     st.caption(f"Total records to be exported: {len(filtered_df)}")
 
+@traced()
+def render_server_side_export(transaction_model, start_date, end_date):
+    """Render the COPY-based CSV export for large date ranges."""
+    export_key = f"server_export_{start_date}_{end_date}"
+    
+    if st.button("⚙️ Prepare CSV"):
+        try:
+            buffer = io.BytesIO()
+            transaction_model.export_csv(start_date, end_date, buffer)
+            st.session_state[export_key] = buffer.getvalue()
+        except Exception as e:
+            st.error(f"❌ Error exporting transactions: {str(e)}")
+    
+    if export_key in st.session_state:
+        if st.download_button(
+            "📥 Download CSV",
+            data=st.session_state[export_key],
+            file_name=f"transactions_{start_date}_to_{end_date}.csv",
+            mime="text/csv",
+        ):
+            st.success("✅ CSV file downloaded successfully!")
+            st.session_state.pop(export_key, None)
+
 def edit_transaction_form(transaction, transaction_model):
     """Form for editing a transaction."""
     with st.form(key=f"edit_form_{transaction['id']}"):
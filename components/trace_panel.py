@@ -0,0 +1,41 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from utils.helpers import get_text
+from utils.tracing import get_collector
+
+def build_waterfall(spans: list) -> pd.DataFrame:
+    """Lay finished spans out as rows of a waterfall, indented by nesting depth."""
+    depths = {}
+    rows = []
+    for index, span in enumerate(spans):
+        depth = depths.get(span['parent_id'], -1) + 1
+        depths[span['span_id']] = depth
+        rows.append({
+            # One row per span, even when the same operation runs repeatedly
+            'span': f"{'  ' * depth}{span['name']} #{index + 1}",
+            'start': pd.to_datetime(span['start'], unit='s'),
+            'end': pd.to_datetime(span['start'] + span['duration_ms'] / 1000, unit='s'),
+            'duration_ms': round(span['duration_ms'], 1),
+            'attributes': ", ".join(f"{key}={value}" for key, value in span['attributes'].items()),
+        })
+    return pd.DataFrame(rows)
+
+def render_trace_panel(trace_id: str):
+    """Show a waterfall of the spans recorded so far in the current rerun."""
+    spans = get_collector().get_trace(trace_id)
+    with st.expander(get_text('trace.title'), expanded=True):
+        if not spans:
+            st.info(get_text('trace.empty'))
+            return
+
+        df = build_waterfall(spans)
+        # Top-level spans do not overlap, so their sum is the time accounted for
+        total = sum(span['duration_ms'] for span in spans if span['parent_id'] == spans[0]['parent_id'])
+        st.caption(get_text('trace.summary').format(spans=len(spans), total=total))
+
+        fig = px.timeline(df, x_start='start', x_end='end', y='span',
+                          hover_data=['duration_ms', 'attributes'])
+        fig.update_yaxes(autorange='reversed', title=None)
+        fig.update_layout(height=max(200, 24 * len(df)), margin=dict(l=0, r=0, t=10, b=0))
+        st.plotly_chart(fig, use_container_width=True)
@@ -1,14 +1,16 @@
 import streamlit as st
 from datetime import datetime, timedelta, date
-from services.openai_service import OpenAIService
-from services.ollama_service import OllamaService
+from services.ai_clients import get_ai_service
 from models.transaction import Transaction
+from services.statement_import import StatementImporter
 from utils.helpers import format_currency, get_text
 from components.manage_categories import render_category_selector
 import logging
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+@traced()
 def render_transaction_form():
     st.subheader(get_text('navigation.add_transaction'))
     
@@ -19,6 +21,9 @@ def render_transaction_form():
     - "wypłata 5000 złotych"
     - "czynsz 1500 PLN"
     """)
+
+    with st.expander(get_text('import.title')):
+        render_statement_import()
     
     description = st.text_input(
         get_text('common.description'),
@@ -53,7 +58,7 @@ def render_transaction_form():
         
         try:
             # Use the selected AI model
-            ai_service = OpenAIService() if st.session_state.ai_model == "OpenAI" else OllamaService()
+            ai_service = get_ai_service(st.session_state.ai_model)
             classification = ai_service.classify_transaction(description, status_callback=update_status)
             
             if classification is None:
@@ -181,3 +186,27 @@ def render_transaction_form():
             except Exception as e:
                 logger.error(f"Error saving transaction: {str(e)}")
                 st.error(f"❌ {get_text('transaction.error')}: {str(e)}")
+
+@traced()
+def render_statement_import():
+    """Render the bulk import of CSV, MT940 and CAMT bank statements."""
+    uploaded = st.file_uploader(get_text('import.file'), type=['csv', 'txt', 'sta', 'mt940', '940', 'xml'])
+    use_ai = st.checkbox(get_text('import.use_ai'), help=get_text('import.use_ai_help'))
+
+    if uploaded is None or not st.button(get_text('import.start')):
+        return
+
+    progress_bar = st.progress(0.0)
+
+    def update_progress(summary):
+        progress_bar.progress(summary['fraction'], text=get_text('import.progress').format(**summary))
+
+    try:
+        ai_service = get_ai_service(st.session_state.ai_model) if use_ai else None
+        summary = StatementImporter(ai_service=ai_service).run(uploaded, uploaded.name, update_progress)
+        st.success(get_text('import.summary').format(**summary))
+        st.caption(get_text('import.categorized').format(**summary))
+    except Exception as e:
+        logger.error(f"Error importing statement: {str(e)}")
+        st.error(f"❌ {get_text('import.error')}: {str(e)}")
+        progress_bar.progress(0.0)
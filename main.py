@@ -1,13 +1,32 @@
 import streamlit as st
 import os
-import requests
-from components.transaction_form import render_transaction_form
-from components.dashboard import render_dashboard
-from components.manage_transactions import render_manage_transactions
-from components.manage_categories import render_manage_categories
-from components.manage_budgets import render_budget_planning
-from components.chat_assistant import render_chat_assistant
+import importlib
+import time
+import threading
+from utils import metrics
 from utils.helpers import get_text
+from utils.logging_config import configure_logging
+from utils.tracing import enable_tracing, span, start_trace
+
+# Structured, queued logging for the whole app (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT)
+configure_logging()
+
+# Prometheus scrape endpoint beside Streamlit when METRICS_PORT is set; started once per process
+metrics.start_metrics_server()
+
+PAGE_RENDER_SECONDS = metrics.histogram('page_render_duration_seconds',
+                                        "Time to import and render a page.", ['page'])
+
+# Pages in navigation order, imported on first visit so each page only pays
+# for its own dependencies (plotly, statsmodels, chromadb, openai, ...)
+PAGES = {
+    'navigation.dashboard': ('components.dashboard', 'render_dashboard'),
+    'navigation.add_transaction': ('components.transaction_form', 'render_transaction_form'),
+    'navigation.manage_transactions': ('components.manage_transactions', 'render_manage_transactions'),
+    'navigation.manage_categories': ('components.manage_categories', 'render_manage_categories'),
+    'navigation.budget_planning': ('components.manage_budgets', 'render_budget_planning'),
+    'navigation.chat_assistant': ('components.chat_assistant', 'render_chat_assistant'),
+}
 
 # Page config
 st.set_page_config(
@@ -17,6 +36,31 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
+def start_rag_warm_up():
+    """Import and warm the RAG stack on a background thread, once per server process."""
+    def warm_up():
+        from services.rag_service import warm_up_rag_service
+        warm_up_rag_service()
+
+    threading.Thread(target=warm_up, name="rag-import", daemon=True).start()
+    return True
+
+def render_page(page_key: str):
+    """Import the page module on demand and render it."""
+    module_name, function_name = PAGES[page_key]
+    started = time.perf_counter()
+    try:
+        with span("page.import", module=module_name):
+            module = importlib.import_module(module_name)
+        getattr(module, function_name)()
+    finally:
+        PAGE_RENDER_SECONDS.observe(time.perf_counter() - started, page=page_key.split('.')[-1])
+
+# Load the shared embedding model and vector store off the critical path
+if os.environ.get('RAG_WARM_UP', '1') != '0':
+    start_rag_warm_up()
+
 def main():
     # Initialize session state
     if 'ai_model' not in st.session_state:
@@ -30,14 +74,7 @@ def main():
     st.sidebar.title(get_text('navigation.title'))
     page = st.sidebar.radio(
         get_text('navigation.go_to'),
-        [
-            get_text('navigation.dashboard'),
-            get_text('navigation.add_transaction'),
-            get_text('navigation.manage_transactions'),
-            get_text('navigation.manage_categories'),
-            get_text('navigation.budget_planning'),
-            get_text('navigation.chat_assistant')
-        ]
+        [get_text(key) for key in PAGES]
     )
     
     # Settings button in top right corner
@@ -89,11 +126,8 @@ def main():
                     )
                     st.session_state.openai_model = model
                 else:
-                    try:
-                        response = requests.get("http://localhost:11434/api/tags")
-                        available_models = [model['name'] for model in response.json()['models']] if response.status_code == 200 else ["llama2"]
-                    except:
-                        available_models = ["llama2"]
+                    from services.ai_clients import get_ollama_models
+                    available_models = get_ollama_models()
                         
                     model = st.selectbox(
                         get_text('settings.model'),
@@ -104,6 +138,12 @@ def main():
                 
                 st.session_state.ai_model = ai_service
 
+            st.session_state.show_trace = st.checkbox(
+                get_text('settings.show_trace'),
+                value=st.session_state.get('show_trace', False),
+                help=get_text('settings.show_trace_help')
+            )
+
             if st.button(get_text('settings.close')):
                 st.session_state.show_settings = False
     
@@ -111,17 +151,20 @@ def main():
     st.title(get_text('app.title'))
     
     # Route to appropriate page
-    page_map = {
-        get_text('navigation.dashboard'): render_dashboard,
-        get_text('navigation.manage_transactions'): render_manage_transactions,
-        get_text('navigation.manage_categories'): render_manage_categories,
-        get_text('navigation.budget_planning'): render_budget_planning,
-        get_text('navigation.chat_assistant'): render_chat_assistant,
-        get_text('navigation.add_transaction'): render_transaction_form
-    }
-    
-    if page in page_map:
-        page_map[page]()
+    page_keys = {get_text(key): key for key in PAGES}
+    if page in page_keys:
+        render_page(page_keys[page])
+
+def run():
+    """Run one script rerun as a single trace (TRACING=1 or the settings toggle)."""
+    # The toggle traces this session only; other sessions keep the process setting
+    with enable_tracing(st.session_state.get('show_trace', False)):
+        with start_trace("streamlit.rerun") as root:
+            main()
+
+    if st.session_state.get('show_trace', False):
+        from components.trace_panel import render_trace_panel
+        render_trace_panel(root.trace_id)
 
 if __name__ == "__main__":
-    main()
+    run()
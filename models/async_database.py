@@ -0,0 +1,75 @@
+import os
+import asyncio
+import logging
+import threading
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, Sequence
+from models.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Queries in flight at once; unset uses half the pool so sync callers still get connections
+ASYNC_DB_WORKERS = int(os.environ['ASYNC_DB_WORKERS']) if os.environ.get('ASYNC_DB_WORKERS') else None
+
+class AsyncDatabase:
+    def __init__(self, database: Optional[Database] = None, max_workers: Optional[int] = ASYNC_DB_WORKERS):
+        """Asyncio counterpart of ``Database`` sharing its connection pool.
+
+        Each call runs on a dedicated executor whose size bounds the
+        connections the async layer holds at once; the pool is shared
+        with sync callers, so when it is busy a query waits in
+        ``Database`` for a free connection. The event loop is free while
+        queries run.
+        """
+        self.db = database or Database()
+        if max_workers is None:
+            max_workers = max(1, self.db.pool.maxconn // 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-db")
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking database call, e.g. a model method, without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        # Keep the caller's trace span as the parent of the query spans
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+
+    async def fetch(self, query: str, params: Optional[Sequence] = None):
+        """Fetch all rows from a query."""
+        return await self.run(self.db.fetch_all, query, params)
+
+    async def fetch_one(self, query: str, params: Optional[Sequence] = None):
+        """Fetch a single row from a query."""
+        return await self.run(self.db.fetch_one, query, params)
+
+    async def execute(self, query: str, params: Optional[Sequence] = None) -> int:
+        """Execute a query and return the affected row count."""
+        return await self.run(self.db.execute, query, params)
+
+    async def execute_many(self, query: str, params_list: Iterable[Sequence], page_size: int = 100) -> int:
+        """Execute a query once per parameter set in batched round trips."""
+        return await self.run(self.db.execute_many, query, list(params_list), page_size)
+
+    async def copy_from(self, table: str, columns: Sequence[str], file, skip_conflicts_on: Optional[str] = None) -> int:
+        """Bulk load CSV rows with COPY ... FROM STDIN."""
+        return await self.run(self.db.copy_from, table, columns, file, skip_conflicts_on)
+
+    async def copy_to(self, query: str, file, params: Optional[Sequence] = None) -> int:
+        """Stream a query result as CSV with COPY ... TO STDOUT."""
+        return await self.run(self.db.copy_to, query, file, params)
+
+    def close(self):
+        """Stop the executor after the running queries finish."""
+        self._executor.shutdown(wait=True)
+
+_async_database: Optional[AsyncDatabase] = None
+_async_database_lock = threading.Lock()
+
+def get_async_database() -> AsyncDatabase:
+    """Return the process-wide async database."""
+    global _async_database
+    with _async_database_lock:
+        if _async_database is None:
+            _async_database = AsyncDatabase()
+        return _async_database
@@ -1,5 +1,8 @@
 from models.database import Database
+from models.async_database import AsyncDatabase, get_async_database
+from models.category import Category
 from datetime import datetime, date
+import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 
@@ -11,14 +14,8 @@ class Budget:
         self.db = Database()
     
     def get_unique_categories(self) -> List[str]:
-        """Get unique categories from transactions table."""
-        query = """
-            SELECT DISTINCT category 
-            FROM transactions 
-            ORDER BY category;
-        """
-        results = self.db.fetch_all(query)
-        return [row['category'] for row in results] if results else []
+        """Get unique categories from the cached category list."""
+        return Category().get_all_categories()
     
     def create_budget(
         self,
@@ -28,17 +25,16 @@ class Budget:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         notification_threshold: float = 0.8
-    ) -> bool:
-        """Create a new budget."""
+    ) -> Optional[Dict[str, Any]]:
+        """Create a new budget and return the stored row."""
         try:
             query = """
                 INSERT INTO budgets (category, amount, period, start_date, end_date, notification_threshold)
                 VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id;
+                RETURNING *;
             """
             params = (category, amount, period, start_date, end_date, notification_threshold)
-            result = self.db.execute(query, params)
-            return result is not None
+            return self.db.fetch_one(query, params)
             
         except Exception as e:
             logger.error(f"Error creating budget: {str(e)}")
@@ -63,7 +59,7 @@ class Budget:
             spent_query = """
                 SELECT COALESCE(SUM(amount), 0) as total_spent
                 FROM transactions
-                WHERE category = %s
+                WHERE category_id = (SELECT id FROM categories WHERE name = %s)
                 AND type = 'expense'
                 AND created_at >= %s
                 AND (created_at <= %s OR %s IS NULL)
@@ -90,10 +86,38 @@ class Budget:
             return {'spent': 0.0, 'remaining': 0.0}
     
     def delete_budget(self, budget_id: int) -> bool:
-        """Delete a budget."""
+        """Delete a budget; False when no budget has this ID."""
         try:
             query = "DELETE FROM budgets WHERE id = %s"
-            return self.db.execute(query, (budget_id,)) is not None
+            return self.db.execute(query, (budget_id,)) > 0
         except Exception as e:
             logger.error(f"Error deleting budget: {str(e)}")
             raise
+
+class AsyncBudget:
+    def __init__(self, database: Optional[AsyncDatabase] = None):
+        """Awaitable variants of the ``Budget`` methods, for use with ``asyncio.gather``."""
+        self.db = database or get_async_database()
+        self.model = Budget()
+
+    async def get_unique_categories(self) -> List[str]:
+        return await self.db.run(self.model.get_unique_categories)
+
+    async def create_budget(self, category: str, amount: float, period: str, start_date: Optional[date] = None,
+                            end_date: Optional[date] = None,
+                            notification_threshold: float = 0.8) -> Optional[Dict[str, Any]]:
+        return await self.db.run(self.model.create_budget, category, amount, period, start_date, end_date,
+                                 notification_threshold)
+
+    async def get_all_budgets(self) -> List[Dict[str, Any]]:
+        return await self.db.run(self.model.get_all_budgets)
+
+    async def get_budget_progress(self, budget_id: int) -> Dict[str, float]:
+        return await self.db.run(self.model.get_budget_progress, budget_id)
+
+    async def get_budgets_progress(self, budget_ids: List[int]) -> List[Dict[str, float]]:
+        """Get the progress of several budgets concurrently, in the order of ``budget_ids``."""
+        return list(await asyncio.gather(*(self.get_budget_progress(budget_id) for budget_id in budget_ids)))
+
+    async def delete_budget(self, budget_id: int) -> bool:
+        return await self.db.run(self.model.delete_budget, budget_id)
@@ -0,0 +1,118 @@
+from models.database import Database
+import logging
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class Category:
+    # Process-wide name -> id lookup, rebuilt lazily after any category write. The
+    # mapping is read-only and replaced, never mutated; the lock guards swapping it,
+    # and the generation keeps a load that raced with a write from being installed.
+    _cache: Optional[Mapping[str, int]] = None
+    _cache_generation = 0
+    _cache_lock = threading.Lock()
+
+    def __init__(self):
+        """Initialize Category with database connection."""
+        self.db = Database()
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop the cached category list so the next read reloads it."""
+        with cls._cache_lock:
+            cls._cache = None
+            cls._cache_generation += 1
+
+    def _get_cache(self) -> Mapping[str, int]:
+        """Return the cached name -> id mapping, loading it on first use."""
+        with Category._cache_lock:
+            cache, generation = Category._cache, Category._cache_generation
+        if cache is not None:
+            return cache
+
+        # Loaded without holding the lock so a slow query does not block other threads
+        results = self.db.fetch_all("SELECT id, name FROM categories ORDER BY name")
+        cache = MappingProxyType({row['name']: row['id'] for row in results or []})
+        with Category._cache_lock:
+            if Category._cache_generation == generation:
+                Category._cache = cache
+        return cache
+
+    def get_all_categories(self) -> List[str]:
+        """Get all category names in alphabetical order."""
+        return list(self._get_cache())
+
+    def get_category_id(self, name: str) -> int:
+        """Get the id of a category, creating the category if it does not exist."""
+        category_id = self._get_cache().get(name)
+        if category_id is not None:
+            return category_id
+
+        query = """
+            INSERT INTO categories (name)
+            VALUES (%s)
+            ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+            RETURNING id;
+        """
+        result = self.db.fetch_one(query, (name,))
+        self.invalidate_cache()
+        logger.info("Created category %s", name)
+        return result['id']
+
+    def get_category_usage(self) -> List[Dict[str, Any]]:
+        """Get usage count and totals for each category."""
+        query = """
+            SELECT name AS category, usage_count, total_expenses, total_income
+            FROM categories
+            ORDER BY usage_count DESC, name;
+        """
+        return self.db.fetch_all(query) or []
+
+    def rename_category(self, old_name: str, new_name: str):
+        """Rename a category, merging it into ``new_name`` if that category already exists."""
+        if old_name == new_name:
+            return
+
+        if new_name in self._get_cache():
+            self.merge_categories(old_name, new_name)
+            return
+
+        with self.db.transaction() as cur:
+            cur.execute("UPDATE categories SET name = %s WHERE name = %s", (new_name, old_name))
+            cur.execute("UPDATE budgets SET category = %s WHERE category = %s", (new_name, old_name))
+        self.invalidate_cache()
+        logger.info("Renamed category %r to %r", old_name, new_name)
+
+    def merge_categories(self, source: str, target: str):
+        """Move all transactions of ``source`` to ``target`` and remove ``source``."""
+        source_id = self._get_cache().get(source)
+        if source_id is None:
+            return
+
+        with self.db.transaction() as cur:
+            cur.execute(
+                "INSERT INTO categories (name) VALUES (%s) "
+                "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name RETURNING id",
+                (target,)
+            )
+            target_id = cur.fetchone()['id']
+            # Usage counters follow the moved rows through the category usage trigger
+            cur.execute("UPDATE transactions SET category_id = %s WHERE category_id = %s", (target_id, source_id))
+            cur.execute("DELETE FROM categories WHERE id = %s", (source_id,))
+            cur.execute("UPDATE budgets SET category = %s WHERE category = %s", (target, source))
+        self.invalidate_cache()
+        logger.info("Merged category %r into %r", source, target)
+
+    def delete_category(self, name: str):
+        """Delete a category together with all its transactions."""
+        category_id = self._get_cache().get(name)
+        if category_id is None:
+            return
+
+        with self.db.transaction() as cur:
+            cur.execute("DELETE FROM transactions WHERE category_id = %s", (category_id,))
+            cur.execute("DELETE FROM categories WHERE id = %s", (category_id,))
+        self.invalidate_cache()
+        logger.info("Deleted category %r and its transactions", name)
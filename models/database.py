@@ -1,15 +1,30 @@
 import os
 import psycopg2
 import psycopg2.pool
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch
 import logging
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
+from utils import metrics
+from utils.tracing import span
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 20))
+# Seconds a caller waits for a free pooled connection before giving up
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+
+# Share of per-query debug records kept; queries are the hottest log site
+QUERY_LOG_SAMPLE_RATE = float(os.environ.get('LOG_QUERY_SAMPLE_RATE', 0.1))
+
+QUERY_SECONDS = metrics.histogram('db_query_duration_seconds',
+                                  "Query time including the wait for a pooled connection.", ['operation'])
+QUERY_ERRORS = metrics.counter('db_query_errors_total', "Queries that raised an error.", ['operation'])
+POOL_IN_USE = metrics.gauge('db_pool_connections_in_use', "Connections currently checked out of the pool.")
+POOL_MAX = metrics.gauge('db_pool_connections_max', "Maximum size of the connection pool.")
+
 class Database:
     _instance = None
     
@@ -27,7 +42,9 @@ class Database:
         self.retry_delay = retry_delay
         self.pool = None
         self._create_pool()
-        self._init_db()
+        # The schema step only creates what is missing; DB_INIT_SCHEMA=0 skips it altogether
+        if os.environ.get('DB_INIT_SCHEMA', '1') == '1':
+            self._init_db()
         self.initialized = True
 
     def _create_pool(self):
@@ -36,15 +53,19 @@ class Database:
 
         while retries < self.max_retries:
             try:
-                logger.info(f"Creating connection pool (attempt {retries + 1}/{self.max_retries})")
-                self.pool = psycopg2.pool.SimpleConnectionPool(
-                    1, 20,
+                logger.info("Creating connection pool (attempt %d/%d)", retries + 1, self.max_retries)
+                # Threaded: the async layer and chat warm-up take connections from worker threads
+                self.pool = psycopg2.pool.ThreadedConnectionPool(
+                    1, DB_POOL_MAX,
                     dbname=os.environ['PGDATABASE'],
                     user=os.environ['PGUSER'],
                     password=os.environ['PGPASSWORD'],
                     host=os.environ['PGHOST'],
                     port=os.environ['PGPORT']
                 )
+                # getconn raises instead of waiting once maxconn are out; callers queue here instead
+                self._slots = threading.BoundedSemaphore(self.pool.maxconn)
+                POOL_MAX.set(self.pool.maxconn)
                 logger.info("Connection pool created successfully")
                 return
             except Exception as e:
@@ -57,12 +78,17 @@ class Database:
         raise Exception(f"Failed to create connection pool after {self.max_retries} attempts: {str(last_exception)}")
 
     def _get_connection(self):
-        """Get a connection from the pool."""
+        """Get a connection from the pool, waiting up to ``DB_POOL_TIMEOUT`` seconds for a free one."""
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            logger.error(f"No pooled connection became free within {DB_POOL_TIMEOUT}s")
+            raise psycopg2.pool.PoolError(f"connection pool exhausted for {DB_POOL_TIMEOUT}s")
         try:
             conn = self.pool.getconn()
+            POOL_IN_USE.inc()
             conn.autocommit = False  # Ensure explicit transaction control
             return conn
         except Exception as e:
+            self._slots.release()
             logger.error(f"Error getting connection from pool: {str(e)}")
             raise
 
@@ -70,11 +96,14 @@ class Database:
         """Return a connection to the pool."""
         try:
             self.pool.putconn(conn)
+            POOL_IN_USE.dec()
         except Exception as e:
             logger.error(f"Error returning connection to pool: {str(e)}")
+        finally:
+            self._slots.release()
 
     def _init_db(self):
-        """Initialize database schema."""
+        """Create the tables, indexes and triggers that do not exist yet."""
         conn = None
         try:
             logger.info("Initializing database schema")
@@ -101,70 +130,196 @@ class Database:
             if conn:
                 self._return_connection(conn)
 
+    @QUERY_SECONDS.timed(operation='execute')
     def execute(self, query, params=None):
         """Execute a query with parameters."""
-        conn = None
-        try:
-            logger.info(f"Executing query with params: {params}")
-            conn = self._get_connection()
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
-                rowcount = cur.rowcount
-            conn.commit()
-            logger.info(f"Query executed successfully, affected rows: {rowcount}")
-            return rowcount
-        except Exception as e:
-            logger.error(f"Query execution failed: {str(e)}")
-            if conn:
-                conn.rollback()
-            raise
-        finally:
-            if conn:
-                self._return_connection(conn)
+        with span("db.execute") as current:
+            conn = None
+            try:
+                conn = self._get_connection()
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    rowcount = cur.rowcount
+                conn.commit()
+                logger.debug("execute affected %d rows", rowcount,
+                             extra={'rows': rowcount, 'sample_rate': QUERY_LOG_SAMPLE_RATE})
+                current.set('rows', rowcount)
+                return rowcount
+            except Exception as e:
+                logger.error(f"Query execution failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='execute')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                if conn:
+                    self._return_connection(conn)
 
+    @QUERY_SECONDS.timed(operation='execute_many')
+    def execute_many(self, query, params_list, page_size=100):
+        """Execute a query once per parameter set, sending ``page_size`` statements per round trip."""
+        with span("db.execute_many") as current:
+            conn = None
+            params_list = list(params_list)
+            try:
+                conn = self._get_connection()
+                with conn.cursor() as cur:
+                    execute_batch(cur, query, params_list, page_size=page_size)
+                conn.commit()
+                logger.debug("execute_many ran %d statements", len(params_list),
+                             extra={'rows': len(params_list), 'sample_rate': QUERY_LOG_SAMPLE_RATE})
+                current.set('rows', len(params_list))
+                return len(params_list)
+            except Exception as e:
+                logger.error(f"Query execution failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='execute_many')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                if conn:
+                    self._return_connection(conn)
+
+    @QUERY_SECONDS.timed(operation='fetch_all')
     def fetch_all(self, query, params=None):
         """Fetch all rows from a query."""
-        conn = None
-        try:
-            logger.info(f"Executing fetch_all query: {query}")
-            logger.debug(f"Query params: {params}")
-            conn = self._get_connection()
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
-                results = cur.fetchall()
-            conn.commit()
-            logger.info(f"Query returned {len(results)} results")
-            return results
-        except Exception as e:
-            logger.error(f"Query execution failed: {str(e)}")
-            if conn:
-                conn.rollback()
-            raise
-        finally:
-            if conn:
-                self._return_connection(conn)
+        with span("db.fetch_all") as current:
+            conn = None
+            try:
+                conn = self._get_connection()
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    results = cur.fetchall()
+                conn.commit()
+                logger.debug("fetch_all returned %d rows", len(results),
+                             extra={'rows': len(results), 'sample_rate': QUERY_LOG_SAMPLE_RATE})
+                current.set('rows', len(results))
+                return results
+            except Exception as e:
+                logger.error(f"Query execution failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='fetch_all')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                if conn:
+                    self._return_connection(conn)
 
+    @QUERY_SECONDS.timed(operation='fetch_one')
     def fetch_one(self, query, params=None):
         """Fetch a single row from a query."""
-        conn = None
-        try:
-            logger.info(f"Executing fetch_one query: {query}")
-            logger.debug(f"Query params: {params}")
-            conn = self._get_connection()
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
-                result = cur.fetchone()
-            conn.commit()
-            logger.info(f"Query returned {'a result' if result else 'no result'}")
-            return result
-        except Exception as e:
-            logger.error(f"Query execution failed: {str(e)}")
-            if conn:
-                conn.rollback()
-            raise
-        finally:
-            if conn:
-                self._return_connection(conn)
+        with span("db.fetch_one") as current:
+            conn = None
+            try:
+                conn = self._get_connection()
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    result = cur.fetchone()
+                conn.commit()
+                logger.debug("fetch_one returned %d rows", 1 if result else 0,
+                             extra={'rows': 1 if result else 0, 'sample_rate': QUERY_LOG_SAMPLE_RATE})
+                current.set('rows', 1 if result else 0)
+                return result
+            except Exception as e:
+                logger.error(f"Query execution failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='fetch_one')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                if conn:
+                    self._return_connection(conn)
+
+    @QUERY_SECONDS.timed(operation='copy_to')
+    def copy_to(self, query, file, params=None):
+        """Stream the result of a query to a file-like object with COPY ... TO STDOUT."""
+        with span("db.copy_to") as current:
+            conn = None
+            try:
+                conn = self._get_connection()
+                with conn.cursor() as cur:
+                    copy_sql = cur.mogrify(
+                        f"COPY ({query}) TO STDOUT WITH (FORMAT CSV, HEADER)", params
+                    ).decode('utf-8')
+                    cur.copy_expert(copy_sql, file)
+                    rowcount = cur.rowcount
+                conn.commit()
+                logger.info("COPY exported %d rows", rowcount, extra={'rows': rowcount})
+                current.set('rows', rowcount)
+                return rowcount
+            except Exception as e:
+                logger.error(f"COPY execution failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='copy_to')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                if conn:
+                    self._return_connection(conn)
+
+    @QUERY_SECONDS.timed(operation='copy_from')
+    def copy_from(self, table, columns, file, skip_conflicts_on=None):
+        """Bulk load CSV rows from a file-like object with COPY ... FROM STDIN.
+
+        With ``skip_conflicts_on`` (a unique column) rows are staged in a
+        temporary table and inserted with ON CONFLICT DO NOTHING; the
+        returned count then excludes the skipped rows.
+        """
+        with span("db.copy_from", table=table) as current:
+            conn = None
+            column_list = ', '.join(columns)
+            try:
+                conn = self._get_connection()
+                with conn.cursor() as cur:
+                    if skip_conflicts_on is None:
+                        cur.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT CSV)", file)
+                    else:
+                        staging = f"{table}_staging"
+                        cur.execute(
+                            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                            f"SELECT {column_list} FROM {table} WITH NO DATA"
+                        )
+                        cur.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT CSV)", file)
+                        cur.execute(
+                            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+                            f"ON CONFLICT ({skip_conflicts_on}) DO NOTHING"
+                        )
+                    rowcount = cur.rowcount
+                conn.commit()
+                logger.info("COPY imported %d rows", rowcount, extra={'rows': rowcount, 'table': table})
+                current.set('rows', rowcount)
+                return rowcount
+            except Exception as e:
+                logger.error(f"COPY execution failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='copy_from')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                if conn:
+                    self._return_connection(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor whose statements commit together, or roll back together on error."""
+        with span("db.transaction"):
+            conn = None
+            started = time.perf_counter()
+            try:
+                conn = self._get_connection()
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    yield cur
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Transaction failed: {str(e)}")
+                QUERY_ERRORS.inc(operation='transaction')
+                if conn:
+                    conn.rollback()
+                raise
+            finally:
+                QUERY_SECONDS.observe(time.perf_counter() - started, operation='transaction')
+                if conn:
+                    self._return_connection(conn)
 
     def close(self):
         """Close the connection pool."""
@@ -1,22 +1,59 @@
 from datetime import datetime, timedelta, date
 from models.database import Database
-from typing import Optional, Dict, Any
+from models.async_database import AsyncDatabase, get_async_database
+from models.category import Category
+from typing import Optional, Dict, Any, BinaryIO, List, Tuple
 import json
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Transactions joined with their category name, exposed as the ``category`` column
+TRANSACTION_SELECT = """
+SELECT t.*, c.name AS category
+FROM transactions t
+JOIN categories c ON c.id = t.category_id
+"""
+
+# One row per occurrence: one-off transactions as stored, recurring ones expanded
+# from start_date every cycle until end_date or the %s bound (now when None)
+OCCURRENCES_SELECT = """
+SELECT t.type, t.amount, t.category_id, t.created_at
+FROM transactions t
+WHERE t.cycle = 'none'
+UNION ALL
+SELECT t.type, t.amount, t.category_id, occurrence AS created_at
+FROM transactions t
+CROSS JOIN LATERAL generate_series(
+    COALESCE(t.start_date, t.created_at::date)::timestamp,
+    LEAST(t.end_date::timestamp, COALESCE(%s::timestamp, now())),
+    CASE t.cycle
+        WHEN 'daily' THEN interval '1 day'
+        WHEN 'weekly' THEN interval '1 week'
+        WHEN 'monthly' THEN interval '1 month'
+        ELSE interval '1 year'
+    END
+) AS occurrence
+WHERE t.cycle != 'none'
+"""
+
+# Column order of the CSV rows loaded by ``import_csv``
+IMPORT_COLUMNS = (
+    'description', 'amount', 'type', 'category_id', 'cycle', 'created_at', 'transaction_text', 'metadata',
+    'fingerprint'
+)
+
 class Transaction:
     def __init__(self):
         self.db = Database()
+        self.category_model = Category()
 
     def create_transaction(self, description: str, amount: float, type: str, 
                          category: str, cycle: str, start_date: Optional[date] = None, 
                          end_date: Optional[date] = None, due_date: Optional[date] = None,
                          metadata: Optional[Dict[str, Any]] = None):
         """Create a new transaction with support for recurring amounts."""
-        logger.info(f"Creating transaction: {description}, amount: {amount}")
         
         if cycle != "none":
             # Set default start_date to today if not provided
@@ -31,28 +68,30 @@ class Transaction:
             if cycle in ["monthly", "yearly"] and not due_date:
                 due_date = start_date
 
+        category_id = self.category_model.get_category_id(category)
+
         query = """
         INSERT INTO transactions 
-        (description, amount, type, category, cycle, start_date, end_date, due_date, created_at, transaction_text, metadata)
+        (description, amount, type, category_id, cycle, start_date, end_date, due_date, created_at, transaction_text, metadata)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING id
         """
         
         params = (
-            description, amount, type, category, cycle, 
+            description, amount, type, category_id, cycle, 
             start_date, end_date, due_date, datetime.now(), 
             description,  # Store original text
             json.dumps(metadata) if metadata else None
         )
         
         try:
-            self.db.execute(query, params)
-            logger.info("Transaction created successfully")
+            inserted = self.db.fetch_one(query, params)
             
-            # Verify transaction was created
-            verify_query = "SELECT * FROM transactions WHERE description = %s ORDER BY created_at DESC LIMIT 1"
-            created_tx = self.db.fetch_one(verify_query, (description,))
-            logger.info(f"Verified created transaction: {created_tx}")
+            # Read back by id so concurrent inserts of the same description cannot be confused
+            verify_query = TRANSACTION_SELECT + "WHERE t.id = %s"
+            created_tx = self.db.fetch_one(verify_query, (inserted['id'],))
+            logger.info("Created transaction %s", created_tx['id'] if created_tx else None,
+                        extra={'cycle': cycle})
             return created_tx
             
         except Exception as e:
@@ -60,17 +99,146 @@ class Transaction:
             raise
 
     def get_all_transactions(self):
-        logger.info("Attempting to fetch all transactions")
-        query = "SELECT * FROM transactions ORDER BY created_at DESC"
+        query = TRANSACTION_SELECT + "ORDER BY t.created_at DESC"
         results = self.db.fetch_all(query)
-        logger.info(f"Found {len(results) if results else 0} transactions")
+        logger.debug("Fetched %d transactions", len(results) if results else 0)
         return results
 
+    def get_data_version(self) -> int:
+        """Get a counter that changes whenever any transaction is written."""
+        result = self.db.fetch_one("SELECT version FROM data_versions WHERE name = 'transactions'")
+        return int(result['version']) if result else 0
+
+    def get_category_training_data(self, limit: int = 5000):
+        """Get descriptions and category names of the most recent transactions."""
+        query = """
+        SELECT t.description, c.name AS category
+        FROM transactions t
+        JOIN categories c ON c.id = t.category_id
+        ORDER BY t.created_at DESC
+        LIMIT %s
+        """
+        return self.db.fetch_all(query, (limit,)) or []
+
+    def get_transactions_for_embedding(self, since: Optional[datetime] = None, ids: Optional[List[int]] = None):
+        """Get the fields used for transaction embeddings.
+
+        Restricted to rows created, changed or re-categorized after ``since``
+        and/or to the given ids; all rows when neither is given.
+        """
+        query = """
+        SELECT t.id, t.description, t.amount, t.type, t.created_at, c.name AS category,
+               GREATEST(t.updated_at, c.updated_at) AS updated_at
+        FROM transactions t
+        JOIN categories c ON c.id = t.category_id
+        """
+        if ids is not None:
+            return self.db.fetch_all(query + "WHERE t.id = ANY(%s)", (list(ids),)) or []
+        if since is not None:
+            return self.db.fetch_all(query + "WHERE t.updated_at > %s OR c.updated_at > %s", (since, since)) or []
+        return self.db.fetch_all(query) or []
+
+    def get_transaction_ids(self):
+        """Get the ids of all transactions."""
+        return [row['id'] for row in self.db.fetch_all("SELECT id FROM transactions") or []]
+
+    def get_transaction_count(self) -> int:
+        """Get the number of transactions."""
+        result = self.db.fetch_one("SELECT COUNT(*) AS count FROM transactions")
+        return int(result['count']) if result else 0
+
+    @staticmethod
+    def _filter_clause(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       category: Optional[str] = None, type: Optional[str] = None):
+        """Build a WHERE clause and params for an optional [start, end) range, category and type."""
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("t.created_at >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("t.created_at < %s")
+            params.append(end)
+        if category is not None:
+            conditions.append("c.name = %s")
+            params.append(category)
+        if type is not None:
+            conditions.append("t.type = %s")
+            params.append(type)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def get_aggregates(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       category: Optional[str] = None, type: Optional[str] = None,
+                       group_by: Optional[str] = None, limit: int = 12):
+        """Get total, count, average and largest amount per type.
+
+        Recurring transactions count once per occurrence in the range.
+        ``group_by`` adds a ``category`` or ``month`` column to the grouping;
+        grouped rows are ordered by total and limited to ``limit`` per query.
+        """
+        group_columns = {
+            None: "",
+            'category': ", c.name AS category",
+            'month': ", to_char(date_trunc('month', t.created_at), 'YYYY-MM') AS month",
+        }
+        if group_by not in group_columns:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+
+        where, params = self._filter_clause(start, end, category, type)
+        group_column = group_columns[group_by]
+        group_key = ", 2" if group_by else ""
+        order = "ORDER BY 2" if group_by == 'month' else "ORDER BY total DESC"
+        query = f"""
+        SELECT t.type{group_column},
+               SUM(t.amount) AS total, COUNT(*) AS count,
+               AVG(t.amount) AS average, MAX(t.amount) AS largest
+        FROM ({OCCURRENCES_SELECT}) t
+        JOIN categories c ON c.id = t.category_id
+        {where}
+        GROUP BY 1{group_key}
+        {order}
+        LIMIT %s
+        """
+        return self.db.fetch_all(query, (end,) + tuple(params) + (limit,)) or []
+
+    def get_transactions_page(self, limit: int = 50, before: Optional[Tuple[datetime, int]] = None,
+                              start: Optional[datetime] = None, end: Optional[datetime] = None,
+                              category: Optional[str] = None, type: Optional[str] = None):
+        """Get up to ``limit`` transactions, newest first, created before the ``(created_at, id)`` key.
+
+        Keyset pagination: pass the key of the last row of a page to get the
+        next one, so deep pages cost the same as the first.
+        """
+        where, params = self._filter_clause(start, end, category, type)
+        if before is not None:
+            where = (where + " AND " if where else "WHERE ") + "(t.created_at, t.id) < (%s, %s)"
+            params.extend(before)
+        query = TRANSACTION_SELECT + f"""
+        {where}
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT %s
+        """
+        return self.db.fetch_all(query, tuple(params) + (limit,)) or []
+
+    def get_largest_transactions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                 category: Optional[str] = None, type: Optional[str] = None,
+                                 limit: int = 5):
+        """Get the transactions with the largest amounts matching the filters."""
+        where, params = self._filter_clause(start, end, category, type)
+        query = f"""
+        SELECT t.description, t.amount, t.type, t.created_at, c.name AS category
+        FROM transactions t
+        JOIN categories c ON c.id = t.category_id
+        {where}
+        ORDER BY t.amount DESC
+        LIMIT %s
+        """
+        return self.db.fetch_all(query, tuple(params) + (limit,)) or []
+
     def get_transactions_for_period(self, start_date: date, end_date: date):
         """Get transactions for a specific period, calculating recurring amounts."""
-        logger.info(f"Fetching transactions for period: {start_date} to {end_date}")
         query = """
-        SELECT *, 
+        SELECT t.*, c.name AS category,
             CASE 
                 WHEN cycle = 'daily' THEN 
                     amount * (
@@ -97,7 +265,8 @@ class Transaction:
                     )::integer
                 ELSE amount
             END as calculated_amount
-        FROM transactions
+        FROM transactions t
+        JOIN categories c ON c.id = t.category_id
         WHERE 
             (cycle = 'none' AND created_at BETWEEN %s AND %s)
             OR 
@@ -114,19 +283,67 @@ class Transaction:
             end_date, start_date  # For recurring date range
         )
         results = self.db.fetch_all(query, params)
-        logger.info(f"Found {len(results)} transactions for period")
+        logger.debug("Fetched %d transactions for %s to %s", len(results), start_date, end_date)
         return results
 
-    def delete_transaction(self, transaction_id: int):
-        """Delete a transaction by ID."""
-        logger.info(f"Deleting transaction with ID: {transaction_id}")
+    def export_csv(self, start_date: date, end_date: date, file: BinaryIO) -> int:
+        """Export transactions created in a date range as CSV produced by PostgreSQL.
+
+        Column formatting mirrors ``utils.helpers.prepare_export_data`` so the
+        file matches the pandas export path, but no rows pass through Python.
+        """
+        query = """
+        SELECT
+            t.id,
+            t.description,
+            ROUND(t.amount, 2)::text AS amount,
+            t.type,
+            c.name AS category,
+            t.cycle,
+            to_char(t.start_date, 'YYYY-MM-DD') AS start_date,
+            to_char(t.end_date, 'YYYY-MM-DD') AS end_date,
+            to_char(t.due_date, 'YYYY-MM-DD') AS due_date,
+            to_char(t.created_at, 'YYYY-MM-DD HH24:MI:SS') AS created_at,
+            t.transaction_text,
+            t.metadata
+        FROM transactions t
+        JOIN categories c ON c.id = t.category_id
+        WHERE t.created_at >= %s AND t.created_at < %s
+        ORDER BY t.created_at DESC
+        """
+        # The end date is inclusive, matching the date filter in the export UI
+        params = (start_date, end_date + timedelta(days=1))
+        rowcount = self.db.copy_to(query, file, params)
+        logger.info("Exported %d transactions for %s to %s", rowcount, start_date, end_date)
+        return rowcount
+
+    def export_csv_to_file(self, start_date: date, end_date: date, path: str) -> int:
+        """Export transactions created in a date range straight to a CSV file on disk."""
+        with open(path, 'wb') as file:
+            return self.export_csv(start_date, end_date, file)
+
+    def get_import_fingerprints(self, start: datetime, end: datetime) -> set:
+        """Get the fingerprints of imported transactions created in [start, end)."""
+        query = """
+        SELECT t.fingerprint
+        FROM transactions t
+        WHERE t.created_at >= %s AND t.created_at < %s AND t.fingerprint IS NOT NULL
+        """
+        return {row['fingerprint'] for row in self.db.fetch_all(query, (start, end)) or []}
+
+    def import_csv(self, file) -> int:
+        """Bulk insert CSV rows laid out as ``IMPORT_COLUMNS``, skipping already stored fingerprints."""
+        return self.db.copy_from('transactions', IMPORT_COLUMNS, file, skip_conflicts_on='fingerprint')
+
+    def delete_transaction(self, transaction_id: int) -> int:
+        """Delete a transaction by ID and return the number of deleted rows."""
         query = "DELETE FROM transactions WHERE id = %s"
-        self.db.execute(query, (transaction_id,))
-        logger.info("Transaction deleted successfully")
+        deleted = self.db.execute(query, (transaction_id,))
+        logger.info("Deleted transaction %s", transaction_id, extra={'rows': deleted})
+        return deleted
 
-    def update_transaction(self, transaction_id: int, data: Dict[str, Any]):
-        """Update a transaction by ID."""
-        logger.info(f"Updating transaction {transaction_id} with data: {data}")
+    def update_transaction(self, transaction_id: int, data: Dict[str, Any]) -> Optional[int]:
+        """Update a transaction by ID; returns the number of updated rows, None when no field was given."""
         valid_fields = [
             'description', 'amount', 'type', 'category', 
             'cycle', 'start_date', 'end_date', 'due_date', 'metadata'
@@ -134,13 +351,64 @@ class Transaction:
         
         # Filter valid fields and build query
         updates = {k: v for k, v in data.items() if k in valid_fields}
+        if 'category' in updates:
+            updates['category_id'] = self.category_model.get_category_id(updates.pop('category'))
         if not updates:
             logger.warning("No valid fields to update")
-            return
+            return None
         
         set_clause = ", ".join(f"{k} = %s" for k in updates.keys())
         values = list(updates.values()) + [transaction_id]
         
         query = f"UPDATE transactions SET {set_clause} WHERE id = %s"
-        self.db.execute(query, values)
-        logger.info("Transaction updated successfully")
+        updated = self.db.execute(query, values)
+        logger.info("Updated transaction %s", transaction_id, extra={'fields': sorted(data), 'rows': updated})
+        return updated
+
+class AsyncTransaction:
+    def __init__(self, database: Optional[AsyncDatabase] = None):
+        """Awaitable variants of the ``Transaction`` methods, for use with ``asyncio.gather``."""
+        self.db = database or get_async_database()
+        self.model = Transaction()
+
+    async def create_transaction(self, description: str, amount: float, type: str, category: str, cycle: str,
+                                 start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                 due_date: Optional[date] = None, metadata: Optional[Dict[str, Any]] = None):
+        return await self.db.run(self.model.create_transaction, description, amount, type, category, cycle,
+                                 start_date, end_date, due_date, metadata)
+
+    async def get_all_transactions(self):
+        return await self.db.run(self.model.get_all_transactions)
+
+    async def get_data_version(self) -> int:
+        return await self.db.run(self.model.get_data_version)
+
+    async def get_transaction_count(self) -> int:
+        return await self.db.run(self.model.get_transaction_count)
+
+    async def get_aggregates(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             category: Optional[str] = None, type: Optional[str] = None,
+                             group_by: Optional[str] = None, limit: int = 12):
+        return await self.db.run(self.model.get_aggregates, start, end, category, type, group_by, limit)
+
+    async def get_largest_transactions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                       category: Optional[str] = None, type: Optional[str] = None,
+                                       limit: int = 5):
+        return await self.db.run(self.model.get_largest_transactions, start, end, category, type, limit)
+
+    async def get_transactions_page(self, limit: int = 50, before: Optional[Tuple[datetime, int]] = None,
+                                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                    category: Optional[str] = None, type: Optional[str] = None):
+        return await self.db.run(self.model.get_transactions_page, limit, before, start, end, category, type)
+
+    async def get_transactions_for_period(self, start_date: date, end_date: date):
+        return await self.db.run(self.model.get_transactions_for_period, start_date, end_date)
+
+    async def import_csv(self, file) -> int:
+        return await self.db.copy_from('transactions', IMPORT_COLUMNS, file, skip_conflicts_on='fingerprint')
+
+    async def delete_transaction(self, transaction_id: int) -> int:
+        return await self.db.run(self.model.delete_transaction, transaction_id)
+
+    async def update_transaction(self, transaction_id: int, data: Dict[str, Any]) -> Optional[int]:
+        return await self.db.run(self.model.update_transaction, transaction_id, data)
@@ -0,0 +1,83 @@
+import re
+import logging
+from typing import Optional, Set
+
+from services.query_understanding import describe_filters, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Phrases (diacritics stripped) that signal a question about sums rather than individual rows
+AGGREGATE_INTENTS = {
+    'total': [r'how much', r'total', r'\bsum\b', r'\bile\b', r'lacznie', r'\bsuma\b', r'\brazem\b', r'spent'],
+    'average': [r'average', r'\bavg\b', r'\bmean\b', r'sredni', r'przecietn'],
+    'count': [r'how many', r'number of', r'ile razy', r'\bliczba\b'],
+    'breakdown': [r'by category', r'per category', r'breakdown', r'which categor', r'\bna co\b', r'kategori'],
+    'largest': [r'largest', r'biggest', r'most expensive', r'najwiek', r'najdroz'],
+    'monthly': [r'per month', r'each month', r'by month', r'monthly', r'trend', r'miesiecznie', r'kazdym miesiacu'],
+}
+INTENT_PATTERNS = {
+    intent: re.compile('|'.join(patterns)) for intent, patterns in AGGREGATE_INTENTS.items()
+}
+
+def detect_aggregate_intents(query: str) -> Set[str]:
+    """Return the aggregate intents a question asks for (empty for non-numeric questions)."""
+    text = normalize_text(query)
+    return {intent for intent, pattern in INTENT_PATTERNS.items() if pattern.search(text)}
+
+def _format_totals(row) -> str:
+    return (f"{float(row['total']):.2f} PLN across {row['count']} transactions "
+            f"(average {float(row['average']):.2f} PLN, largest {float(row['largest']):.2f} PLN)")
+
+class AggregateContextBuilder:
+    def __init__(self, transaction_model):
+        """Initialize the builder that answers numeric questions with SQL aggregates."""
+        self.transaction_model = transaction_model
+
+    def build(self, query: str, filters: dict) -> Optional[str]:
+        """Build a compact numeric summary for an aggregate question.
+
+        Returns None when the question is not about totals, counts, averages
+        or rankings, so the caller can fall back to retrieved transactions.
+        """
+        intents = detect_aggregate_intents(query)
+        if not intents:
+            return None
+
+        scope = {
+            'start': filters.get('start'),
+            'end': filters.get('end'),
+            'category': filters.get('category'),
+            'type': filters.get('type'),
+        }
+        description = describe_filters(filters)
+        if 'start' not in filters:
+            description = ", ".join(part for part in ("all time", description) if part)
+        try:
+            lines = [f"Transaction totals ({description}):"]
+            totals = self.transaction_model.get_aggregates(**scope)
+            if not totals:
+                return f"No transactions found ({description})."
+            for row in totals:
+                lines.append(f"- {row['type']}: {_format_totals(row)}")
+
+            if 'breakdown' in intents or ('total' in intents and 'category' not in filters):
+                lines.append("By category:")
+                for row in self.transaction_model.get_aggregates(**scope, group_by='category', limit=10):
+                    lines.append(f"- {row['category']} ({row['type']}): {_format_totals(row)}")
+
+            if 'monthly' in intents:
+                lines.append("By month:")
+                for row in self.transaction_model.get_aggregates(**scope, group_by='month', limit=24):
+                    lines.append(f"- {row['month']} ({row['type']}): {_format_totals(row)}")
+
+            if 'largest' in intents:
+                lines.append("Largest transactions:")
+                for row in self.transaction_model.get_largest_transactions(**scope):
+                    lines.append(
+                        f"- [{row['created_at']:%Y-%m-%d}] {row['description']} "
+                        f"({row['type']}, {row['category']}): {float(row['amount']):.2f} PLN"
+                    )
+            return "\n".join(lines)
+        except Exception as e:
+            logger.error(f"Error building aggregate context: {str(e)}")
+            return None
@@ -0,0 +1,143 @@
+import os
+import time
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from utils import metrics
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.environ.get('AI_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.environ.get('AI_READ_TIMEOUT', 120))
+POOL_SIZE = int(os.environ.get('AI_POOL_SIZE', 20))
+MODEL_LIST_TTL = float(os.environ.get('OLLAMA_MODEL_LIST_TTL', 60))
+
+# Both include the API prefix, e.g. a local stand-in at http://127.0.0.1:8089/api and .../v1
+OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', "http://localhost:11434/api").rstrip('/')
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
+DEFAULT_OLLAMA_MODELS = ["llama2"]
+
+LLM_REQUEST_SECONDS = metrics.histogram('llm_request_duration_seconds',
+                                        "Time for an LLM request to complete.", ['provider', 'operation'])
+LLM_TIME_TO_FIRST_TOKEN = metrics.histogram('llm_time_to_first_token_seconds',
+                                            "Time until a streamed completion yields its first token.", ['provider'])
+LLM_TOKENS = metrics.counter('llm_tokens_total', "Tokens sent to and generated by LLMs.", ['provider', 'direction'])
+
+_lock = threading.Lock()
+_ollama_session: Optional[requests.Session] = None
+_openai_clients: Dict[Tuple[Optional[str], Optional[str]], 'OpenAI'] = {}
+_services: Dict[Tuple[str, Optional[str]], object] = {}
+
+def record_token_usage(provider: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    """Count the tokens an LLM response reports; providers may omit either number."""
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, direction='prompt')
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, provider=provider, direction='completion')
+
+def get_timeout() -> Tuple[float, float]:
+    """Return the (connect, read) timeout used for AI provider requests."""
+    return (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+def get_ollama_session() -> requests.Session:
+    """Return the process-wide keep-alive session for Ollama requests."""
+    global _ollama_session
+    with _lock:
+        if _ollama_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _ollama_session = session
+        return _ollama_session
+
+def get_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> 'OpenAI':
+    """Return a long-lived OpenAI client with a pooled HTTP connection for the given key and endpoint."""
+    # Imported here so pages that never call OpenAI do not load the SDK
+    from openai import OpenAI
+
+    api_key = api_key if api_key is not None else os.environ.get('OPENAI_API_KEY')
+    base_url = base_url or OPENAI_BASE_URL
+    with _lock:
+        client = _openai_clients.get((api_key, base_url))
+        if client is None:
+            timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+            http_client = httpx.Client(
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+            )
+            client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, http_client=http_client)
+            _openai_clients[(api_key, base_url)] = client
+        return client
+
+def get_ai_service(provider: str):
+    """Return a shared AI service instance for the selected provider ("OpenAI" or "Ollama")."""
+    from services.openai_service import OpenAIService
+    from services.ollama_service import OllamaService
+
+    # OpenAI services are keyed by API key so changing it in settings takes effect
+    key = (provider, os.environ.get('OPENAI_API_KEY') if provider == "OpenAI" else None)
+    with _lock:
+        service = _services.get(key)
+    if service is None:
+        service = OpenAIService() if provider == "OpenAI" else OllamaService()
+        with _lock:
+            service = _services.setdefault(key, service)
+    return service
+
+class OllamaModelList:
+    def __init__(self, ttl: float = MODEL_LIST_TTL):
+        """Initialize the cached list of models installed in Ollama."""
+        self.ttl = ttl
+        self.models: Optional[List[str]] = None
+        self.updated_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> List[str]:
+        """Fetch the installed models from the Ollama tags endpoint."""
+        response = get_ollama_session().get(f"{OLLAMA_BASE_URL}/tags", timeout=(CONNECT_TIMEOUT, CONNECT_TIMEOUT))
+        response.raise_for_status()
+        return [model['name'] for model in response.json()['models']] or DEFAULT_OLLAMA_MODELS
+
+    def _refresh(self):
+        """Refresh the model list, keeping the previous list on failure."""
+        try:
+            models = self._fetch()
+        except Exception as e:
+            logger.warning(f"Could not refresh Ollama model list: {str(e)}")
+            models = self.models or DEFAULT_OLLAMA_MODELS
+        with self._lock:
+            self.models = models
+            self.updated_at = time.time()
+            self._refreshing = False
+
+    def get(self) -> List[str]:
+        """Return the cached model list, refreshing it in the background when stale."""
+        if self.models is None:
+            with self._lock:
+                self._refreshing = True
+            self._refresh()
+            return list(self.models)
+
+        with self._lock:
+            stale = time.time() - self.updated_at > self.ttl
+            start_refresh = stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+        if start_refresh:
+            threading.Thread(target=self._refresh, name="ollama-model-list", daemon=True).start()
+        return list(self.models)
+
+_ollama_models = OllamaModelList()
+
+def get_ollama_models() -> List[str]:
+    """Return the installed Ollama models from the process-wide cache."""
+    return _ollama_models.get()
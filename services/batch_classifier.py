@@ -0,0 +1,134 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.classification_cache import get_classification_cache, normalize_description
+from services.rule_classifier import classify_with_rules, CONFIDENCE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# (index, description) pairs that still need an LLM classification
+PendingItems = List[Tuple[int, str]]
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize a token bucket allowing ``rate`` requests per second."""
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def chunked(items: Sequence, size: int) -> Iterable[Sequence]:
+    """Split a sequence into consecutive chunks of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def run_concurrently(tasks: Iterable[Callable[[], Iterable[Tuple[int, Optional[dict]]]]],
+                     max_workers: int) -> Iterable[Tuple[int, Optional[dict]]]:
+    """Run classification tasks on a bounded thread pool, yielding results as they complete.
+
+    Each task returns ``(index, result)`` pairs. A task that raises yields
+    nothing, so its items fall back to the rule-based result.
+    """
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        futures = [executor.submit(task) for task in tasks]
+        for future in as_completed(futures):
+            try:
+                yield from future.result()
+            except Exception as e:
+                logger.error(f"Error in classification task: {str(e)}")
+
+def classify_batch(
+    descriptions: Sequence[str],
+    classify_pending: Callable[[PendingItems], Iterable[Tuple[int, Optional[dict]]]],
+    read_versions: Sequence[str],
+    write_version: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[Optional[dict]]:
+    """Classify many descriptions, sending only the uncertain, uncached ones to the LLM.
+
+    Descriptions that normalize to the same cache key are sent once and
+    share the result. ``classify_pending`` receives the outstanding ``(index, description)``
+    pairs and yields ``(index, result)`` as results arrive. Items the LLM
+    fails on fall back to the rule-based result when it found an amount,
+    otherwise None, so one bad line never fails the whole batch.
+    """
+    total = len(descriptions)
+    results: List[Optional[dict]] = [None] * total
+    quick_results: Dict[int, dict] = {}
+    pending: PendingItems = []
+    # Index of the pending item each normalized description is sent as, and its repeats
+    representatives: Dict[str, int] = {}
+    repeats: Dict[int, List[int]] = {}
+    cache = get_classification_cache()
+    done = 0
+
+    def report():
+        if progress_callback:
+            progress_callback(done, total)
+
+    for index, description in enumerate(descriptions):
+        quick = classify_with_rules(description)
+        quick_results[index] = quick
+        if quick['confidence'] >= CONFIDENCE_THRESHOLD:
+            results[index] = quick
+            done += 1
+            continue
+
+        cached = next(
+            (hit for hit in (cache.get(description, v) for v in read_versions) if hit is not None),
+            None
+        )
+        if cached is not None:
+            results[index] = cached
+            done += 1
+            continue
+
+        key = normalize_description(description)
+        if key in representatives:
+            repeats[representatives[key]].append(index)
+        else:
+            representatives[key] = index
+            repeats[index] = []
+            pending.append((index, description))
+    report()
+
+    if pending:
+        for index, result in classify_pending(pending):
+            if result is not None:
+                cache.set(descriptions[index], write_version, result)
+            for target in [index] + repeats.get(index, []):
+                results[target] = None if result is None else dict(result)
+                done += 1
+            report()
+
+    # Items whose task failed outright were never reported
+    if done < total:
+        done = total
+        report()
+
+    for representative, others in repeats.items():
+        for index in [representative] + others:
+            if results[index] is None and quick_results[index]['amount']:
+                results[index] = quick_results[index]
+
+    logger.info("Classified %d descriptions, %d sent to the LLM", total, len(pending))
+    return results
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = ".cache/classifications.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 1024
+
+def normalize_description(description: str) -> str:
+    """Normalize a transaction description so near-identical entries share a cache key."""
+    text = unicodedata.normalize('NFKC', description).casefold()
+    text = re.sub(r'(?<=\d)[ ,](?=\d{3}\b)', '', text)  # "1 500" / "1,500" -> "1500"
+    text = re.sub(r'[^\w\s.,]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip(' .,')
+
+def make_version(provider: str, model: str, prompt_template: str) -> str:
+    """Build a version key that changes whenever the provider, model or prompt changes."""
+    payload = f"{provider}\n{model}\n{prompt_template}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+class ClassificationCache:
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize an in-memory LRU backed by an optional SQLite store on disk."""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS classifications (
+                        key TEXT PRIMARY KEY,
+                        result TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"Error opening classification cache at {path}: {str(e)}")
+                self._conn = None
+
+    @staticmethod
+    def make_key(description: str, version: str) -> str:
+        """Build the cache key for a description under a given version."""
+        normalized = normalize_description(description)
+        return hashlib.sha256(f"{version}:{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, description: str, version: str) -> Optional[dict]:
+        """Return a cached classification, or None on a miss or expired entry."""
+        key = self.make_key(description, version)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry:
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT result, expires_at FROM classifications WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and row[1] > now:
+                        result = json.loads(row[0])
+                        self._remember(key, row[1], result)
+                        self.hits += 1
+                        return dict(result)
+                except Exception as e:
+                    logger.error(f"Error reading classification cache: {str(e)}")
+
+            self.misses += 1
+            return None
+
+    def set(self, description: str, version: str, result: dict):
+        """Store a classification in memory and on disk."""
+        key = self.make_key(description, version)
+        expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._remember(key, expires_at, dict(result))
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO classifications (key, result, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(result), expires_at)
+                    )
+                    self._conn.commit()
+                except Exception as e:
+                    logger.error(f"Error writing classification cache: {str(e)}")
+
+    def _remember(self, key: str, expires_at: float, result: dict):
+        """Insert into the in-memory LRU, evicting the least recently used entry if full."""
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        """Remove expired entries from the disk store."""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM classifications WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cur.rowcount
+
+    def clear(self):
+        """Remove all cached classifications."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM classifications")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for the cache."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_entries': len(self._memory)
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_classification_cache() -> ClassificationCache:
+    """Return the process-wide classification cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ClassificationCache(
+                path=os.environ.get('CLASSIFICATION_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=float(os.environ.get('CLASSIFICATION_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.environ.get('CLASSIFICATION_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+            )
+            metrics.register_cache('classification', _cache)
+        return _cache
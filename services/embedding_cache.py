@@ -0,0 +1,175 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from utils import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = ".cache/embeddings"
+DEFAULT_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', 64))
+DEFAULT_PROCESSES = int(os.environ.get('EMBEDDING_PROCESSES', 0))
+
+# Below this many misses starting a process pool costs more than it saves
+MULTI_PROCESS_MIN_TEXTS = 2000
+
+ENCODE_SECONDS = metrics.histogram('embedding_encode_duration_seconds', "Time to encode a batch of cache misses.")
+ENCODED_TEXTS = metrics.counter('embedding_texts_encoded_total', "Texts run through the embedding model.")
+
+def content_hash(text: str) -> str:
+    """Hash a document text into its cache key."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    def __init__(self, model, model_name: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 batch_size: int = DEFAULT_BATCH_SIZE, processes: int = DEFAULT_PROCESSES):
+        """Initialize a content-hash keyed embedding cache for a SentenceTransformer model.
+
+        Vectors are appended to a float32 file that is memory-mapped for reads,
+        with the row order recorded in a parallel file of hashes. ``processes``
+        greater than 1 enables multi-process encoding for large miss batches.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.processes = processes
+        self.dim = model.get_sentence_embedding_dimension()
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._vectors_path = None
+        self._keys_path = None
+        self._lock_path = None
+
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+
+        if cache_dir:
+            directory = Path(cache_dir) / model_name.replace('/', '_')
+            directory.mkdir(parents=True, exist_ok=True)
+            self._vectors_path = directory / f"vectors_{self.dim}.f32"
+            self._keys_path = directory / "keys.txt"
+            self._lock_path = directory / ".lock"
+            with self._file_lock():
+                self._load()
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the cache files; API workers share the directory."""
+        with open(self._lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Load the hash index and memory-map the stored vectors; call with the file lock held."""
+        if not self._keys_path.exists() or not self._vectors_path.exists():
+            return
+        with open(self._keys_path) as file:
+            content = file.read()
+        keys = content.split()
+        partial = bool(content) and not content.endswith("\n")
+        if partial:
+            keys = keys[:-1]  # partially written last key
+        row_bytes = 4 * self.dim
+        size = self._vectors_path.stat().st_size
+        # A crash between the two appends can leave them out of step; cut both back
+        # to the rows they have in common so the next append lines up again
+        count = min(len(keys), size // row_bytes)
+        if len(keys) != count or partial:
+            with open(self._keys_path, 'w') as file:
+                file.write("".join(f"{key}\n" for key in keys[:count]))
+        if size != count * row_bytes:
+            os.truncate(self._vectors_path, count * row_bytes)
+        self._rows = {key: row for row, key in enumerate(keys[:count])}
+        self._remap(count)
+
+    def _remap(self, count: int):
+        if count:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(count, self.dim))
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        """Persist new vectors and make them readable through the memory map."""
+        if self._vectors_path is None:
+            start = len(self._rows)
+            self._vectors = np.concatenate([self._vectors, vectors])
+            for offset, key in enumerate(keys):
+                self._rows[key] = start + offset
+            return
+
+        with self._file_lock():
+            # Pick up rows other processes appended since the last load
+            self._load()
+            new = [offset for offset, key in enumerate(keys) if key not in self._rows]
+            if new:
+                with open(self._vectors_path, 'ab') as file:
+                    file.write(vectors[new].tobytes())
+                with open(self._keys_path, 'a') as file:
+                    file.write("".join(f"{keys[offset]}\n" for offset in new))
+            start = len(self._rows)
+            for position, offset in enumerate(new):
+                self._rows[keys[offset]] = start + position
+            self._remap(len(self._rows))
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode cache misses in batches, using a process pool for large inputs."""
+        started = time.perf_counter()
+        if self.processes > 1 and len(texts) >= MULTI_PROCESS_MIN_TEXTS:
+            pool = self.model.start_multi_process_pool(target_devices=['cpu'] * self.processes)
+            try:
+                vectors = self.model.encode_multi_process(texts, pool, batch_size=self.batch_size)
+            finally:
+                self.model.stop_multi_process_pool(pool)
+        else:
+            vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        elapsed = time.perf_counter() - started
+        self.encode_seconds += elapsed
+        ENCODE_SECONDS.observe(elapsed)
+        ENCODED_TEXTS.inc(len(texts))
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return embeddings for the texts, encoding only those not seen before."""
+        keys = [content_hash(text) for text in texts]
+
+        with self._lock:
+            missing: Dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows and key not in missing:
+                    missing[key] = text
+            # Repeats of a missing text within the batch are served by its single encoding
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                vectors = self._encode(list(missing.values()))
+                self._append(list(missing), vectors)
+
+            return np.array(self._vectors[[self._rows[key] for key in keys]])
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and encoding throughput."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'stored_vectors': len(self._rows),
+            'encode_seconds': self.encode_seconds,
+            'texts_per_second': self.misses / self.encode_seconds if self.encode_seconds else None
+        }
@@ -1,46 +1,125 @@
 import os
 import logging
-from services.rag_service import RAGService
-from services.openai_service import OpenAIService
-from services.ollama_service import OllamaService
+from services.rag_service import get_rag_service
+from services.ai_clients import get_ai_service
+from services.semantic_cache import get_semantic_cache
+from services.streaming import MeteredStream
+from services.aggregate_context import AggregateContextBuilder
+from services.prompt_budget import PromptAssembler
+from models.transaction import Transaction
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 class FinancialChatService:
-    def __init__(self):
-        """Initialize the chat service with RAG and AI services."""
-        self.rag_service = RAGService()
+    def __init__(self, provider: str = None):
+        """Initialize the chat service with the shared RAG service.
+
+        ``provider`` ("OpenAI" or "Ollama") overrides the model selected in the
+        Streamlit settings, for callers outside a Streamlit session.
+        """
+        self.provider = provider
+        self.rag_service = get_rag_service()
+        # Pick up transactions added since the shared index was last synced
+        self.rag_service.update_transaction_embeddings()
+        self.transaction_model = Transaction()
+        self.cache = get_semantic_cache()
+        self.aggregate_builder = AggregateContextBuilder(self.transaction_model)
         
     def _get_ai_service(self):
         """Get the appropriate AI service based on user settings."""
+        if self.provider:
+            return get_ai_service(self.provider)
+        import streamlit as st
+        return get_ai_service(st.session_state.ai_model)
+
+    def _get_model(self):
+        """Get the provider and model name selected in the user settings."""
         import streamlit as st
-        return OpenAIService() if st.session_state.ai_model == "OpenAI" else OllamaService()
+        if (self.provider or st.session_state.get('ai_model')) == "OpenAI":
+            return "openai", st.session_state.get('openai_model', 'gpt-3.5-turbo')
+        return "ollama", st.session_state.get('ollama_model', 'llama2')
     
-    def get_chat_response(self, query: str) -> dict:
-        """Get a response from the AI model with relevant financial context."""
-        try:
-            # Get relevant transaction context using RAG
-            context = self.rag_service.prepare_chat_context(query)
-            
-            # Prepare the prompt with context
-            prompt = f"""You are a helpful financial assistant. Use the following context about the user's transactions to answer their question.
+    def _build_prompt(self, query: str, context: str, conversation: str = "") -> str:
+        """Build the assistant prompt around the retrieved transaction context."""
+        conversation = f"\n            {conversation}\n            " if conversation else ""
+        return f"""You are a helpful financial assistant. Use the following context about the user's transactions to answer their question.
             If the context is not relevant or empty, you can answer based on general financial knowledge.
             
             Context:
             {context}
-            
+            {conversation}
             User Question: {query}
             
             Please provide a clear and concise answer focusing on the financial aspects and any relevant insights from the provided transaction history.
             """
+    
+    @traced("chat.get_chat_response")
+    def get_chat_response(self, query: str, stream: bool = False, history: list = None,
+                          summary: str = None) -> dict:
+        """Get a response from the AI model with relevant financial context.
+        
+        With ``stream=True`` the ``response`` value is a MeteredStream that
+        yields text as it is generated; its ``metrics`` hold TTFT and
+        tokens per second once the stream is consumed. ``history`` and
+        ``summary`` are the earlier messages and the rolling summary of
+        older ones; they are fitted into the prompt token budget, and the
+        resulting sizes are returned as ``prompt_report``.
+        """
+        try:
+            # Dates, category and type named in the question scope both the cache and retrieval;
+            # the cache is further scoped to the selected model, whose answers it replays
+            filters = self.rag_service.parse_filters(query)
+            provider, model = self._get_model()
+            scope = (provider, model) + tuple(sorted((key, str(value)) for key, value in filters.items()))
+
+            # Answer repeated questions from the semantic cache while the data is unchanged;
+            # follow-ups depend on the conversation, so only standalone questions are cached
+            query_embedding, data_version = self._get_cache_key(query)
+            cacheable = query_embedding is not None and not history and not summary
+            if cacheable:
+                cached = self.cache.get(query_embedding, data_version, scope)
+                if cached is not None:
+                    response = cached['response']
+                    if stream:
+                        response = MeteredStream(iter([response]), "cache")
+                    return {
+                        'response': response,
+                        'context_used': cached['context_used'],
+                        'cached': True
+                    }
+            
+            # Numeric questions get exact SQL aggregates; others get retrieved transactions
+            context = self.aggregate_builder.build(query, filters)
+            if context is None:
+                context = self.rag_service.prepare_chat_context(
+                    query, query_embedding=query_embedding, filters=filters
+                )
+            context_used = context if context != "No relevant transaction history found." else None
+            
+            # Fit context, history and summary into the model's prompt budget
+            prompt, prompt_report = PromptAssembler(provider, model).assemble(
+                self._build_prompt, query, context, history, summary
+            )
+            
+            def remember(text):
+                if cacheable and text:
+                    self.cache.set(query_embedding, data_version,
+                                   {'response': text, 'context_used': context_used}, scope)
             
             # Get response from AI model
             ai_service = self._get_ai_service()
-            response = ai_service.get_chat_completion(prompt)
+            if stream:
+                response = ai_service.stream_chat_completion(prompt)
+                response.on_complete = remember
+            else:
+                response = ai_service.get_chat_completion(prompt)
+                remember(response)
             
             return {
                 'response': response,
-                'context_used': context if context != "No relevant transaction history found." else None
+                'context_used': context_used,
+                'prompt_report': prompt_report
             }
             
         except Exception as e:
@@ -49,3 +128,15 @@ class FinancialChatService:
                 'error': str(e),
                 'response': None
             }
+    
+    def _get_cache_key(self, query: str):
+        """Embed the query and read the transaction data version for the semantic cache."""
+        try:
+            return self.rag_service.embed_query(query), self.transaction_model.get_data_version()
+        except Exception as e:
+            logger.warning(f"Semantic cache unavailable: {str(e)}")
+            return None, None
+    
+    def get_cache_stats(self) -> dict:
+        """Return hit-rate statistics for the semantic response cache."""
+        return self.cache.stats()
@@ -0,0 +1,141 @@
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from services.query_understanding import WORD_RE, normalize_text
+
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized lexical tokens."""
+    return [token for token in WORD_RE.findall(normalize_text(text)) if len(token) > 1]
+
+class BM25Index:
+    # Metadata fields kept for filtering; their values also appear in every
+    # document text ("... (expense, groceries)"), so they are not indexed as terms
+    FILTER_FIELDS = ('type', 'category')
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an in-memory BM25 index over transaction documents.
+
+        Only term frequencies and the filterable metadata are held; the
+        document texts stay in the vector store.
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._timestamps: Dict[str, float] = {}
+        # (field, value) -> ids, so category/type filters pick candidates before scoring
+        self._by_field: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self._fields: Dict[str, List[Tuple[str, str]]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def _remove(self, doc_id: str):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        self._timestamps.pop(doc_id, None)
+        for field in self._fields.pop(doc_id):
+            ids = self._by_field[field]
+            ids.discard(doc_id)
+            if not ids:
+                del self._by_field[field]
+        for term in self._terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def add(self, items: Iterable[Tuple[str, str, dict]]):
+        """Add or replace documents given as ``(id, text, metadata)`` tuples."""
+        with self._lock:
+            for doc_id, text, metadata in items:
+                self._remove(doc_id)
+                fields = [(key, metadata[key]) for key in self.FILTER_FIELDS if metadata.get(key) is not None]
+                boilerplate = set(tokenize(" ".join(str(value) for _, value in fields)))
+                tokens = [token for token in tokenize(text) if token not in boilerplate]
+                counts = Counter(tokens)
+                for term, count in counts.items():
+                    self._postings[term][doc_id] = count
+                self._terms[doc_id] = list(counts)
+                self._lengths[doc_id] = len(tokens)
+                self._timestamps[doc_id] = float(metadata.get('timestamp', 0))
+                self._fields[doc_id] = fields
+                for field in fields:
+                    self._by_field[field].add(doc_id)
+                self._total_length += len(tokens)
+
+    def remove(self, doc_ids: Iterable[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def _allowed(self, filters: Optional[dict], ids: Optional[Iterable[str]]) -> Optional[Set[str]]:
+        """Return the ids passing the category/type filters and allow-list, or None for all."""
+        sets = [self._by_field.get((key, filters[key]), set()) for key in self.FILTER_FIELDS
+                if filters and key in filters]
+        if ids is not None:
+            sets.append(set(ids))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def _in_period(self, doc_id: str, filters: Optional[dict]) -> bool:
+        if not filters:
+            return True
+        timestamp = self._timestamps[doc_id]
+        if 'start' in filters and timestamp < filters['start']:
+            return False
+        return not ('end' in filters and timestamp >= filters['end'])
+
+    def search(self, query: str, n: int, filters: Optional[dict] = None,
+               ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to ``n`` ``(id, score)`` pairs ranked by BM25, restricted to matching metadata.
+
+        ``ids`` optionally restricts the search to an allow-list. Filters are
+        resolved to candidate ids before any posting is scored.
+        """
+        with self._lock:
+            if not self._lengths:
+                return []
+            count = len(self._lengths)
+            average_length = self._total_length / count or 1.0
+            allowed = self._allowed(filters, ids)
+            if allowed is not None and not allowed:
+                return []
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                if allowed is None:
+                    matches = postings.items()
+                elif len(allowed) < len(postings):
+                    matches = ((doc_id, postings[doc_id]) for doc_id in allowed if doc_id in postings)
+                else:
+                    matches = ((doc_id, frequency) for doc_id, frequency in postings.items() if doc_id in allowed)
+                for doc_id, frequency in matches:
+                    if not self._in_period(doc_id, filters):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n]
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """Fuse several ranked id lists into one ranking by summing ``1 / (k + rank)``."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
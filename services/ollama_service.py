@@ -1,71 +1,172 @@
-import requests
 import json
 import logging
 import streamlit as st
+from services.classification_cache import get_classification_cache, make_version
+from services.rule_classifier import classify_with_rules, CONFIDENCE_THRESHOLD
+from services.streaming import MeteredStream
+from utils.tracing import traced
+from services.batch_classifier import RateLimiter, classify_batch, run_concurrently
+from typing import Callable, Iterator, List, Optional
+from services.ai_clients import (
+    LLM_REQUEST_SECONDS, OLLAMA_BASE_URL, get_ollama_session, get_timeout, record_token_usage
+)
 
 logger = logging.getLogger(__name__)
 
 class OllamaService:
-    def __init__(self):
-        """Initialize Ollama service."""
-        self.base_url = "http://localhost:11434/api"
+    CLASSIFICATION_PROMPT = """Analyze this transaction description and extract the following information:
+            Description: "{description}"
+            
+            Return a JSON object with:
+            - amount (float, extract amount in PLN)
+            - type (string, either "income" or "expense")
+            - category (string, choose an appropriate category)
+            - cycle (string, either "none", "daily", "weekly", "monthly", or "yearly")
+            
+            Common categories: groceries, transportation, housing, utilities, entertainment, income, salary, etc.
+            Format your response as a valid JSON object.
+            """
+
+    def __init__(self, base_url: Optional[str] = None):
+        """Initialize Ollama service against ``base_url`` (default OLLAMA_BASE_URL)."""
+        self.base_url = (base_url or OLLAMA_BASE_URL).rstrip('/')
+        self.session = get_ollama_session()
         
+    @traced("ollama.chat_completion")
+    @LLM_REQUEST_SECONDS.timed(provider='ollama', operation='chat')
     def get_chat_completion(self, prompt: str) -> str:
         """Get a chat completion from Ollama."""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/generate",
                 json={
                     "model": st.session_state.get('ollama_model', 'llama2'),
                     "prompt": prompt,
                     "stream": False
-                }
+                },
+                timeout=get_timeout()
             )
             response.raise_for_status()
-            return response.json().get('response', '')
+            data = response.json()
+            record_token_usage("ollama", data.get('prompt_eval_count'), data.get('eval_count'))
+            return data.get('response', '')
             
         except Exception as e:
             logger.error(f"Error getting chat completion: {str(e)}")
             raise
             
+    def stream_chat_completion(self, prompt: str) -> MeteredStream:
+        """Stream a chat completion from Ollama, yielding text as tokens arrive."""
+        model = st.session_state.get('ollama_model', 'llama2')
+        
+        def chunks() -> Iterator[str]:
+            try:
+                with self.session.post(
+                    f"{self.base_url}/generate",
+                    json={
+                        "model": model,
+                        "prompt": prompt,
+                        "stream": True
+                    },
+                    timeout=get_timeout(),
+                    stream=True
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        if event.get('response'):
+                            yield event['response']
+                        if event.get('done'):
+                            # The final event carries the prompt size; generated tokens are counted by the stream
+                            record_token_usage("ollama", event.get('prompt_eval_count'), None)
+                            break
+            except Exception as e:
+                logger.error(f"Error streaming chat completion: {str(e)}")
+                raise
+        
+        return MeteredStream(chunks(), "ollama", model)
+            
     def classify_transaction(self, description: str, status_callback=None) -> dict:
         """Classify a transaction description into structured data."""
+        # Typical entries are resolved offline by the rule-based parser
+        quick = classify_with_rules(description)
+        if quick['confidence'] >= CONFIDENCE_THRESHOLD:
+            return quick
+        
         try:
+            model = st.session_state.get('ollama_model', 'llama2')
+            cache = get_classification_cache()
+            version = make_version("ollama", model, self.CLASSIFICATION_PROMPT)
+            cached = cache.get(description, version)
+            if cached is not None:
+                return cached
+            
             if status_callback:
                 status_callback("Processing with Ollama...")
                 
-            prompt = f"""Analyze this transaction description and extract the following information:
-            Description: "{description}"
-            
-            Return a JSON object with:
-            - amount (float, extract amount in PLN)
-            - type (string, either "income" or "expense")
-            - category (string, choose an appropriate category)
-            - cycle (string, either "none", "daily", "weekly", "monthly", or "yearly")
+            result = self._request_classification(description, model)
             
-            Common categories: groceries, transportation, housing, utilities, entertainment, income, salary, etc.
-            Format your response as a valid JSON object.
-            """
-            
-            response = requests.post(
-                f"{self.base_url}/generate",
-                json={
-                    "model": st.session_state.get('ollama_model', 'llama2'),
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
-            response.raise_for_status()
-            
-            # Process the response
-            result = json.loads(response.json().get('response', '{}'))
-            
-            # Ensure amount is a float
-            if 'amount' in result:
-                result['amount'] = float(result['amount'])
-                
+            cache.set(description, version, result)
             return result
             
         except Exception as e:
             logger.error(f"Error classifying transaction: {str(e)}")
-            return None
+            return quick if quick['amount'] else None
+
+    @traced("ollama.classify")
+    @LLM_REQUEST_SECONDS.timed(provider='ollama', operation='classify')
+    def _request_classification(self, description: str, model: str) -> dict:
+        """Send a single classification request to Ollama."""
+        prompt = self.CLASSIFICATION_PROMPT.format(description=description)
+        
+        response = self.session.post(
+            f"{self.base_url}/generate",
+            json={
+                "model": model,
+                "prompt": prompt,
+                "stream": False
+            },
+            timeout=get_timeout()
+        )
+        response.raise_for_status()
+        data = response.json()
+        record_token_usage("ollama", data.get('prompt_eval_count'), data.get('eval_count'))
+        
+        # Process the response
+        result = json.loads(data.get('response', '{}'))
+        
+        # Ensure amount is a float
+        if 'amount' in result:
+            result['amount'] = float(result['amount'])
+            
+        return result
+
+    @traced("ollama.classify_batch")
+    @LLM_REQUEST_SECONDS.timed(provider='ollama', operation='classify_batch')
+    def classify_transactions(self, descriptions: List[str],
+                              progress_callback: Optional[Callable[[int, int], None]] = None,
+                              max_concurrency: int = 4,
+                              requests_per_second: float = 10.0) -> List[Optional[dict]]:
+        """Classify many transaction descriptions with bounded concurrent requests.
+
+        Returns one result per description, in order; items that cannot be
+        classified are None.
+        """
+        model = st.session_state.get('ollama_model', 'llama2')
+        version = make_version("ollama", model, self.CLASSIFICATION_PROMPT)
+        limiter = RateLimiter(requests_per_second, burst=max_concurrency)
+        
+        def classify_one(index, description):
+            limiter.acquire()
+            return [(index, self._request_classification(description, model))]
+        
+        def classify_pending(pending):
+            tasks = [
+                lambda index=index, description=description: classify_one(index, description)
+                for index, description in pending
+            ]
+            return run_concurrently(tasks, max_concurrency)
+        
+        return classify_batch(descriptions, classify_pending, [version], version, progress_callback)
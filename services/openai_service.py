@@ -1,16 +1,53 @@
 import os
-import openai
-from openai import OpenAI
+import json
 import logging
 import streamlit as st
+from typing import Callable, Iterator, List, Optional
+from services.classification_cache import get_classification_cache, make_version
+from services.rule_classifier import classify_with_rules, CONFIDENCE_THRESHOLD
+from services.ai_clients import LLM_REQUEST_SECONDS, get_openai_client, record_token_usage
+from services.streaming import MeteredStream
+from utils.tracing import traced
+from services.batch_classifier import RateLimiter, chunked, classify_batch, run_concurrently
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
-    def __init__(self):
-        """Initialize OpenAI client."""
-        self.client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+    CLASSIFICATION_PROMPT = """Analyze this transaction description and extract the following information:
+            Description: "{description}"
+            
+            Return a JSON object with:
+            - amount (float, extract amount in PLN)
+            - type (string, either "income" or "expense")
+            - category (string, choose an appropriate category)
+            - cycle (string, either "none", "daily", "weekly", "monthly", or "yearly")
+            
+            Common categories: groceries, transportation, housing, utilities, entertainment, income, salary, etc.
+            """
+
+    BATCH_CLASSIFICATION_PROMPT = """Analyze each numbered transaction description and extract the following information:
+            {items}
+            
+            Return a JSON object {{"results": [...]}} with one entry per description, each with:
+            - index (integer, the number of the description)
+            - amount (float, extract amount in PLN)
+            - type (string, either "income" or "expense")
+            - category (string, choose an appropriate category)
+            - cycle (string, either "none", "daily", "weekly", "monthly", or "yearly")
+            
+            Common categories: groceries, transportation, housing, utilities, entertainment, income, salary, etc.
+            """
+
+    def __init__(self, base_url: Optional[str] = None):
+        """Initialize with the shared, long-lived OpenAI client.
+
+        ``base_url`` points the client at an OpenAI-compatible endpoint other
+        than OPENAI_BASE_URL or the OpenAI API.
+        """
+        self.client = get_openai_client(os.environ.get('OPENAI_API_KEY'), base_url)
         
+    @traced("openai.chat_completion")
+    @LLM_REQUEST_SECONDS.timed(provider='openai', operation='chat')
     def get_chat_completion(self, prompt: str) -> str:
         """Get a chat completion from OpenAI."""
         try:
@@ -23,50 +60,143 @@ class OpenAIService:
                 temperature=0.7,
                 max_tokens=500
             )
+            self._record_usage(response)
             return response.choices[0].message.content
             
         except Exception as e:
             logger.error(f"Error getting chat completion: {str(e)}")
             raise
             
+    def stream_chat_completion(self, prompt: str) -> MeteredStream:
+        """Stream a chat completion from OpenAI, yielding text as tokens arrive."""
+        model = st.session_state.get('openai_model', 'gpt-3.5-turbo')
+        
+        def chunks() -> Iterator[str]:
+            try:
+                stream = self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful financial assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=500,
+                    stream=True
+                )
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except Exception as e:
+                logger.error(f"Error streaming chat completion: {str(e)}")
+                raise
+        
+        return MeteredStream(chunks(), "openai", model)
+            
+    @staticmethod
+    def _record_usage(response):
+        """Count the prompt and completion tokens reported with a response."""
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            record_token_usage("openai", usage.prompt_tokens, usage.completion_tokens)
+
     def classify_transaction(self, description: str, status_callback=None) -> dict:
         """Classify a transaction description into structured data."""
+        # Typical entries are resolved offline by the rule-based parser
+        quick = classify_with_rules(description)
+        if quick['confidence'] >= CONFIDENCE_THRESHOLD:
+            return quick
+        
         try:
+            model = st.session_state.get('openai_model', 'gpt-3.5-turbo')
+            cache = get_classification_cache()
+            version = make_version("openai", model, self.CLASSIFICATION_PROMPT)
+            cached = cache.get(description, version)
+            if cached is not None:
+                return cached
+            
             if status_callback:
                 status_callback("Processing with OpenAI...")
                 
-            prompt = f"""Analyze this transaction description and extract the following information:
-            Description: "{description}"
+            result = self._request_classification(description, model)
             
-            Return a JSON object with:
-            - amount (float, extract amount in PLN)
-            - type (string, either "income" or "expense")
-            - category (string, choose an appropriate category)
-            - cycle (string, either "none", "daily", "weekly", "monthly", or "yearly")
+            cache.set(description, version, result)
+            return result
             
-            Common categories: groceries, transportation, housing, utilities, entertainment, income, salary, etc.
-            """
+        except Exception as e:
+            logger.error(f"Error classifying transaction: {str(e)}")
+            return quick if quick['amount'] else None
+
+    @traced("openai.classify")
+    @LLM_REQUEST_SECONDS.timed(provider='openai', operation='classify')
+    def _request_classification(self, description: str, model: str) -> dict:
+        """Send a single classification request to OpenAI."""
+        prompt = self.CLASSIFICATION_PROMPT.format(description=description)
+        
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a financial transaction classifier."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=200
+        )
+        self._record_usage(response)
+        
+        # Process the response
+        result = json.loads(response.choices[0].message.content)
+        
+        # Ensure amount is a float
+        if 'amount' in result:
+            result['amount'] = float(result['amount'])
             
+        return result
+
+    @traced("openai.classify_batch")
+    @LLM_REQUEST_SECONDS.timed(provider='openai', operation='classify_batch')
+    def classify_transactions(self, descriptions: List[str],
+                              progress_callback: Optional[Callable[[int, int], None]] = None,
+                              batch_size: int = 25, max_concurrency: int = 4,
+                              requests_per_second: float = 3.0) -> List[Optional[dict]]:
+        """Classify many transaction descriptions, packing up to ``batch_size`` into one request.
+
+        Returns one result per description, in order; items that cannot be
+        classified are None.
+        """
+        model = st.session_state.get('openai_model', 'gpt-3.5-turbo')
+        version = make_version("openai", model, self.CLASSIFICATION_PROMPT)
+        batch_version = make_version("openai", model, self.BATCH_CLASSIFICATION_PROMPT)
+        limiter = RateLimiter(requests_per_second, burst=max_concurrency)
+        
+        def classify_chunk(chunk):
+            limiter.acquire()
+            items = "\n".join(f'{index}. "{description}"' for index, description in chunk)
             response = self.client.chat.completions.create(
-                model=st.session_state.get('openai_model', 'gpt-3.5-turbo'),
+                model=model,
                 messages=[
                     {"role": "system", "content": "You are a financial transaction classifier."},
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": self.BATCH_CLASSIFICATION_PROMPT.format(items=items)}
                 ],
                 temperature=0.1,
-                max_tokens=200
+                max_tokens=60 * len(chunk) + 50
             )
+            self._record_usage(response)
+            data = json.loads(response.choices[0].message.content)
             
-            # Process the response
-            import json
-            result = json.loads(response.choices[0].message.content)
-            
-            # Ensure amount is a float
-            if 'amount' in result:
-                result['amount'] = float(result['amount'])
-                
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error classifying transaction: {str(e)}")
-            return None
+            by_index = {}
+            for item in data.get('results', []):
+                try:
+                    index = int(item.pop('index'))
+                    item['amount'] = float(item['amount'])
+                    by_index[index] = item
+                except Exception as e:
+                    logger.warning(f"Skipping malformed batch classification item: {str(e)}")
+            return [(index, by_index.get(index)) for index, _ in chunk]
+        
+        def classify_pending(pending):
+            tasks = [lambda chunk=chunk: classify_chunk(chunk) for chunk in chunked(pending, batch_size)]
+            return run_concurrently(tasks, max_concurrency)
+        
+        # Stored under the single-item version so classify_transaction reuses batch results
+        return classify_batch(descriptions, classify_pending, [version, batch_version],
+                              version, progress_callback)
@@ -0,0 +1,163 @@
+import os
+import re
+import math
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on prompt tokens per request, so cost and latency stay flat
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', 3000))
+# Tokens kept free for the answer within the model's context window
+RESPONSE_TOKEN_RESERVE = int(os.environ.get('RESPONSE_TOKEN_RESERVE', 1024))
+
+# Share of the budget the retrieved context and the rolling summary may use
+CONTEXT_SHARE = 0.5
+SUMMARY_SHARE = 0.15
+
+# Displayed chat history is bounded; older messages are folded into the summary
+MAX_CHAT_HISTORY = int(os.environ.get('MAX_CHAT_HISTORY', 20))
+SUMMARY_SNIPPET_CHARS = 160
+MAX_SUMMARY_LINES = 40
+
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-4o': 128000, 'gpt-4o-mini': 128000, 'gpt-4-turbo': 128000, 'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385, 'llama2': 4096, 'llama3': 8192, 'mistral': 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Without a tokenizer, BPE vocabularies average about 4 characters per token
+# on English text and fewer on Polish or for Llama-family vocabularies
+CHARS_PER_TOKEN = {'openai': 4.0, 'ollama': 3.5}
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s')
+
+@lru_cache(maxsize=None)
+def _tiktoken_encoding(model: str):
+    """Return the tiktoken encoding for an OpenAI model, or None when unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str, provider: str, model: Optional[str] = None) -> int:
+    """Count prompt tokens for a provider and model.
+
+    OpenAI models use tiktoken when it is installed; otherwise, and for
+    Ollama, a characters-per-token estimate is used.
+    """
+    if not text:
+        return 0
+    if provider == 'openai' and model:
+        encoding = _tiktoken_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN.get(provider, 3.5))
+
+def tokenizer_name(provider: str, model: Optional[str] = None) -> str:
+    if provider == 'openai' and model and _tiktoken_encoding(model) is not None:
+        return 'tiktoken'
+    return 'estimate'
+
+def get_prompt_budget(model: Optional[str]) -> int:
+    """Return the prompt token budget for a model, bounded by its context window."""
+    base = (model or '').split(':')[0]
+    window = MODEL_CONTEXT_WINDOWS.get(base, DEFAULT_CONTEXT_WINDOW)
+    return max(256, min(PROMPT_TOKEN_BUDGET, window - RESPONSE_TOKEN_RESERVE))
+
+def _snippet(text: str) -> str:
+    """First sentence of a message, shortened for the rolling summary."""
+    first = SENTENCE_END_RE.split(text.strip(), maxsplit=1)[0]
+    return first if len(first) <= SUMMARY_SNIPPET_CHARS else first[:SUMMARY_SNIPPET_CHARS - 1] + "…"
+
+def summarize_messages(messages: List[dict], previous_summary: Optional[str] = None) -> str:
+    """Fold chat messages into an extractive rolling summary (one line per message)."""
+    lines = previous_summary.splitlines() if previous_summary else []
+    for message in messages:
+        role = "User" if message["role"] == "user" else "Assistant"
+        lines.append(f"{role}: {_snippet(message['content'] or '')}")
+    return "\n".join(lines[-MAX_SUMMARY_LINES:])
+
+def bound_history(history: List[dict], summary: Optional[str],
+                  max_messages: int = MAX_CHAT_HISTORY) -> Tuple[List[dict], Optional[str]]:
+    """Keep the newest ``max_messages`` messages and fold older ones into the summary."""
+    if len(history) <= max_messages:
+        return history, summary
+    dropped, kept = history[:-max_messages], history[-max_messages:]
+    return kept, summarize_messages(dropped, summary)
+
+class PromptAssembler:
+    def __init__(self, provider: str, model: Optional[str] = None, budget: Optional[int] = None):
+        """Initialize a prompt assembler that keeps prompts within a token budget."""
+        self.provider = provider
+        self.model = model
+        self.budget = budget or get_prompt_budget(model)
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.provider, self.model)
+
+    def _fit_lines(self, lines: List[str], budget: int, keep_newest: bool = False) -> List[str]:
+        """Take lines in order (or newest first) while they fit the budget."""
+        selected, used = [], 0
+        for line in (reversed(lines) if keep_newest else lines):
+            tokens = self.count(line) + 1
+            if used + tokens > budget:
+                break
+            selected.append(line)
+            used += tokens
+        return list(reversed(selected)) if keep_newest else selected
+
+    def assemble(self, template, query: str, context: str, history: Optional[List[dict]] = None,
+                 summary: Optional[str] = None) -> Tuple[str, Dict]:
+        """Build a prompt with ``template(query, context, conversation)`` within the budget.
+
+        The first context line is a header and always kept; the remaining
+        lines are ordered by relevance and dropped from the end. The rolling
+        summary keeps its newest lines, and history is filled newest first
+        with whatever budget is left.
+        """
+        history = history or []
+        fixed = self.count(template(query, "", ""))
+        available = max(0, self.budget - fixed)
+
+        context_lines = context.splitlines()
+        header, items = context_lines[:1], context_lines[1:]
+        context_budget = int(available * CONTEXT_SHARE) - self.count("\n".join(header))
+        kept_items = self._fit_lines(items, context_budget)
+        fitted_context = "\n".join(header + kept_items)
+        available -= self.count(fitted_context)
+
+        summary_lines = self._fit_lines(summary.splitlines(), int(self.budget * SUMMARY_SHARE),
+                                        keep_newest=True) if summary else []
+        summary_text = "\n".join(summary_lines)
+        available -= self.count(summary_text) + self.count("Earlier in the conversation:\nRecent messages:")
+
+        turns = [f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in history]
+        kept_turns = self._fit_lines(turns, available, keep_newest=True)
+
+        conversation = ""
+        if summary_text:
+            conversation += f"Earlier in the conversation:\n{summary_text}\n"
+        if kept_turns:
+            conversation += "Recent messages:\n" + "\n".join(kept_turns)
+
+        prompt = template(query, fitted_context, conversation.strip())
+        report = {
+            'provider': self.provider,
+            'model': self.model,
+            'tokenizer': tokenizer_name(self.provider, self.model),
+            'prompt_tokens': self.count(prompt),
+            'budget': self.budget,
+            'context_items': len(kept_items),
+            'context_items_total': len(items),
+            'history_messages': len(kept_turns),
+            'history_messages_total': len(history),
+            'summary_lines': len(summary_lines),
+        }
+        logger.info("Prompt %d/%d tokens", report['prompt_tokens'], report['budget'], extra=report)
+        return prompt, report
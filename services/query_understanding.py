@@ -0,0 +1,170 @@
+import re
+import unicodedata
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+# English month names and Polish month stems (diacritics stripped), 1-based
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+}
+POLISH_MONTH_STEMS = [
+    ('styczn', 1), ('stycz', 1), ('lut', 2), ('marc', 3), ('marz', 3), ('kwietn', 4), ('kwiec', 4),
+    ('czerw', 6), ('lipc', 7), ('lipiec', 7), ('sierp', 8), ('wrzesn', 9), ('wrzesien', 9),
+    ('pazdziern', 10), ('listopad', 11), ('grudn', 12), ('grudz', 12),
+]
+# "maja" is also a common verb form, so May only matches these exact forms
+POLISH_MAY = {'maj', 'maju'}
+# English "may" is usually the verb; it is a month only next to a day or year
+# number ("May 3", "3rd of May", "May 2024") or capitalized mid-sentence
+MAY_RE = re.compile(r'\bmay\b', re.IGNORECASE)
+DAY_OR_YEAR = r'(?:\d{1,2}(?:st|nd|rd|th)?|(?:19|20)\d{2})'
+MAY_BEFORE_RE = re.compile(DAY_OR_YEAR + r'(?: of)?\s+$', re.IGNORECASE)
+MAY_AFTER_RE = re.compile(r'\s*,?\s*' + DAY_OR_YEAR + r'\b', re.IGNORECASE)
+
+EXPENSE_STEMS = ('spend', 'spent', 'expense', 'paid', 'pay', 'cost', 'wydal', 'wydat', 'wydan', 'zaplac', 'koszt')
+INCOME_STEMS = ('income', 'earn', 'salary', 'receiv', 'przych', 'zarob', 'wplyw', 'pensj', 'wyplat')
+
+RELATIVE_PERIODS = [
+    (re.compile(r'\b(last|previous|past) month\b|\b(zeszl\w*|poprzedni\w*|ostatni\w*) miesi\w*'), 'last_month'),
+    (re.compile(r'\bthis month\b|\b(tym|ten|biezac\w*) miesi\w*'), 'this_month'),
+    (re.compile(r'\b(last|previous|past) year\b|\b(zeszl\w*|poprzedni\w*|ostatni\w*) rok\w*'), 'last_year'),
+    (re.compile(r'\bthis year\b|\b(tym|ten|biezac\w*) rok\w*'), 'this_year'),
+]
+LAST_DAYS_RE = re.compile(r'\b(?:last|past|ostatni\w*) (\d{1,3}) (?:days?|dni)\b')
+YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+WORD_RE = re.compile(r'\w+')
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip diacritics so Polish inflections match plain stems."""
+    text = text.lower().replace('ł', 'l')
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year, month, 1)
+
+def _next_month(year: int, month: int) -> datetime:
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+def _mentions_may(text: str) -> bool:
+    """Whether an English "may" in the text names the month rather than the verb."""
+    for match in MAY_RE.finditer(text):
+        before, after = text[:match.start()], text[match.end():]
+        if MAY_BEFORE_RE.search(before) or MAY_AFTER_RE.match(after):
+            return True
+        sentence = before.rstrip()
+        if match.group() == 'May' and sentence and sentence[-1] not in '.!?':
+            return True
+    return False
+
+def _find_month(words, may_is_month: bool = False) -> Optional[int]:
+    for word in words:
+        if word == 'may' and not may_is_month:
+            continue
+        if word in MONTHS:
+            return MONTHS[word]
+        if word in POLISH_MAY:
+            return 5
+        for stem, month in POLISH_MONTH_STEMS:
+            if word.startswith(stem):
+                return month
+    return None
+
+def parse_period(text: str, today: Optional[date] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Extract a ``[start, end)`` date range mentioned in a query.
+
+    A month without a year means its most recent occurrence; a bare year
+    means the whole year.
+    """
+    today = today or date.today()
+    may_is_month = _mentions_may(text)
+    text = normalize_text(text)
+
+    match = LAST_DAYS_RE.search(text)
+    if match:
+        end = datetime(today.year, today.month, today.day) + timedelta(days=1)
+        return end - timedelta(days=int(match.group(1))), end
+
+    for pattern, period in RELATIVE_PERIODS:
+        if pattern.search(text):
+            if period == 'this_month':
+                return _month_start(today.year, today.month), _next_month(today.year, today.month)
+            if period == 'last_month':
+                year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+                return _month_start(year, month), _next_month(year, month)
+            year = today.year if period == 'this_year' else today.year - 1
+            return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+    year_match = YEAR_RE.search(text)
+    month = _find_month(WORD_RE.findall(text), may_is_month)
+    if month:
+        if year_match:
+            year = int(year_match.group(1))
+        else:
+            year = today.year if month <= today.month else today.year - 1
+        return _month_start(year, month), _next_month(year, month)
+    if year_match:
+        year = int(year_match.group(1))
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    return None, None
+
+def parse_type(text: str) -> Optional[str]:
+    """Detect whether a query is about expenses or income."""
+    words = WORD_RE.findall(normalize_text(text))
+    is_income = any(word.startswith(INCOME_STEMS) for word in words)
+    is_expense = any(word.startswith(EXPENSE_STEMS) for word in words)
+    if is_income == is_expense:
+        return None
+    return 'income' if is_income else 'expense'
+
+def parse_category(text: str, categories: Iterable[str]) -> Optional[str]:
+    """Match a known category name mentioned in the query.
+
+    A name matches when its words appear in the query in order. Failing
+    that, a one-word name may match a query word that is a prefix of it or
+    extends it ("transport" for "transportation"), but only when exactly one
+    category matches that way, so generic words do not become filters.
+    """
+    words = WORD_RE.findall(normalize_text(text))
+    phrase = f" {' '.join(words)} "
+    prefix_matches = set()
+    for category in sorted(categories, key=len, reverse=True):
+        name_words = WORD_RE.findall(normalize_text(category))
+        if not name_words:
+            continue
+        if f" {' '.join(name_words)} " in phrase:
+            return category
+        if len(name_words) == 1:
+            name = name_words[0]
+            if any(len(word) >= 5 and (name.startswith(word) or word.startswith(name)) for word in words):
+                prefix_matches.add(category)
+    return prefix_matches.pop() if len(prefix_matches) == 1 else None
+
+def parse_query(query: str, categories: Iterable[str] = (), today: Optional[date] = None) -> dict:
+    """Extract metadata filters from a chat question.
+
+    Returns a dict with any of ``start`` and ``end`` (datetimes, end
+    exclusive), ``category`` and ``type``; keys that were not mentioned are
+    left out.
+    """
+    filters = {}
+    start, end = parse_period(query, today)
+    if start:
+        filters['start'] = start
+        filters['end'] = end
+    category = parse_category(query, categories)
+    if category:
+        filters['category'] = category
+    transaction_type = parse_type(query)
+    if transaction_type:
+        filters['type'] = transaction_type
+    return filters
+
+def describe_filters(filters: dict) -> str:
+    """Describe parsed filters as "2024-09-01 to 2024-09-30, groceries, expense"."""
+    parts = []
+    if 'start' in filters:
+        last_day = filters['end'] - timedelta(days=1)
+        parts.append(f"{filters['start']:%Y-%m-%d} to {last_day:%Y-%m-%d}")
+    parts.extend(filters[key] for key in ('category', 'type') if key in filters)
+    return ", ".join(parts)
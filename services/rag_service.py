@@ -1,110 +1,326 @@
 import chromadb
-from chromadb.utils import embedding_functions
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 import pandas as pd
 from models.transaction import Transaction
+from models.category import Category
+import os
+import json
+import hashlib
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
 from sentence_transformers import SentenceTransformer
+from services.embedding_cache import EmbeddingCache
+from services.vector_store import ChromaVectorStore, FaissVectorStore
+from services.hybrid_search import BM25Index, reciprocal_rank_fusion
+from services.query_understanding import describe_filters, parse_query
+from utils import metrics
+from utils.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
+CHROMA_PATH = ".chromadb"
+FAISS_PATH = ".faiss"
+EMBEDDING_BATCH_SIZE = 256
+
+# Vector backend: "chroma" (default) or "faiss" with a flat, ivf or hnsw index
+VECTOR_BACKEND = os.environ.get('VECTOR_BACKEND', 'chroma').lower()
+FAISS_INDEX_TYPE = os.environ.get('FAISS_INDEX_TYPE', 'flat').lower()
+FAISS_NLIST = int(os.environ.get('FAISS_NLIST', 1024))
+FAISS_NPROBE = int(os.environ.get('FAISS_NPROBE', 16))
+
+# Rows committed slightly after a sync can carry an earlier updated_at; re-check this window
+SYNC_OVERLAP = timedelta(minutes=5)
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Each retriever contributes this many candidates per requested result to the fusion
+CANDIDATES_PER_RESULT = 4
+
+RETRIEVE_SECONDS = metrics.histogram('rag_retrieve_duration_seconds', "Time for hybrid retrieval of chat context.")
+SYNC_SECONDS = metrics.histogram('rag_sync_duration_seconds', "Time for an incremental embedding sync.")
+SYNCED_DOCUMENTS = metrics.counter('rag_documents_synced_total', "Documents embedded or removed by syncs.", ['change'])
+
+# Process-wide handles shared by every session
+_lock = threading.Lock()
+_service_lock = threading.Lock()
+_embedding_function = None
+_chroma_client = None
+_rag_service = None
+_warm_up_started = False
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    def __init__(self, cache: EmbeddingCache):
+        """Chroma embedding function that serves repeated documents from the embedding cache."""
+        self.cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.cache.encode(list(input)).tolist()
+
+def get_embedding_function() -> CachedEmbeddingFunction:
+    """Return the process-wide cached embedding function, loading the model once."""
+    global _embedding_function
+    with _lock:
+        if _embedding_function is None:
+            logger.info("Loading embedding model %s", EMBEDDING_MODEL_NAME)
+            model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            _embedding_function = CachedEmbeddingFunction(EmbeddingCache(model, EMBEDDING_MODEL_NAME))
+            metrics.register_cache('embedding', _embedding_function.cache)
+        return _embedding_function
+
+def get_chroma_client():
+    """Return the process-wide persistent ChromaDB client."""
+    global _chroma_client
+    with _lock:
+        if _chroma_client is None:
+            _chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+        return _chroma_client
+
+def get_vector_store(embedding_function: CachedEmbeddingFunction, backend: str = VECTOR_BACKEND):
+    """Create the transaction vector store for the configured backend."""
+    if backend == "faiss":
+        return FaissVectorStore(
+            embedding_function,
+            dim=embedding_function.cache.dim,
+            path=FAISS_PATH,
+            index_type=FAISS_INDEX_TYPE,
+            nlist=FAISS_NLIST,
+            nprobe=FAISS_NPROBE
+        )
+    if backend != "chroma":
+        raise ValueError(f"Unknown vector backend: {backend}")
+    return ChromaVectorStore(get_chroma_client(), embedding_function, path=CHROMA_PATH)
+
+def get_rag_service() -> 'RAGService':
+    """Return the RAG service shared by all sessions, creating it on first use."""
+    global _rag_service
+    with _service_lock:
+        if _rag_service is None:
+            _rag_service = RAGService()
+        return _rag_service
+
+def warm_up_rag_service():
+    """Load the embedding model and vector store in the background, once per process."""
+    global _warm_up_started
+    with _lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def warm_up():
+        try:
+            get_rag_service().embed_query("warm-up")
+            logger.info("RAG service warmed up")
+        except Exception as e:
+            logger.error(f"Error warming up RAG service: {str(e)}")
+
+    threading.Thread(target=warm_up, name="rag-warm-up", daemon=True).start()
+
 class RAGService:
     def __init__(self):
-        """Initialize the RAG service with ChromaDB."""
+        """Initialize the RAG service with the configured vector store."""
         try:
-            # Initialize the sentence transformer
-            self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name="all-MiniLM-L6-v2"
-            )
-            
-            # Initialize ChromaDB with persistence
-            self.chroma_client = chromadb.PersistentClient(path=".chromadb")
-            
-            # Create or get the collection for transactions
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="transactions",
-                embedding_function=self.embedding_function
-            )
+            # Shared sentence transformer and vector store for transactions
+            self.embedding_function = get_embedding_function()
+            self.store = get_vector_store(self.embedding_function)
+            self._sync_lock = threading.Lock()
+
+            # Lexical index over the stored documents for hybrid retrieval
+            self.lexical_index = BM25Index()
+            self.lexical_index.add(self.store.documents())
             
-            # Initial update of embeddings
+            # Bring embeddings up to date; only changed rows are re-embedded
+            self.transaction_model = Transaction()
             self.update_transaction_embeddings()
         except Exception as e:
             logger.error(f"Error initializing RAG service: {str(e)}")
             raise
 
-    def prepare_chat_context(self, query: str, k: int = 5) -> str:
+    @traced("rag.embed_query")
+    def embed_query(self, query: str):
+        """Embed a query with the same model used for the transaction documents."""
+        return self.embedding_function([query])[0]
+
+    def get_embedding_stats(self) -> dict:
+        """Return hit/miss and throughput statistics of the embedding cache."""
+        return self.embedding_function.cache.stats()
+
+    def parse_filters(self, query: str) -> dict:
+        """Extract date range, category and type filters mentioned in a query."""
+        return parse_query(query, Category().get_all_categories())
+
+    @staticmethod
+    def _store_filters(filters: dict) -> dict:
+        """Convert parsed filters to the metadata representation used by the stores."""
+        store_filters = {key: filters[key] for key in ('category', 'type') if key in filters}
+        for key in ('start', 'end'):
+            if key in filters:
+                # Same conversion as the timestamp stored by _build_document
+                store_filters[key] = pd.Timestamp(filters[key]).timestamp()
+        return store_filters
+
+    @traced("rag.retrieve")
+    @RETRIEVE_SECONDS.timed()
+    def retrieve(self, query: str, k: int = 5, query_embedding=None, filters: dict = None) -> list:
+        """Return the ``k`` best ``(document, metadata)`` pairs for a query.
+
+        Vector and BM25 candidates are both restricted to the metadata
+        filters and merged with reciprocal rank fusion.
+        """
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        store_filters = self._store_filters(filters or {})
+        candidates = k * CANDIDATES_PER_RESULT
+
+        with span("rag.vector_search", backend=VECTOR_BACKEND, k=candidates) as current:
+            vector_results = self.store.query(query_embedding, candidates, store_filters)
+            current.set('results', len(vector_results))
+        with span("rag.lexical_search", k=candidates) as current:
+            lexical_results = self.lexical_index.search(query, candidates, store_filters)
+            current.set('results', len(lexical_results))
+
+        documents = {result['id']: (result['document'], result['metadata']) for result in vector_results}
+        ranking = reciprocal_rank_fusion([
+            [result['id'] for result in vector_results],
+            [doc_id for doc_id, _ in lexical_results]
+        ])[:k]
+
+        # Lexical-only hits are read from the store; the BM25 index keeps no texts
+        missing = [doc_id for doc_id in ranking if doc_id not in documents]
+        if missing:
+            documents.update((id_, (doc, metadata)) for id_, doc, metadata in self.store.documents(missing))
+        return [documents[doc_id] for doc_id in ranking if doc_id in documents]
+
+    @traced("rag.prepare_chat_context")
+    def prepare_chat_context(self, query: str, k: int = 5, query_embedding=None, filters: dict = None) -> str:
         """Get relevant transaction context for a given query."""
         try:
-            # Query the collection
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=k
-            )
+            if filters is None:
+                filters = self.parse_filters(query)
+            results = self.retrieve(query, k, query_embedding, filters)
+            scope = f" ({describe_filters(filters)})" if filters else ""
             
-            if not results['documents'][0]:
+            if not results:
                 return "No relevant transaction history found."
             
             # Format the results into a readable context
             context_parts = []
-            for i, (doc, metadata) in enumerate(zip(results['documents'][0], results['metadatas'][0])):
+            for i, (doc, metadata) in enumerate(results):
                 date = datetime.fromtimestamp(float(metadata['timestamp'])).strftime('%Y-%m-%d')
                 amount = f"{float(metadata['amount']):.2f} PLN"
                 context_parts.append(f"{i+1}. [{date}] {doc} ({amount})")
             
-            return "Relevant transactions:\n" + "\n".join(context_parts)
+            return f"Relevant transactions{scope}:\n" + "\n".join(context_parts)
         except Exception as e:
             logger.error(f"Error preparing chat context: {str(e)}")
             return "Error retrieving transaction context."
 
-    def update_transaction_embeddings(self) -> bool:
-        """Update the transaction embeddings in ChromaDB."""
+    @staticmethod
+    def _build_document(row) -> tuple:
+        """Build the document text, metadata and content hash for a transaction row."""
+        doc = f"{row['description']} ({row['type']}, {row['category']})"
+        metadata = {
+            "type": row['type'],
+            "category": row['category'],
+            "amount": float(row['amount']),
+            "timestamp": pd.Timestamp(row['created_at']).timestamp()
+        }
+        content_hash = hashlib.sha1(
+            json.dumps([doc, metadata], sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        metadata["content_hash"] = content_hash
+        return doc, metadata, content_hash
+
+    def _load_high_water_mark(self):
+        """Read the updated_at of the newest row embedded by the last sync."""
         try:
-            # Get all transactions
-            transaction_model = Transaction()
-            transactions = transaction_model.get_all_transactions()
-            
-            if not transactions:
-                logger.info("No transactions found to update embeddings.")
-                return True
-            
-            # Convert to DataFrame for easier processing
-            df = pd.DataFrame(transactions)
-            
-            # Prepare documents and metadata
-            documents = []
-            ids = []
-            metadatas = []
-            
-            for _, row in df.iterrows():
-                # Create a descriptive text for each transaction
-                doc = f"{row['description']} ({row['type']}, {row['category']})"
-                
-                # Prepare metadata
-                metadata = {
-                    "type": row['type'],
-                    "category": row['category'],
-                    "amount": float(row['amount']),
-                    "timestamp": pd.to_datetime(row['created_at']).timestamp()
-                }
-                
-                documents.append(doc)
-                ids.append(str(row['id']))
-                metadatas.append(metadata)
-            
-            # Clear existing embeddings and add new ones
-            self.collection.delete(ids)
-            
-            # Add documents in batches
+            with open(self.store.sync_state_path) as file:
+                value = json.load(file).get('high_water_mark')
+            return datetime.fromisoformat(value) if value else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding sync state: {str(e)}")
+            return None
+
+    def _save_high_water_mark(self, high_water_mark: datetime):
+        """Persist the high-water mark for the next sync."""
+        Path(self.store.sync_state_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.store.sync_state_path, 'w') as file:
+            json.dump({'high_water_mark': high_water_mark.isoformat()}, file)
+
+    def _upsert_changed(self, rows) -> int:
+        """Embed rows whose content hash differs from the stored one, in batches."""
+        embedded = 0
+        for start in range(0, len(rows), EMBEDDING_BATCH_SIZE):
+            batch = rows[start:start + EMBEDDING_BATCH_SIZE]
+            ids = [str(row['id']) for row in batch]
+            stored_hashes = self.store.get_hashes(ids)
+
+            documents, changed_ids, metadatas = [], [], []
+            for id_, row in zip(ids, batch):
+                doc, metadata, content_hash = self._build_document(row)
+                if stored_hashes.get(id_) != content_hash:
+                    documents.append(doc)
+                    changed_ids.append(id_)
+                    metadatas.append(metadata)
+
             if documents:
-                self.collection.add(
-                    documents=documents,
-                    ids=ids,
-                    metadatas=metadatas
-                )
-            
-            logger.info(f"Successfully updated embeddings for {len(documents)} transactions")
+                self.store.upsert(changed_ids, documents, metadatas)
+                self.lexical_index.add(zip(changed_ids, documents, metadatas))
+                embedded += len(documents)
+        return embedded
+
+    @traced("rag.sync_embeddings")
+    @SYNC_SECONDS.timed()
+    def update_transaction_embeddings(self) -> bool:
+        """Incrementally sync transaction embeddings in the vector store.
+
+        Only rows changed since the stored high-water mark are considered, and
+        of those only rows whose content hash changed are re-embedded. Ids
+        that no longer exist in the database are removed.
+        """
+        # Concurrent session starts share one sync instead of racing
+        if not self._sync_lock.acquire(blocking=False):
+            logger.info("Embedding sync already running, skipping")
+            return True
+        try:
+            high_water_mark = self._load_high_water_mark()
+            since = high_water_mark - SYNC_OVERLAP if high_water_mark else None
+            rows = self.transaction_model.get_transactions_for_embedding(since=since)
+            embedded = self._upsert_changed(rows)
+
+            # Every synced row is in the store, so equal counts mean no deletions or gaps
+            removed = 0
+            if self.store.count() != self.transaction_model.get_transaction_count():
+                db_ids = {str(id_) for id_ in self.transaction_model.get_transaction_ids()}
+                stored_ids = self.store.all_ids()
+
+                stale_ids = list(stored_ids - db_ids)
+                for start in range(0, len(stale_ids), EMBEDDING_BATCH_SIZE):
+                    self.store.delete(stale_ids[start:start + EMBEDDING_BATCH_SIZE])
+                self.lexical_index.remove(stale_ids)
+                removed = len(stale_ids)
+
+                missing_ids = [int(id_) for id_ in db_ids - stored_ids]
+                if missing_ids:
+                    embedded += self._upsert_changed(
+                        self.transaction_model.get_transactions_for_embedding(ids=missing_ids)
+                    )
+
+            self.store.flush()
+            if rows:
+                newest = max(row['updated_at'] for row in rows)
+                self._save_high_water_mark(max(newest, high_water_mark) if high_water_mark else newest)
+
+            logger.info("Embedding sync: %d candidates, %d embedded, %d removed", len(rows), embedded, removed)
+            SYNCED_DOCUMENTS.inc(embedded, change='embedded')
+            SYNCED_DOCUMENTS.inc(removed, change='removed')
             return True
             
         except Exception as e:
             logger.error(f"Error updating transaction embeddings: {str(e)}")
             return False
+        finally:
+            self._sync_lock.release()
@@ -0,0 +1,177 @@
+import re
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Results at or above this confidence are returned without calling the LLM
+CONFIDENCE_THRESHOLD = 0.8
+
+# Rebuild the history-based predictor at most this often
+PREDICTOR_REFRESH_SECONDS = 300
+PREDICTOR_TRAINING_ROWS = 5000
+
+CURRENCY_ALIASES = {
+    'zł': 'PLN', 'zl': 'PLN', 'złotych': 'PLN', 'złote': 'PLN', 'złoty': 'PLN', 'pln': 'PLN',
+    'eur': 'EUR', 'euro': 'EUR', '€': 'EUR',
+    'usd': 'USD', '$': 'USD', 'dolarów': 'USD',
+}
+
+CYCLE_KEYWORDS = {
+    'daily': ['dziennie', 'codziennie', 'co dzień', 'daily', 'per day', 'a day'],
+    'weekly': ['tygodniowo', 'co tydzień', 'na tydzień', 'weekly', 'per week', 'a week'],
+    'monthly': ['miesięcznie', 'co miesiąc', 'na miesiąc', 'mies.', '/mc', 'monthly', 'per month', 'a month'],
+    'yearly': ['rocznie', 'co rok', 'na rok', 'yearly', 'annually', 'per year', 'a year'],
+}
+
+INCOME_KEYWORDS = [
+    'wypłata', 'pensja', 'wynagrodzenie', 'premia', 'zwrot', 'przychód', 'odsetki',
+    'salary', 'income', 'bonus', 'refund', 'payout', 'interest',
+]
+
+CATEGORY_KEYWORDS = {
+    'salary': ['wypłata', 'pensja', 'wynagrodzenie', 'premia', 'salary', 'bonus', 'payroll'],
+    'housing': ['czynsz', 'najem', 'wynajem', 'kredyt hipoteczny', 'rent', 'mortgage'],
+    'utilities': ['internet', 'prąd', 'gaz', 'woda', 'telefon', 'abonament', 'electricity', 'water', 'phone'],
+    'groceries': ['zakupy', 'spożywcze', 'biedronka', 'lidl', 'żabka', 'auchan', 'carrefour', 'groceries', 'supermarket'],
+    'transportation': ['paliwo', 'benzyna', 'bilet', 'taxi', 'uber', 'bolt', 'pkp', 'mpk', 'fuel', 'ticket', 'bus', 'train'],
+    'entertainment': ['kino', 'netflix', 'spotify', 'hbo', 'koncert', 'gry', 'cinema', 'concert', 'games'],
+}
+
+_NUMBER = r'\d{1,3}(?:[  ]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?'
+_CURRENCY = '|'.join(sorted((re.escape(c) for c in CURRENCY_ALIASES), key=len, reverse=True))
+AMOUNT_WITH_CURRENCY_RE = re.compile(
+    rf'(?P<pre>{_CURRENCY})?\s*(?P<amount>{_NUMBER})\s*(?P<post>{_CURRENCY})?(?!\w)',
+    re.IGNORECASE
+)
+NUMBER_RE = re.compile(_NUMBER)
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """Compile a case-insensitive alternation that matches whole keywords."""
+    alternatives = []
+    for keyword in sorted(keywords, key=len, reverse=True):
+        prefix = r'(?<!\w)' if keyword[0].isalnum() else ''
+        suffix = r'(?!\w)' if keyword[-1].isalnum() else ''
+        alternatives.append(f'{prefix}{re.escape(keyword)}{suffix}')
+    return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+CYCLE_PATTERNS = {cycle: _keyword_pattern(words) for cycle, words in CYCLE_KEYWORDS.items()}
+CATEGORY_PATTERNS = {category: _keyword_pattern(words) for category, words in CATEGORY_KEYWORDS.items()}
+INCOME_PATTERN = _keyword_pattern(INCOME_KEYWORDS)
+
+def _parse_number(text: str) -> float:
+    """Parse a number written with space thousands separators and a comma or dot decimal."""
+    return float(re.sub(r'[  ]', '', text).replace(',', '.'))
+
+def extract_amount(description: str) -> Tuple[Optional[float], Optional[str], float]:
+    """Extract the amount and currency from a description.
+
+    Returns ``(amount, currency, confidence)``; an amount next to a currency
+    marker is trusted more than a lone number.
+    """
+    for match in AMOUNT_WITH_CURRENCY_RE.finditer(description):
+        currency = match.group('post') or match.group('pre')
+        if currency:
+            return _parse_number(match.group('amount')), CURRENCY_ALIASES[currency.lower()], 0.5
+
+    numbers = NUMBER_RE.findall(description)
+    if len(numbers) == 1:
+        return _parse_number(numbers[0]), None, 0.35
+    return None, None, 0.0
+
+def extract_cycle(description: str) -> str:
+    """Extract the recurrence cycle, defaulting to a one-off transaction."""
+    for cycle, pattern in CYCLE_PATTERNS.items():
+        if pattern.search(description):
+            return cycle
+    return 'none'
+
+def extract_keyword_category(description: str) -> Optional[str]:
+    """Match the description against the built-in category keywords."""
+    for category, pattern in CATEGORY_PATTERNS.items():
+        if pattern.search(description):
+            return category
+    return None
+
+def tokenize(description: str) -> List[str]:
+    """Split a description into lowercase word tokens, ignoring numbers and short words."""
+    return TOKEN_RE.findall(description.casefold())
+
+class CategoryPredictor:
+    def __init__(self):
+        """Initialize an empty token-vote category predictor."""
+        self.token_categories: Dict[str, Counter] = defaultdict(Counter)
+
+    def fit(self, rows: Iterable[Dict[str, str]]) -> 'CategoryPredictor':
+        """Learn token -> category counts from rows with ``description`` and ``category``."""
+        self.token_categories.clear()
+        for row in rows:
+            for token in set(tokenize(row['description'])):
+                self.token_categories[token][row['category']] += 1
+        return self
+
+    def predict(self, description: str) -> Tuple[Optional[str], float]:
+        """Predict a category and the share of votes it received."""
+        votes = Counter()
+        for token in set(tokenize(description)):
+            counts = self.token_categories.get(token)
+            if counts:
+                total = sum(counts.values())
+                for category, count in counts.items():
+                    votes[category] += count / total
+        if not votes:
+            return None, 0.0
+        category, score = votes.most_common(1)[0]
+        return category, score / sum(votes.values())
+
+_predictor = None
+_predictor_built_at = 0.0
+_predictor_lock = threading.Lock()
+
+def get_category_predictor() -> CategoryPredictor:
+    """Return the process-wide predictor, rebuilding it from recent transactions when stale."""
+    global _predictor, _predictor_built_at
+    with _predictor_lock:
+        if _predictor is None or time.time() - _predictor_built_at > PREDICTOR_REFRESH_SECONDS:
+            predictor = CategoryPredictor()
+            try:
+                from models.transaction import Transaction
+                predictor.fit(Transaction().get_category_training_data(PREDICTOR_TRAINING_ROWS))
+            except Exception as e:
+                logger.error(f"Error building category predictor: {str(e)}")
+            _predictor = predictor
+            _predictor_built_at = time.time()
+        return _predictor
+
+def classify_with_rules(description: str, predictor: Optional[CategoryPredictor] = None) -> dict:
+    """Classify a description with deterministic rules and the local category predictor.
+
+    The returned dict has the same keys as the LLM classification plus
+    ``currency`` and ``confidence``.
+    """
+    amount, currency, amount_confidence = extract_amount(description)
+    is_income = INCOME_PATTERN.search(description) is not None
+
+    category = extract_keyword_category(description)
+    category_confidence = 0.4 if category else 0.0
+    if category is None:
+        category, score = (predictor or get_category_predictor()).predict(description)
+        category_confidence = 0.4 * score
+
+    confidence = amount_confidence + category_confidence + 0.1
+    if currency not in (None, 'PLN'):
+        # Conversion to PLN is left to the LLM
+        confidence = min(confidence, 0.5)
+
+    return {
+        'amount': amount,
+        'currency': currency or 'PLN',
+        'type': 'income' if is_income else 'expense',
+        'category': category or ('income' if is_income else 'other'),
+        'cycle': extract_cycle(description),
+        'confidence': round(confidence, 2)
+    }
@@ -0,0 +1,111 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Sequence
+
+import numpy as np
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 3600
+
+class SemanticCache:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL_SECONDS):
+        """Initialize an LRU cache of chat answers looked up by query embedding similarity."""
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: Sequence[float], data_version: int, scope: Hashable = None) -> Optional[dict]:
+        """Return the answer cached for the most similar query, if it is similar enough.
+
+        Entries created against another data version or older than the TTL
+        are dropped, since their answers may describe stale transactions.
+        Only entries with an equal ``scope`` are considered, so near-identical
+        questions about different periods or categories do not share answers.
+        """
+        query = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry['data_version'] != data_version or entry['expires_at'] <= now]
+            for key in stale:
+                del self._entries[key]
+
+            keys = [key for key, entry in self._entries.items() if entry['scope'] == scope]
+            if keys:
+                matrix = np.stack([self._entries[key]['embedding'] for key in keys])
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    logger.info("Semantic cache hit (similarity %.3f)", similarities[best])
+                    return dict(self._entries[key]['answer'])
+
+            self.misses += 1
+            return None
+
+    def set(self, embedding: Sequence[float], data_version: int, answer: dict, scope: Hashable = None):
+        """Cache an answer for a query embedding, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[self._next_id] = {
+                'embedding': self._normalize(embedding),
+                'data_version': data_version,
+                'scope': scope,
+                'expires_at': time.time() + self.ttl,
+                'answer': dict(answer)
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached answers."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for the cache."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries)
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_semantic_cache() -> SemanticCache:
+    """Return the process-wide semantic chat cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticCache(
+                threshold=float(os.environ.get('CHAT_CACHE_THRESHOLD', DEFAULT_THRESHOLD)),
+                max_entries=int(os.environ.get('CHAT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+                ttl=float(os.environ.get('CHAT_CACHE_TTL', DEFAULT_TTL_SECONDS))
+            )
+            metrics.register_cache('semantic', _cache)
+        return _cache
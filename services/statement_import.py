@@ -0,0 +1,427 @@
+import io
+import os
+import codecs
+import re
+import csv
+import json
+import hashlib
+import time
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+from models.transaction import IMPORT_COLUMNS, Transaction
+from models.category import Category
+from services.query_understanding import normalize_text
+from services.rule_classifier import extract_keyword_category, get_category_predictor
+
+logger = logging.getLogger(__name__)
+
+# Statement lines normalized, deduplicated, classified and copied per round
+IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS', 20000))
+
+# Share of the local predictor's votes needed to skip the LLM
+PREDICTOR_MIN_SCORE = 0.6
+
+# Header names (lowercase, without diacritics) of the columns found in bank CSV exports
+COLUMN_ALIASES = {
+    'date': ['date', 'booking date', 'transaction date', 'posting date', 'data', 'data operacji',
+             'data ksiegowania', 'data transakcji'],
+    'amount': ['amount', 'kwota', 'kwota operacji', 'kwota transakcji', 'value'],
+    'debit': ['debit', 'obciazenia', 'wyplyw'],
+    'credit': ['credit', 'uznania', 'wplyw'],
+    'description': ['description', 'opis', 'opis operacji', 'opis transakcji', 'tytul', 'tytul operacji',
+                    'title', 'details', 'szczegoly'],
+    'counterparty': ['payee', 'counterparty', 'kontrahent', 'nadawca / odbiorca', 'odbiorca', 'nadawca',
+                     'nazwa kontrahenta'],
+    'external_id': ['id', 'transaction id', 'reference', 'numer referencyjny', 'nr transakcji',
+                    'reference number'],
+    'currency': ['currency', 'waluta'],
+}
+HEADER_LOOKUP = {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+# Tried in order; the first format that parses a value wins
+DATE_FORMATS = ['%Y-%m-%d', '%d.%m.%Y', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%Y%m%d']
+
+MT940_STATEMENT_LINE_RE = re.compile(
+    r':61:(?P<date>\d{6})(?:\d{4})?(?P<mark>R?[CD])[A-Z]?(?P<amount>\d+(?:,\d*)?)'
+    r'[A-Z0-9]{4}(?P<reference>[^/\r\n]*)(?://(?P<bank_reference>[^\r\n]*))?'
+)
+MT940_TAG_RE = re.compile(r'^:(\d\d[A-Z]?):', re.MULTILINE)
+# Subfields of structured :86: information, e.g. ~20 (title) and ~32 (counterparty)
+MT940_SUBFIELD_RE = re.compile(r'[~^](\d\d)')
+MT940_DESCRIPTION_FIELDS = ('20', '21', '22', '23', '24', '25', '32', '33')
+
+ProgressCallback = Callable[[dict], None]
+
+def detect_format(filename: str, head: bytes) -> str:
+    """Guess the statement format ("csv", "mt940" or "camt") from the name and first bytes."""
+    name = filename.lower()
+    text = head.lstrip(b'\xef\xbb\xbf').lstrip()
+    if name.endswith('.xml') or text.startswith(b'<'):
+        return 'camt'
+    if name.endswith(('.sta', '.mt940', '.940')) or b':20:' in head and b':61:' in head:
+        return 'mt940'
+    return 'csv'
+
+def _decode(data: bytes) -> str:
+    """Decode a bank export, falling back to the Windows code page many Polish banks use."""
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp1250')
+
+def _decode_head(data: bytes, complete: bool) -> Tuple[str, str]:
+    """Pick the encoding of a file from its first bytes and decode them.
+
+    A multi-byte character cut off at the end of an incomplete prefix is
+    not an error; only invalid UTF-8 falls back to cp1250.
+    """
+    try:
+        return 'utf-8-sig', codecs.getincrementaldecoder('utf-8-sig')().decode(data, final=complete)
+    except UnicodeDecodeError:
+        return 'cp1250', data.decode('cp1250')
+
+def _find_header(lines: List[str], delimiter: str) -> Tuple[int, List[str]]:
+    """Find the header row (exports often start with account details) and map its columns."""
+    for index, line in enumerate(lines):
+        cells = next(csv.reader([line], delimiter=delimiter), [])
+        mapped = [HEADER_LOOKUP.get(normalize_text(cell).strip(' "')) for cell in cells]
+        if 'date' in mapped and ('amount' in mapped or 'debit' in mapped or 'credit' in mapped):
+            return index, mapped
+    raise ValueError("No date and amount columns found in the CSV header")
+
+def read_csv_chunks(file: IO[bytes], chunk_rows: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Read a bank CSV export in chunks of raw string columns named as in COLUMN_ALIASES."""
+    head_size = 64 * 1024
+    head_bytes = file.read(head_size)
+    file.seek(0)
+    encoding, head = _decode_head(head_bytes, complete=len(head_bytes) < head_size)
+    try:
+        delimiter = csv.Sniffer().sniff(head[:8192], delimiters=';,\t|').delimiter
+    except csv.Error:
+        delimiter = ';' if head.count(';') > head.count(',') else ','
+    header_row, mapped = _find_header(head.splitlines()[:50], delimiter)
+
+    usecols = [index for index, column in enumerate(mapped) if column]
+    reader = pd.read_csv(
+        file, sep=delimiter, skiprows=header_row + 1, header=None, usecols=usecols, dtype=str,
+        keep_default_na=False, encoding=encoding, chunksize=chunk_rows, skipinitialspace=True,
+        on_bad_lines='skip'
+    )
+    for chunk in reader:
+        chunk.columns = [mapped[index] for index in chunk.columns]
+        # Keep the first of repeated columns, e.g. booking and value date
+        yield chunk.loc[:, ~chunk.columns.duplicated()]
+
+def _mt940_description(info: str) -> str:
+    """Extract the title and counterparty from a (possibly structured) :86: field."""
+    parts = MT940_SUBFIELD_RE.split(info)
+    if len(parts) < 3:
+        return info
+    fields = {}
+    for code, value in zip(parts[1::2], parts[2::2]):
+        fields.setdefault(code, []).append(value)
+    selected = [value for code in MT940_DESCRIPTION_FIELDS for value in fields.get(code, [])]
+    return " ".join(selected) if selected else parts[0]
+
+def parse_mt940(text: str) -> Iterator[dict]:
+    """Yield one record per :61: statement line, described by the following :86: field."""
+    tags = list(MT940_TAG_RE.finditer(text))
+    for position, tag in enumerate(tags):
+        if tag.group(1) != '61':
+            continue
+        end = tags[position + 1].start() if position + 1 < len(tags) else len(text)
+        match = MT940_STATEMENT_LINE_RE.match(text, tag.start(), end)
+        if not match:
+            continue
+        info = ""
+        if position + 1 < len(tags) and tags[position + 1].group(1) == '86':
+            info_end = tags[position + 2].start() if position + 2 < len(tags) else len(text)
+            info = text[tags[position + 1].end():info_end].split('\n-}')[0]
+            info = " ".join(line.strip() for line in info.splitlines())
+
+        # Debits and reversed credits take money out of the account
+        sign = '-' if match.group('mark') in ('D', 'RC') else ''
+        date = match.group('date')
+        reference = (match.group('bank_reference') or match.group('reference') or '').strip()
+        yield {
+            'date': f"20{date[:2]}-{date[2:4]}-{date[4:6]}",
+            'amount': sign + match.group('amount'),
+            'description': _mt940_description(info),
+            'external_id': reference if reference and reference != 'NONREF' else '',
+        }
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+def _find_text(element, *path: str) -> str:
+    """Text of the first descendant along a path of namespace-free tag names."""
+    candidates = [element]
+    for name in path:
+        candidates = [child for candidate in candidates for child in candidate if _local(child.tag) == name]
+        if not candidates:
+            return ''
+    return (candidates[0].text or '').strip()
+
+def _find_all_text(element, name: str) -> List[str]:
+    return [(child.text or '').strip() for child in element.iter() if _local(child.tag) == name and child.text]
+
+def parse_camt(file: IO[bytes]) -> Iterator[dict]:
+    """Stream ``Ntry`` entries of a CAMT.052/053/054 XML statement."""
+    for _, element in ElementTree.iterparse(file, events=('end',)):
+        if _local(element.tag) != 'Ntry':
+            continue
+        debit = _find_text(element, 'CdtDbtInd') == 'DBIT'
+        date = (_find_text(element, 'BookgDt', 'Dt') or _find_text(element, 'BookgDt', 'DtTm')
+                or _find_text(element, 'ValDt', 'Dt'))[:10]
+        party = 'Cdtr' if debit else 'Dbtr'
+        counterparty = (_find_text(element, 'NtryDtls', 'TxDtls', 'RltdPties', party, 'Nm')
+                        or _find_text(element, 'NtryDtls', 'TxDtls', 'RltdPties', party, 'Pty', 'Nm'))
+        remittance = " ".join(_find_all_text(element, 'Ustrd')) or _find_text(element, 'AddtlNtryInf')
+        amount_element = next((child for child in element if _local(child.tag) == 'Amt'), None)
+        yield {
+            'date': date,
+            'amount': ('-' if debit else '') + _find_text(element, 'Amt'),
+            'description': " ".join(part for part in (remittance, counterparty) if part),
+            'external_id': _find_text(element, 'AcctSvcrRef') or _find_text(element, 'NtryRef'),
+            'currency': amount_element.get('Ccy', '') if amount_element is not None else '',
+        }
+        element.clear()
+
+def records_to_chunks(records: Iterable[dict], chunk_rows: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Group parsed records into DataFrames of at most ``chunk_rows`` rows."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == chunk_rows:
+            yield pd.DataFrame(batch, dtype=str)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, dtype=str)
+
+def read_statement(file: IO[bytes], filename: str, chunk_rows: int = IMPORT_CHUNK_ROWS) -> Tuple[str, Iterator[pd.DataFrame]]:
+    """Detect the format of a statement and return it with an iterator of raw chunks."""
+    statement_format = detect_format(filename, file.read(4096))
+    file.seek(0)
+    if statement_format == 'camt':
+        return statement_format, records_to_chunks(parse_camt(file), chunk_rows)
+    if statement_format == 'mt940':
+        return statement_format, records_to_chunks(parse_mt940(_decode(file.read())), chunk_rows)
+    return statement_format, read_csv_chunks(file, chunk_rows)
+
+def normalize_amounts(values: pd.Series) -> pd.Series:
+    """Parse amounts such as "-1 234,56", "1,234.56" or "45.00" into floats (NaN when invalid)."""
+    text = values.fillna('').astype(str).str.replace(r'[\s  ]|PLN|zł', '', regex=True)
+    text = text.str.replace('−', '-', regex=False)
+    # A comma followed by one or two final digits is the decimal separator
+    comma_decimal = text.str.contains(r',\d{1,2}$', regex=True)
+    text = text.where(
+        ~comma_decimal,
+        text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    ).where(comma_decimal, text.str.replace(',', '', regex=False))
+    return pd.to_numeric(text, errors='coerce')
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """Parse dates in the formats of DATE_FORMATS, ignoring any time part (NaT when invalid)."""
+    text = values.fillna('').astype(str).str.strip().str.split(' ', n=1).str[0].str.split('T', n=1).str[0]
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for date_format in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=date_format, errors='coerce')
+    return parsed
+
+def normalize_statement(raw: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """Normalize raw statement columns into created_at, amount, type and description.
+
+    Amounts are made positive with the sign stored as the type. Returns the
+    valid rows and the number of rows dropped as unparseable.
+    """
+    if 'amount' in raw:
+        amounts = normalize_amounts(raw['amount'])
+    else:
+        credit = normalize_amounts(raw['credit']) if 'credit' in raw else 0
+        debit = normalize_amounts(raw['debit']) if 'debit' in raw else 0
+        amounts = pd.Series(credit, index=raw.index).fillna(0) - pd.Series(debit, index=raw.index).fillna(0).abs()
+
+    description = raw['description'].fillna('') if 'description' in raw else pd.Series('', index=raw.index)
+    if 'counterparty' in raw:
+        description = description + ' ' + raw['counterparty'].fillna('')
+    description = description.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+    df = pd.DataFrame({
+        'created_at': normalize_dates(raw['date']),
+        'amount': amounts.abs().round(2),
+        'type': np.where(amounts < 0, 'expense', 'income'),
+        'description': description,
+        'transaction_text': raw['description'].fillna('') if 'description' in raw else description,
+        'external_id': raw['external_id'].fillna('') if 'external_id' in raw else '',
+        'currency': raw['currency'].fillna('') if 'currency' in raw else '',
+    })
+    valid = df['created_at'].notna() & amounts.notna() & (df['amount'] > 0) & (df['description'] != '')
+    return df[valid].reset_index(drop=True), int((~valid).sum())
+
+def fingerprint_rows(df: pd.DataFrame, occurrences: Counter) -> pd.Series:
+    """Deterministic fingerprints of normalized statement rows.
+
+    The hash covers the date, amount, type, normalized description and bank
+    reference, plus the row's occurrence index among identical rows of the
+    import (``occurrences`` carries the counts across chunks). Re-importing
+    an overlapping statement reproduces the same fingerprints, while two
+    genuinely equal purchases on one day still get different ones.
+    """
+    descriptions = df['description'].map(lambda description: " ".join(normalize_text(description).split()))
+    keys = (df['created_at'].dt.strftime('%Y-%m-%d') + '|' + df['amount'].map('{:.2f}'.format) + '|'
+            + df['type'] + '|' + descriptions + '|' + df['external_id'].astype(str))
+    fingerprints = []
+    for key in keys:
+        occurrence = occurrences[key]
+        occurrences[key] += 1
+        fingerprints.append(hashlib.sha1(f"{key}|{occurrence}".encode('utf-8')).hexdigest())
+    return pd.Series(fingerprints, index=df.index, dtype=object)
+
+class KnownFingerprints:
+    def __init__(self, transaction_model: Transaction):
+        """In-memory set of stored fingerprints, loaded per day on demand."""
+        self.transaction_model = transaction_model
+        self.fingerprints = set()
+        self._loaded_days = set()
+
+    def _load(self, days):
+        missing = sorted(set(days) - self._loaded_days)
+        if not missing:
+            return
+        start = pd.Timestamp(missing[0]).to_pydatetime()
+        end = pd.Timestamp(missing[-1]).to_pydatetime() + timedelta(days=1)
+        self.fingerprints.update(self.transaction_model.get_import_fingerprints(start, end))
+        self._loaded_days.update(pd.Timestamp(day).date() for day in pd.date_range(start, end, inclusive='left'))
+
+    def unknown(self, df: pd.DataFrame) -> pd.Series:
+        """Mask of rows whose fingerprint is not stored yet, checked without a round trip per row."""
+        self._load(df['created_at'].dt.date.unique())
+        return ~df['fingerprint'].isin(self.fingerprints)
+
+class CategoryAssigner:
+    def __init__(self, ai_service=None, predictor=None):
+        """Assign categories per unique description: keywords, the local predictor, then the LLM."""
+        self.ai_service = ai_service
+        self.predictor = predictor or get_category_predictor()
+        # description -> category, or None when nothing was confident; shared across chunks
+        self._categories: Dict[str, Optional[str]] = {}
+        self.local = 0
+        self.llm = 0
+
+    def _classify_locally(self, description: str) -> Optional[str]:
+        category = extract_keyword_category(description)
+        if category is None:
+            category, score = self.predictor.predict(description)
+            if score < PREDICTOR_MIN_SCORE:
+                category = None
+        return category
+
+    def assign(self, descriptions: pd.Series, types: pd.Series) -> pd.Series:
+        pending = []
+        for description in descriptions.unique():
+            if description in self._categories:
+                continue
+            category = self._classify_locally(description)
+            self._categories[description] = category
+            if category is None:
+                pending.append(description)
+            else:
+                self.local += 1
+
+        if pending and self.ai_service is not None:
+            # Batched and rate limited by the service; answers land in the classification cache
+            results = self.ai_service.classify_transactions(pending)
+            for description, result in zip(pending, results):
+                if result and result.get('category'):
+                    self._categories[description] = str(result['category']).strip().lower()
+                    self.llm += 1
+
+        fallback = pd.Series(np.where(types == 'income', 'income', 'other'), index=descriptions.index)
+        return descriptions.map(self._categories).fillna(fallback)
+
+class StatementImporter:
+    def __init__(self, transaction_model: Optional[Transaction] = None, ai_service=None,
+                 chunk_rows: int = IMPORT_CHUNK_ROWS):
+        """Import bank statements: parse, normalize, skip known fingerprints, classify and COPY in chunks.
+
+        Without an ``ai_service``, descriptions the local classifiers are
+        unsure about get the "other" (or "income") category.
+        """
+        self.transaction_model = transaction_model or Transaction()
+        self.category_model = Category()
+        self.ai_service = ai_service
+        self.chunk_rows = chunk_rows
+
+    def _to_csv(self, df: pd.DataFrame, source: str) -> io.StringIO:
+        """Lay the rows out as IMPORT_COLUMNS for COPY."""
+        category_ids = {name: self.category_model.get_category_id(name) for name in df['category'].unique()}
+        metadata = [
+            json.dumps({key: value for key, value in
+                        (('source', source), ('external_id', external_id), ('currency', currency)) if value})
+            for external_id, currency in zip(df['external_id'], df['currency'])
+        ]
+        rows = pd.DataFrame({
+            'description': df['description'],
+            'amount': df['amount'].map('{:.2f}'.format),
+            'type': df['type'],
+            'category_id': df['category'].map(category_ids),
+            'cycle': 'none',
+            'created_at': df['created_at'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'transaction_text': df['transaction_text'],
+            'metadata': metadata,
+            'fingerprint': df['fingerprint'],
+        }, columns=list(IMPORT_COLUMNS))
+        buffer = io.StringIO()
+        rows.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        return buffer
+
+    def run(self, file: IO[bytes], filename: str, progress_callback: Optional[ProgressCallback] = None) -> dict:
+        """Import a statement file and return counts of parsed, invalid, duplicate and inserted rows."""
+        started = time.perf_counter()
+        file.seek(0, os.SEEK_END)
+        size = file.tell() or 1
+        file.seek(0)
+
+        source, chunks = read_statement(file, filename, self.chunk_rows)
+        known = KnownFingerprints(self.transaction_model)
+        occurrences = Counter()
+        assigner = CategoryAssigner(self.ai_service)
+        summary = {'format': source, 'rows': 0, 'invalid': 0, 'duplicates': 0, 'inserted': 0}
+
+        for raw in chunks:
+            df, invalid = normalize_statement(raw)
+            summary['rows'] += len(raw)
+            summary['invalid'] += invalid
+
+            df = df.assign(fingerprint=fingerprint_rows(df, occurrences))
+            unknown = known.unknown(df)
+            summary['duplicates'] += int((~unknown).sum())
+            df = df[unknown]
+
+            if not df.empty:
+                df = df.assign(category=assigner.assign(df['description'], df['type']))
+                inserted = self.transaction_model.import_csv(self._to_csv(df, source))
+                # Rows stored since the prefilter was loaded are skipped by the unique index
+                summary['duplicates'] += len(df) - inserted
+                summary['inserted'] += inserted
+
+            if progress_callback:
+                progress_callback(dict(summary, fraction=min(file.tell() / size, 1.0)))
+
+        summary.update(categorized_locally=assigner.local, categorized_by_llm=assigner.llm,
+                       seconds=time.perf_counter() - started)
+        logger.info("Imported %d of %d statement rows", summary['inserted'], summary['rows'], extra=summary)
+        if progress_callback:
+            progress_callback(dict(summary, fraction=1.0))
+        return summary
@@ -0,0 +1,96 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional
+from services.ai_clients import LLM_REQUEST_SECONDS, LLM_TIME_TO_FIRST_TOKEN, record_token_usage
+from utils.tracing import current_span, record_span
+
+logger = logging.getLogger(__name__)
+
+class StreamMetrics:
+    def __init__(self, provider: str, model: Optional[str] = None):
+        """Initialize timing metrics for one streamed completion."""
+        self.provider = provider
+        self.model = model
+        self.time_to_first_token: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self.tokens = 0
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate after the first token arrived."""
+        if self.total_time is None or self.time_to_first_token is None or self.tokens < 2:
+            return None
+        generation_time = self.total_time - self.time_to_first_token
+        return (self.tokens - 1) / generation_time if generation_time > 0 else None
+
+    def as_dict(self) -> dict:
+        return {
+            'provider': self.provider,
+            'model': self.model,
+            'time_to_first_token': self.time_to_first_token,
+            'total_time': self.total_time,
+            'tokens': self.tokens,
+            'tokens_per_second': self.tokens_per_second
+        }
+
+class MeteredStream:
+    def __init__(self, chunks: Iterable[str], provider: str, model: Optional[str] = None,
+                 on_complete: Optional[Callable[[str], None]] = None):
+        """Wrap a stream of text chunks and record TTFT and tokens per second.
+
+        Each non-empty chunk is counted as one token, which matches how both
+        providers stream (one token per event). ``on_complete`` receives the
+        full text once the stream finishes without error.
+        """
+        self._chunks = chunks
+        self.metrics = StreamMetrics(provider, model)
+        self.on_complete = on_complete
+        # The stream is consumed later, often outside the span that created it
+        self._parent_span = current_span()
+
+    def __iter__(self) -> Iterator[str]:
+        started_at = time.time()
+        started = time.perf_counter()
+        parts = []
+        try:
+            for chunk in self._chunks:
+                if not chunk:
+                    continue
+                if self.metrics.time_to_first_token is None:
+                    self.metrics.time_to_first_token = time.perf_counter() - started
+                self.metrics.tokens += 1
+                parts.append(chunk)
+                yield chunk
+            if self.on_complete:
+                self.on_complete("".join(parts))
+        finally:
+            self.metrics.total_time = time.perf_counter() - started
+            record_stream_metrics(self.metrics)
+            record_span(f"{self.metrics.provider}.stream", started_at, self.metrics.total_time,
+                        parent=self._parent_span, model=self.metrics.model, tokens=self.metrics.tokens,
+                        time_to_first_token=self.metrics.time_to_first_token)
+
+_recent_metrics = deque(maxlen=100)
+_recent_lock = threading.Lock()
+
+def record_stream_metrics(metrics: StreamMetrics):
+    """Keep the metrics of a finished stream for reporting."""
+    with _recent_lock:
+        _recent_metrics.append(metrics)
+    # Replays of cached answers are not LLM requests
+    if metrics.provider != "cache":
+        LLM_REQUEST_SECONDS.observe(metrics.total_time, provider=metrics.provider, operation='stream')
+        if metrics.time_to_first_token is not None:
+            LLM_TIME_TO_FIRST_TOKEN.observe(metrics.time_to_first_token, provider=metrics.provider)
+        record_token_usage(metrics.provider, None, metrics.tokens)
+    ttft = f"{metrics.time_to_first_token:.3f}s" if metrics.time_to_first_token is not None else "n/a"
+    rate = f"{metrics.tokens_per_second:.1f}" if metrics.tokens_per_second is not None else "n/a"
+    logger.info("Stream finished (%s): TTFT %s, %d tokens, %s tokens/s", metrics.provider, ttft, metrics.tokens, rate,
+                extra={'provider': metrics.provider, 'model': metrics.model})
+
+def get_recent_stream_metrics() -> List[dict]:
+    """Return metrics for the most recent streamed completions, oldest first."""
+    with _recent_lock:
+        return [metrics.as_dict() for metrics in _recent_metrics]
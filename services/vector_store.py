@@ -0,0 +1,417 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def build_chroma_where(filters: Optional[dict]) -> Optional[dict]:
+    """Translate store filters (start/end timestamps, category, type) into a Chroma ``where``."""
+    if not filters:
+        return None
+    conditions = []
+    if 'start' in filters:
+        conditions.append({"timestamp": {"$gte": filters['start']}})
+    if 'end' in filters:
+        conditions.append({"timestamp": {"$lt": filters['end']}})
+    for key in ('category', 'type'):
+        if key in filters:
+            conditions.append({key: {"$eq": filters[key]}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+class ChromaVectorStore:
+    def __init__(self, chroma_client, embedding_function, name: str = "transactions",
+                 path: str = ".chromadb"):
+        """Vector store backed by a ChromaDB collection."""
+        self.collection = chroma_client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_function
+        )
+        self.sync_state_path = os.path.join(path, f"{name}_sync.json")
+
+    def get_hashes(self, ids: List[str]) -> Dict[str, Optional[str]]:
+        """Return the stored content hash for each id that exists."""
+        existing = self.collection.get(ids=ids, include=["metadatas"])
+        return {
+            id_: (metadata or {}).get("content_hash")
+            for id_, metadata in zip(existing['ids'], existing['metadatas'])
+        }
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[dict]):
+        self.collection.upsert(documents=documents, ids=ids, metadatas=metadatas)
+
+    def flush(self):
+        """Chroma persists every write itself."""
+
+    def delete(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def all_ids(self) -> Set[str]:
+        return set(self.collection.get(include=[])['ids'])
+
+    def documents(self, ids: Optional[List[str]] = None, page_size: int = 1000) -> Iterator[Tuple[str, str, dict]]:
+        """Yield ``(id, document, metadata)`` for the given ids, or page through every stored document."""
+        if ids is not None:
+            results = self.collection.get(ids=ids, include=["documents", "metadatas"])
+            yield from zip(results['ids'], results['documents'], results['metadatas'])
+            return
+        offset = 0
+        while True:
+            results = self.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            yield from zip(results['ids'], results['documents'], results['metadatas'])
+            if len(results['ids']) < page_size:
+                return
+            offset += page_size
+
+    def query(self, query_embedding: Sequence[float], k: int, filters: Optional[dict] = None) -> List[dict]:
+        """Return the ``k`` nearest documents matching the filters.
+
+        Results are dicts with id, document, metadata and distance.
+        """
+        results = self.collection.query(
+            query_embeddings=[list(query_embedding)],
+            n_results=k,
+            where=build_chroma_where(filters)
+        )
+        return [
+            {'id': id_, 'document': doc, 'metadata': metadata, 'distance': distance}
+            for id_, doc, metadata, distance in zip(
+                results['ids'][0], results['documents'][0],
+                results['metadatas'][0], results['distances'][0]
+            )
+        ]
+
+class FaissVectorStore:
+    INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+    # Rebuild an HNSW index once this share of its vectors, or this many, are tombstoned
+    REBUILD_STALE_RATIO = 0.2
+    REBUILD_STALE_COUNT = 1000
+
+    def __init__(self, embedding_function: Callable[[List[str]], list], dim: int,
+                 path: str = ".faiss", index_type: str = "flat", nlist: int = 1024,
+                 hnsw_m: int = 32, nprobe: int = 16, mmap: bool = True):
+        """Vector store backed by a FAISS index persisted on disk.
+
+        Ids must be integers (transaction ids). Documents and metadata live in
+        a SQLite sidecar next to the index, which also maps each document to
+        the FAISS id of its current vector. The index is memory-mapped on load
+        and only copied into memory on the first write. Writes are persisted
+        by ``flush``. HNSW cannot remove vectors, so every write there gets a
+        fresh vector id; the replaced vectors are tombstones that no document
+        points to, and the index is rebuilt when too many are stale. Flat and
+        IVF indexes use the document id as the vector id. IVF is retrained as
+        the collection outgrows the number of lists it was trained with.
+        """
+        import faiss
+
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+        self.faiss = faiss
+        self.embedding_function = embedding_function
+        self.dim = dim
+        self.index_type = index_type
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._dirty = False
+
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = directory / f"transactions_{index_type}.faiss"
+        self.sync_state_path = str(directory / f"transactions_{index_type}_sync.json")
+
+        self.db = sqlite3.connect(str(directory / f"transactions_{index_type}.sqlite3"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                content_hash TEXT,
+                vector_id INTEGER
+            )
+        """)
+        if 'vector_id' not in {row[1] for row in self.db.execute("PRAGMA table_info(documents)")}:
+            # Sidecars written before vector ids were tracked used the document id
+            self.db.execute("ALTER TABLE documents ADD COLUMN vector_id INTEGER")
+            self.db.execute("UPDATE documents SET vector_id = id")
+        self.db.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_vector_id ON documents(vector_id)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.db.commit()
+
+        self._mmapped = False
+        if self.index_path.exists():
+            flags = faiss.IO_FLAG_MMAP if mmap else 0
+            self.index = faiss.read_index(str(self.index_path), flags)
+            self._mmapped = bool(flags)
+        else:
+            self.index = self._new_index()
+        self._set_search_params()
+        if self.index_type == "hnsw" and self._state('next_vector_id') is None:
+            # Start above every id already in the index, tombstones included
+            used = self.faiss.vector_to_array(self.index.id_map) if self.index.ntotal else np.array([-1])
+            stored = self.db.execute("SELECT COALESCE(MAX(id), -1) FROM documents").fetchone()[0]
+            self._set_state('next_vector_id', int(max(used.max(), stored)) + 1)
+            self.db.commit()
+
+    def _new_index(self, train_size: Optional[int] = None):
+        """Create an empty index of the configured type."""
+        faiss = self.faiss
+        if self.index_type == "flat":
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+        if self.index_type == "hnsw":
+            return faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT))
+        # IVF needs ~39 training points per list; shrink nlist for small collections
+        nlist = self.nlist if train_size is None else max(1, min(self.nlist, train_size // 39))
+        quantizer = faiss.IndexFlatIP(self.dim)
+        return faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+
+    def _set_search_params(self):
+        if self.index_type == "ivf":
+            self.index.nprobe = self.nprobe
+        elif self.index_type == "hnsw":
+            self.faiss.downcast_index(self.index.index).hnsw.efSearch = max(64, self.nprobe * 4)
+
+    def _ensure_writable(self):
+        """Replace a memory-mapped index with an in-memory copy before mutating it."""
+        if self._mmapped:
+            self.index = self.faiss.read_index(str(self.index_path))
+            self._mmapped = False
+            self._set_search_params()
+
+    def _save(self):
+        """Atomically persist the index."""
+        tmp_path = f"{self.index_path}.tmp"
+        self.faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+        self.db.commit()
+        self._dirty = False
+
+    def flush(self):
+        """Rebuild the index if it has degraded and persist pending writes."""
+        with self._lock:
+            if self._needs_rebuild():
+                self.rebuild()
+            elif self._dirty:
+                self._save()
+
+    def _embed(self, documents: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.embedding_function(documents), dtype=np.float32).reshape(len(documents), self.dim)
+        self.faiss.normalize_L2(vectors)
+        return vectors
+
+    def _state(self, key: str) -> Optional[int]:
+        row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: int):
+        self.db.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    def _stale_count(self) -> int:
+        return self._state('stale') or 0
+
+    def _add_stale(self, count: int):
+        self.db.execute(
+            "INSERT INTO state (key, value) VALUES ('stale', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+            (count,)
+        )
+
+    def _remove_vectors(self, ids: np.ndarray):
+        """Remove the vectors of documents, or tombstone them when the index cannot remove."""
+        if self.index_type == "hnsw":
+            self._add_stale(len(ids))
+        else:
+            self.index.remove_ids(ids)
+
+    def get_hashes(self, ids: List[str]) -> Dict[str, Optional[str]]:
+        placeholders = ",".join("?" * len(ids))
+        rows = self.db.execute(
+            f"SELECT id, content_hash FROM documents WHERE id IN ({placeholders})",
+            [int(id_) for id_ in ids]
+        ).fetchall()
+        return {str(id_): content_hash for id_, content_hash in rows}
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[dict]):
+        vectors = self._embed(documents)
+        int_ids = np.array([int(id_) for id_ in ids], dtype=np.int64)
+
+        with self._lock:
+            self._ensure_writable()
+            existing = [int(id_) for id_ in self.get_hashes(ids)]
+            if existing:
+                self._remove_vectors(np.array(existing, dtype=np.int64))
+
+            if self.index_type == "ivf" and not self.index.is_trained:
+                self.index = self._new_index(train_size=len(vectors))
+                self._set_search_params()
+                self.index.train(vectors)
+            if self.index_type == "hnsw":
+                start = self._state('next_vector_id') or 0
+                vector_ids = np.arange(start, start + len(int_ids), dtype=np.int64)
+                self._set_state('next_vector_id', start + len(int_ids))
+            else:
+                vector_ids = int_ids
+            self.index.add_with_ids(vectors, vector_ids)
+
+            self.db.executemany(
+                "INSERT OR REPLACE INTO documents (id, document, metadata, content_hash, vector_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (int(id_), doc, json.dumps(metadata), metadata.get("content_hash"), int(vector_id))
+                    for id_, doc, metadata, vector_id in zip(ids, documents, metadatas, vector_ids)
+                ]
+            )
+            self._dirty = True
+
+    def delete(self, ids: List[str]):
+        int_ids = [int(id_) for id_ in ids]
+        with self._lock:
+            self._ensure_writable()
+            self._remove_vectors(np.array(int_ids, dtype=np.int64))
+            self.db.executemany("DELETE FROM documents WHERE id = ?", [(id_,) for id_ in int_ids])
+            self._dirty = True
+
+    def _needs_rebuild(self) -> bool:
+        """Whether HNSW holds too many tombstones or IVF has outgrown its lists."""
+        if self.index_type == "hnsw":
+            stale = self._stale_count()
+            return stale > self.REBUILD_STALE_COUNT or stale > self.REBUILD_STALE_RATIO * max(self.index.ntotal, 1)
+        if self.index_type == "ivf" and self.index.is_trained:
+            target = min(self.nlist, self.index.ntotal // 39)
+            return target >= 2 * self.index.nlist
+        return False
+
+    def rebuild(self, batch_size: int = 1024):
+        """Re-create the index from the documents in the sidecar store."""
+        with self._lock:
+            logger.info("Rebuilding FAISS %s index", self.index_type)
+            rows = self.db.execute("SELECT id, document FROM documents ORDER BY id").fetchall()
+            vectors = self._embed([doc for _, doc in rows]) if rows else np.empty((0, self.dim), dtype=np.float32)
+            self.index = self._new_index(train_size=len(rows))
+            self._set_search_params()
+            if self.index_type == "ivf" and len(rows):
+                self.index.train(vectors)
+            ids = np.array([id_ for id_, _ in rows], dtype=np.int64)
+            vector_ids = np.arange(len(rows), dtype=np.int64) if self.index_type == "hnsw" else ids
+            for start in range(0, len(rows), batch_size):
+                self.index.add_with_ids(vectors[start:start + batch_size], vector_ids[start:start + batch_size])
+            # Clear first so the renumbering never collides on the unique index
+            self.db.execute("UPDATE documents SET vector_id = NULL")
+            self.db.executemany("UPDATE documents SET vector_id = ? WHERE id = ?",
+                                [(int(vector_id), int(id_)) for vector_id, id_ in zip(vector_ids, ids)])
+            if self.index_type == "hnsw":
+                self._set_state('next_vector_id', len(rows))
+            self.db.execute("DELETE FROM state WHERE key = 'stale'")
+            self._mmapped = False
+            self._save()
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def all_ids(self) -> Set[str]:
+        return {str(row[0]) for row in self.db.execute("SELECT id FROM documents")}
+
+    def documents(self, ids: Optional[List[str]] = None) -> Iterator[Tuple[str, str, dict]]:
+        """Yield ``(id, document, metadata)`` for the given ids, or for every stored document."""
+        query, params = "SELECT id, document, metadata FROM documents", []
+        if ids is not None:
+            query += f" WHERE id IN ({','.join('?' * len(ids))})"
+            params = [int(id_) for id_ in ids]
+        for id_, document, metadata in self.db.execute(query, params):
+            yield str(id_), document, json.loads(metadata)
+
+    def _filtered_ids(self, filters: dict) -> np.ndarray:
+        """Return the vector ids of the documents whose sidecar metadata matches the filters."""
+        conditions, params = [], []
+        if 'start' in filters:
+            conditions.append("json_extract(metadata, '$.timestamp') >= ?")
+            params.append(filters['start'])
+        if 'end' in filters:
+            conditions.append("json_extract(metadata, '$.timestamp') < ?")
+            params.append(filters['end'])
+        for key in ('category', 'type'):
+            if key in filters:
+                conditions.append(f"json_extract(metadata, '$.{key}') = ?")
+                params.append(filters[key])
+        where = " AND ".join(conditions) or "1"
+        rows = self.db.execute(f"SELECT vector_id FROM documents WHERE {where}", params).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def _search_parameters(self, ids: np.ndarray):
+        """Build search parameters restricting the search to the given ids."""
+        selector = self.faiss.IDSelectorBatch(ids)
+        if self.index_type == "ivf":
+            params = self.faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        elif self.index_type == "hnsw":
+            params = self.faiss.SearchParametersHNSW(sel=selector, efSearch=max(64, self.nprobe * 4))
+        else:
+            params = self.faiss.SearchParameters(sel=selector)
+        # The parameters only hold a pointer to the selector
+        params.selector_ref = selector
+        return params
+
+    def query(self, query_embedding: Sequence[float], k: int, filters: Optional[dict] = None) -> List[dict]:
+        """Return the ``k`` nearest documents matching the filters.
+
+        Filters are resolved to ids in the sidecar and passed to FAISS as an
+        id selector, so only matching vectors are scored. Results are dicts
+        with id, document, metadata and distance.
+        """
+        if self.index.ntotal == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(1, self.dim).copy()
+        self.faiss.normalize_L2(query)
+
+        params, candidates = None, self.index.ntotal
+        if filters:
+            ids = self._filtered_ids(filters)
+            if not len(ids):
+                return []
+            params, candidates = self._search_parameters(ids), len(ids)
+
+        # Over-fetch in proportion to the tombstoned share of HNSW, widening only if that falls short
+        stale = self._stale_count() if self.index_type == "hnsw" else 0
+        limit = min(self.index.ntotal, max(k, candidates + stale))
+        fetch = min(limit, int(np.ceil(2 * k * (1 + stale / self.index.ntotal))) if stale else k)
+        while True:
+            results = self._collect(query, k, fetch, params)
+            if len(results) == k or fetch >= limit:
+                return results
+            fetch = min(limit, fetch * 2)
+
+    def _collect(self, query: np.ndarray, k: int, fetch: int, params) -> List[dict]:
+        """Search ``fetch`` neighbours and keep the first ``k`` whose vector is a document's current one."""
+        with self._lock:
+            scores, vector_ids = self.index.search(query, fetch, params=params)
+
+        results = []
+        for score, vector_id in zip(scores[0], vector_ids[0]):
+            if vector_id < 0:
+                continue
+            row = self.db.execute(
+                "SELECT id, document, metadata FROM documents WHERE vector_id = ?", (int(vector_id),)
+            ).fetchone()
+            if row is None:
+                continue  # tombstone of a replaced or deleted document
+            results.append({
+                'id': str(row[0]),
+                'document': row[1],
+                'metadata': json.loads(row[2]),
+                'distance': 1.0 - float(score)
+            })
+            if len(results) == k:
+                break
+        return results
@@ -0,0 +1,50 @@
+from datetime import datetime
+from services.aggregate_context import AggregateContextBuilder, detect_aggregate_intents
+
+class FakeTransactionModel:
+    """Records aggregate calls and returns fixed rows."""
+    def __init__(self):
+        self.calls = []
+
+    def get_aggregates(self, group_by=None, limit=12, **filters):
+        self.calls.append((group_by, filters))
+        row = {'type': 'expense', 'total': 250.0, 'count': 4, 'average': 62.5, 'largest': 120.0}
+        if group_by == 'category':
+            row['category'] = 'transportation'
+        return [row]
+
+    def get_largest_transactions(self, **filters):
+        return [{'description': 'Train ticket', 'amount': 120.0, 'type': 'expense',
+                 'category': 'transportation', 'created_at': datetime(2024, 9, 3)}]
+
+def test_detect_aggregate_intents():
+    """Test that numeric questions are recognised in English and Polish."""
+    assert detect_aggregate_intents("How much did I spend on transport?") == {'total'}
+    assert 'average' in detect_aggregate_intents("Jaki jest mój średni wydatek?")
+    assert 'largest' in detect_aggregate_intents("What were my biggest purchases?")
+    assert detect_aggregate_intents("Give me saving tips") == set()
+
+def test_build_uses_filters_and_formats_totals():
+    """Test that the summary is computed for the parsed filters."""
+    model = FakeTransactionModel()
+    filters = {'start': datetime(2024, 9, 1), 'end': datetime(2024, 10, 1),
+               'category': 'transportation', 'type': 'expense'}
+    context = AggregateContextBuilder(model).build("How much did I spend on transport in September?", filters)
+
+    assert context.splitlines() == [
+        "Transaction totals (2024-09-01 to 2024-09-30, transportation, expense):",
+        "- expense: 250.00 PLN across 4 transactions (average 62.50 PLN, largest 120.00 PLN)",
+    ]
+    assert model.calls == [(None, filters)]
+
+def test_build_adds_breakdown_and_largest():
+    """Test that category breakdowns and largest transactions are added on request."""
+    model = FakeTransactionModel()
+    context = AggregateContextBuilder(model).build("Largest expenses by category", {})
+    assert "Transaction totals (all time):" in context
+    assert "- transportation (expense): 250.00 PLN" in context
+    assert "- [2024-09-03] Train ticket (expense, transportation): 120.00 PLN" in context
+
+def test_non_aggregate_question_returns_none():
+    """Test that other questions fall back to retrieval."""
+    assert AggregateContextBuilder(FakeTransactionModel()).build("Any tips?", {}) is None
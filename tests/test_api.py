@@ -0,0 +1,141 @@
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+
+_init_schema = os.environ.get('DB_INIT_SCHEMA')
+import api
+if _init_schema is None:
+    # Importing the API defaults DB_INIT_SCHEMA to 0; the database tests still need the schema
+    del os.environ['DB_INIT_SCHEMA']
+
+class FakeTransactionModel:
+    def __init__(self, count=5):
+        start = datetime(2024, 3, 1)
+        self.rows = [
+            {'id': index, 'description': f"Transaction {index}", 'amount': Decimal('10.50'), 'type': 'expense',
+             'category': 'groceries', 'created_at': start + timedelta(days=index)}
+            for index in range(1, count + 1)
+        ]
+        self.created = []
+
+    async def get_transactions_page(self, limit, before=None, start=None, end=None, category=None, type=None):
+        rows = sorted(self.rows, key=lambda row: (row['created_at'], row['id']), reverse=True)
+        if before is not None:
+            rows = [row for row in rows if (row['created_at'], row['id']) < before]
+        return rows[:limit]
+
+    async def create_transaction(self, description, amount, **kwargs):
+        if amount > 1000:
+            raise ValueError("Amount too large")
+        self.created.append(description)
+        return {'id': len(self.created), 'description': description, 'amount': Decimal(str(amount))}
+
+    async def get_aggregates(self, start=None, end=None, category=None, type=None, group_by=None, limit=12):
+        if group_by not in (None, 'category', 'month'):
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        return [{'type': 'expense', 'total': Decimal('52.50'), 'count': 5}]
+
+    async def get_largest_transactions(self, start=None, end=None, category=None, type=None, limit=5):
+        return self.rows[:limit]
+
+    async def update_transaction(self, transaction_id, data):
+        return sum(1 for row in self.rows if row['id'] == transaction_id)
+
+    async def delete_transaction(self, transaction_id):
+        count = len(self.rows)
+        self.rows = [row for row in self.rows if row['id'] != transaction_id]
+        return count - len(self.rows)
+
+class FakeBudgetModel:
+    async def get_all_budgets(self):
+        return [{'id': 1}, {'id': 2}]
+
+    async def get_budgets_progress(self, budget_ids):
+        return [{'spent': 10.0 * budget_id, 'remaining': 100.0 - 10.0 * budget_id} for budget_id in budget_ids]
+
+    async def create_budget(self, category, amount, period, start_date=None, end_date=None,
+                            notification_threshold=0.8):
+        return {'id': 3, 'category': category, 'amount': Decimal(str(amount)), 'period': period}
+
+    async def delete_budget(self, budget_id):
+        return budget_id in (1, 2)
+
+@pytest.fixture
+def transactions():
+    return FakeTransactionModel()
+
+@pytest.fixture
+def client(transactions):
+    api.app.dependency_overrides[api.get_transaction_model] = lambda: transactions
+    api.app.dependency_overrides[api.get_budget_model] = FakeBudgetModel
+    yield TestClient(api.app)
+    api.app.dependency_overrides.clear()
+
+def test_keyset_pagination_walks_all_rows(client):
+    """Test that following next_cursor returns every row once, newest first."""
+    ids, cursor = [], None
+    while True:
+        page = client.get("/transactions", params={'limit': 2, **({'cursor': cursor} if cursor else {})}).json()
+        ids += [item['id'] for item in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert ids == [5, 4, 3, 2, 1]
+    assert page['items'][0]['amount'] == 10.5
+
+def test_invalid_cursor_and_limit(client):
+    """Test that malformed cursors and oversized pages are rejected."""
+    assert client.get("/transactions", params={'cursor': "not-a-cursor"}).status_code == 400
+    assert client.get("/transactions", params={'limit': api.MAX_PAGE_SIZE + 1}).status_code == 422
+
+def test_batch_create_reports_failures_by_index(client, transactions):
+    """Test that one failing item does not abort the rest of a batch."""
+    item = {'description': "Kawa", 'amount': 12.5, 'type': 'expense', 'category': 'food'}
+    response = client.post("/transactions/batch", json={'transactions': [item, dict(item, amount=5000), item]})
+    assert response.status_code == 201
+    body = response.json()
+    assert len(body['created']) == 2
+    assert body['errors'][0]['index'] == 1
+    assert transactions.created == ["Kawa", "Kawa"]
+
+def test_budget_progress_batch(client):
+    """Test progress of several budgets in one request."""
+    progress = client.get("/budgets/progress", params=[('ids', 1), ('ids', 2)]).json()
+    assert progress == [{'spent': 10.0, 'remaining': 90.0, 'id': 1}, {'spent': 20.0, 'remaining': 80.0, 'id': 2}]
+    assert len(client.get("/budgets/progress").json()) == 2
+
+def test_missing_rows_return_not_found(client):
+    """Test that updates and deletes of unknown ids answer 404."""
+    assert client.patch("/transactions/1", json={'description': "Rent"}).json() == {'id': 1}
+    assert client.patch("/transactions/99", json={'description': "Rent"}).status_code == 404
+    assert client.delete("/transactions/1").status_code == 204
+    assert client.delete("/transactions/1").status_code == 404
+    assert client.delete("/budgets/2").status_code == 204
+    assert client.delete("/budgets/99").status_code == 404
+
+def test_create_budget_returns_stored_row(client):
+    """Test that creating a budget answers with the stored row and its id."""
+    response = client.post("/budgets", json={'category': 'groceries', 'amount': 100, 'period': 'monthly',
+                                              'start_date': '2024-03-01'})
+    assert response.status_code == 201
+    assert response.json() == {'id': 3, 'category': 'groceries', 'amount': 100.0, 'period': 'monthly'}
+
+def test_aggregates_validates_grouping(client):
+    """Test aggregates serialization and rejection of unknown groupings."""
+    assert client.get("/analytics/aggregates").json()[0]['total'] == 52.5
+    assert client.get("/analytics/aggregates", params={'group_by': 'weekday'}).status_code == 422
+
+def test_summary_combines_independent_queries(client):
+    """Test the dashboard summary built from concurrently gathered queries."""
+    body = client.get("/summary").json()
+    assert body['totals'][0]['total'] == 52.5
+    assert len(body['largest_expenses']) == 5
+    assert body['budgets'] == [{'id': 1, 'spent': 10.0, 'remaining': 90.0}, {'id': 2, 'spent': 20.0, 'remaining': 80.0}]
+
+def test_token_required_when_configured(client, monkeypatch):
+    """Test bearer token authentication."""
+    monkeypatch.setattr(api, 'API_TOKEN', "secret")
+    assert client.get("/health").status_code == 401
+    assert client.get("/health", headers={'Authorization': "Bearer secret"}).status_code == 200
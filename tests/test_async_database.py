@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+import psycopg2.pool
+import pytest
+from models import database as database_module
+from models.async_database import AsyncDatabase
+from utils import tracing
+from utils.tracing import current_span, span
+
+class FakeDatabase:
+    """Sync stand-in for Database whose queries take a fixed time."""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.threads = set()
+        self.batches = []
+
+    def fetch_all(self, query, params=None):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return [{'query': query, 'params': params}]
+
+    def fetch_one(self, query, params=None):
+        return {'span': current_span()}
+
+    def execute_many(self, query, params_list, page_size=100):
+        self.batches.append((query, params_list, page_size))
+        return len(params_list)
+
+@pytest.fixture
+def database():
+    return AsyncDatabase(FakeDatabase(), max_workers=4)
+
+def test_independent_queries_run_concurrently(database):
+    """Test that gathered queries overlap instead of running one after another."""
+    async def run():
+        return await asyncio.gather(*(database.fetch("SELECT %s", (index,)) for index in range(4)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    assert time.perf_counter() - started < 4 * database.db.delay
+    assert [rows[0]['params'] for rows in results] == [(0,), (1,), (2,), (3,)]
+    assert all(name.startswith("async-db") for name in database.db.threads)
+
+def test_concurrency_is_bounded_by_workers():
+    """Test that at most max_workers queries hold a connection at once."""
+    database = AsyncDatabase(FakeDatabase(delay=0.05), max_workers=2)
+
+    async def run():
+        await asyncio.gather(*(database.fetch("SELECT 1") for _ in range(4)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    assert time.perf_counter() - started >= 2 * 0.05
+    assert len(database.db.threads) <= 2
+
+def test_execute_many_passes_parameter_sets(database):
+    """Test that parameter sets are materialized and forwarded with the page size."""
+    count = asyncio.run(database.execute_many("UPDATE t SET x = %s", ((value,) for value in range(3)), page_size=2))
+    assert count == 3
+    assert database.db.batches == [("UPDATE t SET x = %s", [(0,), (1,), (2,)], 2)]
+
+def test_caller_span_is_propagated(database, monkeypatch):
+    """Test that queries on executor threads see the awaiting coroutine's span."""
+    monkeypatch.setattr(tracing, 'TRACING_ENABLED', True)
+
+    async def run():
+        with span("api.request") as parent:
+            row = await database.fetch_one("SELECT 1")
+        return parent, row['span']
+
+    parent, seen = asyncio.run(run())
+    assert seen is parent
+
+def test_callers_wait_for_a_free_pooled_connection(mock_db, monkeypatch):
+    """Test that more concurrent queries than pooled connections queue instead of failing."""
+    maxconn = mock_db.pool.maxconn
+    database = AsyncDatabase(mock_db, max_workers=maxconn + 5)
+
+    async def run():
+        return await asyncio.gather(*(database.fetch("SELECT pg_sleep(0.05)") for _ in range(maxconn + 5)))
+
+    assert len(asyncio.run(run())) == maxconn + 5
+    database.close()
+
+    monkeypatch.setattr(database_module, 'DB_POOL_TIMEOUT', 0.05)
+    held = [mock_db._get_connection() for _ in range(maxconn)]
+    try:
+        with pytest.raises(psycopg2.pool.PoolError):
+            mock_db._get_connection()
+    finally:
+        for conn in held:
+            mock_db._return_connection(conn)
+    mock_db._return_connection(mock_db._get_connection())
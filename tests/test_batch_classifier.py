@@ -0,0 +1,58 @@
+import pytest
+from services.batch_classifier import RateLimiter, chunked, classify_batch, run_concurrently
+from services.classification_cache import ClassificationCache
+from services.rule_classifier import CategoryPredictor
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    """Use an in-memory classification cache for each test."""
+    cache = ClassificationCache(path=None)
+    monkeypatch.setattr('services.batch_classifier.get_classification_cache', lambda: cache)
+    monkeypatch.setattr('services.rule_classifier.get_category_predictor', CategoryPredictor)
+    return cache
+
+def test_only_uncertain_items_reach_llm():
+    """Test that confident rule results and cache hits skip the LLM."""
+    sent = []
+
+    def classify_pending(pending):
+        sent.extend(description for _, description in pending)
+        return [(index, {'amount': 1.0, 'category': 'other'}) for index, _ in pending]
+
+    descriptions = ["czynsz 1500 PLN", "something odd", "Something  odd."]
+    results = classify_batch(descriptions, classify_pending, ["v1"], "v1")
+    assert sent == ["something odd"]
+    assert results[0]['category'] == 'housing'
+    assert results[1]['amount'] == 1.0
+    assert results[2] == results[1] and results[2] is not results[1]
+
+    sent.clear()
+    classify_batch(["something odd"], classify_pending, ["v1"], "v1")
+    assert sent == []
+
+def test_per_item_error_isolation():
+    """Test that a failing task does not fail the other items."""
+    def failing(index):
+        if index == 0:
+            raise RuntimeError("boom")
+        return [(index, {'amount': 2.0})]
+
+    def classify_pending(pending):
+        return run_concurrently([lambda i=i: failing(i) for i, _ in pending], max_workers=2)
+
+    progress = []
+    results = classify_batch(["odd 10", "odd thing"], classify_pending, ["v1"], "v1",
+                             progress_callback=lambda done, total: progress.append((done, total)))
+    assert results[0]['amount'] == 10.0  # rule-based fallback
+    assert results[1] == {'amount': 2.0}
+    assert progress[-1] == (2, 2)
+
+def test_chunked():
+    """Test splitting items into batches."""
+    assert [list(c) for c in chunked([1, 2, 3, 4, 5], 2)] == [[1, 2], [3, 4], [5]]
+
+def test_rate_limiter_burst():
+    """Test that the rate limiter allows an initial burst without waiting."""
+    limiter = RateLimiter(rate=1000, burst=3)
+    for _ in range(3):
+        limiter.acquire()
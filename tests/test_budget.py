@@ -7,7 +7,7 @@ def test_budget_creation(mock_db, sample_budget_data):
     """Test budget creation functionality."""
     budget = Budget()
     result = budget.create_budget(**sample_budget_data)
-    assert result is True
+    assert result['id'] and result['category'] == sample_budget_data['category']
 
 def test_budget_progress_calculation(mock_db):
     """Test budget progress calculation."""
@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+import pytest
+from models.category import Category
+from models.transaction import Transaction
+
+def test_get_category_id_creates_once(mock_db):
+    """Test that looking up a new category creates it exactly once."""
+    category = Category()
+    first_id = category.get_category_id('test-category')
+    second_id = category.get_category_id('test-category')
+    assert first_id == second_id
+    assert 'test-category' in category.get_all_categories()
+
+def test_usage_counters_follow_transactions(mock_db, sample_transaction_data):
+    """Test that category usage counters are maintained on insert and delete."""
+    transaction = Transaction()
+    created = transaction.create_transaction(
+        description=sample_transaction_data['description'],
+        amount=sample_transaction_data['amount'],
+        type=sample_transaction_data['type'],
+        category='counter-test',
+        cycle=sample_transaction_data['cycle']
+    )
+    usage = {row['category']: row for row in Category().get_category_usage()}
+    assert usage['counter-test']['usage_count'] == 1
+    assert float(usage['counter-test']['total_expenses']) == sample_transaction_data['amount']
+
+    transaction.delete_transaction(created['id'])
+    usage = {row['category']: row for row in Category().get_category_usage()}
+    assert usage['counter-test']['usage_count'] == 0
+
+def test_rename_into_existing_category_merges(mock_db):
+    """Test that renaming onto an existing name merges the categories."""
+    category = Category()
+    category.get_category_id('merge-source')
+    category.get_category_id('merge-target')
+    category.rename_category('merge-source', 'merge-target')
+    categories = category.get_all_categories()
+    assert 'merge-source' not in categories
+    assert 'merge-target' in categories
+
+def test_rename_is_atomic(monkeypatch):
+    """Test that a failing step rolls back the whole rename and keeps the cache."""
+    class FakeCursor:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, query, params=None):
+            if query.startswith("UPDATE budgets"):
+                raise RuntimeError("budgets locked")
+            self.statements.append(query)
+
+    class FakeDatabase:
+        def __init__(self):
+            self.cursor = FakeCursor()
+            self.rolled_back = False
+
+        @contextmanager
+        def transaction(self):
+            try:
+                yield self.cursor
+            except Exception:
+                self.rolled_back = True
+                raise
+
+    monkeypatch.setattr(Category, '_cache', {'rename-source': 1})
+    category = Category.__new__(Category)
+    category.db = FakeDatabase()
+    with pytest.raises(RuntimeError):
+        category.rename_category('rename-source', 'rename-target')
+    assert category.db.rolled_back
+    assert category.db.cursor.statements == ["UPDATE categories SET name = %s WHERE name = %s"]
+    assert Category._cache == {'rename-source': 1}
+
+def test_cache_load_racing_a_write_is_not_kept(monkeypatch):
+    """Test that a category list read before a concurrent write is not cached after it."""
+    class FakeDatabase:
+        def fetch_all(self, query, params=None):
+            # A rename commits and invalidates while this load is in flight
+            Category.invalidate_cache()
+            return [{'id': 1, 'name': 'old-name'}]
+
+    monkeypatch.setattr(Category, '_cache', None)
+    category = Category.__new__(Category)
+    category.db = FakeDatabase()
+    cache = category._get_cache()
+    assert dict(cache) == {'old-name': 1}
+    assert Category._cache is None
+    with pytest.raises(TypeError):
+        cache['new-name'] = 2
@@ -10,7 +10,7 @@ def test_chat_service_initialization():
     assert service is not None
     assert service.rag_service is not None
 
-@patch('services.openai_service.OpenAI')
+@patch('services.openai_service.get_openai_client')
 def test_openai_chat_completion(mock_openai, mock_openai_response):
     """Test OpenAI chat completion."""
     service = OpenAIService()
@@ -21,7 +21,8 @@ def test_openai_chat_completion(mock_openai, mock_openai_response):
 
 def test_ollama_chat_completion(mock_ollama_response):
     """Test Ollama chat completion."""
-    with patch('requests.post') as mock_post:
+    with patch('services.ollama_service.get_ollama_session') as mock_session:
+        mock_post = mock_session.return_value.post
         mock_post.return_value.json.return_value = mock_ollama_response
         mock_post.return_value.status_code = 200
         
@@ -34,3 +35,35 @@ def test_error_handling():
     service = FinancialChatService()
     response = service.get_chat_response("Invalid query that should trigger an error")
     assert 'error' in response or response.get('response') is not None
+
+def test_follow_up_questions_bypass_semantic_cache():
+    """Test that answers depending on conversation history are neither read from nor stored in the cache."""
+    service = FinancialChatService.__new__(FinancialChatService)
+    service.provider = "Ollama"
+    service.rag_service = MagicMock()
+    service.cache = MagicMock()
+    service._get_cache_key = MagicMock(return_value=([0.1, 0.2], 1))
+    service.aggregate_builder = MagicMock(build=MagicMock(return_value="Context"))
+    with patch.object(service, '_get_ai_service') as ai_service, \
+            patch.object(service, '_get_model', return_value=("ollama", "llama2")):
+        ai_service.return_value.get_chat_completion.return_value = "It was groceries."
+        response = service.get_chat_response("And the month before?",
+                                             history=[{'role': 'user', 'content': "Top category in May?"}])
+    assert response['response'] == "It was groceries."
+    service.cache.get.assert_not_called()
+    service.cache.set.assert_not_called()
+
+def test_semantic_cache_is_scoped_to_the_model():
+    """Test that cached answers are looked up and stored per provider and model."""
+    service = FinancialChatService.__new__(FinancialChatService)
+    service.provider = "OpenAI"
+    service.rag_service = MagicMock(parse_filters=MagicMock(return_value={}))
+    service.cache = MagicMock(get=MagicMock(return_value=None))
+    service._get_cache_key = MagicMock(return_value=([0.1, 0.2], 1))
+    service.aggregate_builder = MagicMock(build=MagicMock(return_value="Context"))
+    with patch.object(service, '_get_ai_service') as ai_service, \
+            patch.object(service, '_get_model', return_value=("openai", "gpt-4")):
+        ai_service.return_value.get_chat_completion.return_value = "Save more."
+        service.get_chat_response("How can I save?")
+    assert service.cache.get.call_args.args[2] == ("openai", "gpt-4")
+    assert service.cache.set.call_args.args[3] == ("openai", "gpt-4")
@@ -0,0 +1,36 @@
+import pytest
+from services.classification_cache import ClassificationCache, normalize_description, make_version
+
+def test_normalize_description():
+    """Test that near-identical descriptions normalize to the same text."""
+    assert normalize_description("  Czynsz   1500 PLN! ") == normalize_description("czynsz 1500 pln")
+    assert normalize_description("wypłata 5 000 zł") == "wypłata 5000 zł"
+
+def test_memory_hit(tmp_path):
+    """Test that a stored classification is returned from the cache."""
+    cache = ClassificationCache(path=str(tmp_path / "cache.sqlite3"))
+    version = make_version("openai", "gpt-3.5-turbo", "prompt")
+    cache.set("czynsz 1500 PLN", version, {'amount': 1500.0, 'type': 'expense'})
+    assert cache.get("Czynsz 1500 PLN", version) == {'amount': 1500.0, 'type': 'expense'}
+    assert cache.stats()['hits'] == 1
+
+def test_disk_persistence(tmp_path):
+    """Test that classifications survive a new cache instance."""
+    path = str(tmp_path / "cache.sqlite3")
+    ClassificationCache(path=path).set("czynsz 1500 PLN", "v1", {'amount': 1500.0})
+    assert ClassificationCache(path=path).get("czynsz 1500 PLN", "v1") == {'amount': 1500.0}
+
+def test_version_and_ttl(tmp_path):
+    """Test that entries from another version or past their TTL are misses."""
+    cache = ClassificationCache(path=str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.set("czynsz 1500 PLN", "v1", {'amount': 1500.0})
+    assert cache.get("czynsz 1500 PLN", "v1") is None
+    assert cache.get("czynsz 1500 PLN", "v2") is None
+
+def test_lru_eviction():
+    """Test that the in-memory LRU keeps at most max_entries items."""
+    cache = ClassificationCache(path=None, max_entries=2)
+    for i in range(3):
+        cache.set(f"item {i}", "v1", {'amount': float(i)})
+    assert cache.get("item 0", "v1") is None
+    assert cache.get("item 2", "v1") == {'amount': 2.0}
@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+from services.embedding_cache import EmbeddingCache
+
+class FakeModel:
+    """Deterministic stand-in for a SentenceTransformer model."""
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(text), text.count('a'), 1.0] for text in texts], dtype=np.float32)
+
+def test_repeated_texts_encoded_once(tmp_path):
+    """Test that repeated documents are encoded once and served from the cache."""
+    model = FakeModel()
+    cache = EmbeddingCache(model, "fake", cache_dir=str(tmp_path))
+    vectors = cache.encode(["groceries", "rent", "groceries"])
+    assert model.encoded == ["groceries", "rent"]
+    assert np.array_equal(vectors[0], vectors[2])
+
+    cache.encode(["rent"])
+    assert model.encoded == ["groceries", "rent"]
+    assert cache.stats()['hits'] == 2
+
+def test_vectors_persist_on_disk(tmp_path):
+    """Test that a new cache instance reuses vectors written by a previous one."""
+    EmbeddingCache(FakeModel(), "fake", cache_dir=str(tmp_path)).encode(["salary"])
+    model = FakeModel()
+    vectors = EmbeddingCache(model, "fake", cache_dir=str(tmp_path)).encode(["salary"])
+    assert model.encoded == []
+    assert vectors.tolist() == [[6.0, 2.0, 1.0]]
+
+def test_orphaned_vector_row_is_truncated(tmp_path):
+    """Test that a vector written without its key is dropped instead of shifting later rows."""
+    cache = EmbeddingCache(FakeModel(), "fake", cache_dir=str(tmp_path))
+    cache.encode(["salary"])
+    with open(cache._vectors_path, 'ab') as file:
+        file.write(np.ones(3, dtype=np.float32).tobytes() + b"\x00\x00")
+
+    model = FakeModel()
+    reopened = EmbeddingCache(model, "fake", cache_dir=str(tmp_path))
+    assert reopened._vectors_path.stat().st_size == 4 * 3
+    vectors = reopened.encode(["rent", "salary"])
+    assert vectors.tolist() == [[4.0, 0.0, 1.0], [6.0, 2.0, 1.0]]
+    assert EmbeddingCache(FakeModel(), "fake", cache_dir=str(tmp_path)).encode(["rent"]).tolist() == [[4.0, 0.0, 1.0]]
@@ -0,0 +1,55 @@
+import json
+import urllib.request
+import pytest
+from benchmarks.fake_llm_server import FakeLLMConfig, server_urls, start_fake_llm_server
+
+@pytest.fixture(scope="module")
+def urls():
+    server = start_fake_llm_server(FakeLLMConfig(latency=0.0, tokens_per_second=10_000, response_tokens=5))
+    yield server_urls(server)
+    server.shutdown()
+    server.server_close()
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=5) as response:
+        return response.read().decode('utf-8')
+
+def test_ollama_tags(urls):
+    """Test that the installed model list is served."""
+    models = json.loads(request(f"{urls['OLLAMA_BASE_URL']}/tags"))['models']
+    assert "llama2" in [model['name'] for model in models]
+
+def test_ollama_generate_stream(urls):
+    """Test NDJSON streaming with a final event carrying token counts."""
+    body = request(f"{urls['OLLAMA_BASE_URL']}/generate", {'model': 'llama2', 'prompt': "How am I doing?", 'stream': True})
+    events = [json.loads(line) for line in body.splitlines()]
+    assert len(events) == 6
+    assert events[-1]['done'] and events[-1]['eval_count'] == 5
+    assert "".join(event['response'] for event in events)
+
+def test_ollama_classification_returns_json(urls):
+    """Test that classification prompts get the canned JSON object."""
+    prompt = 'Analyze this transaction description\nDescription: "kino"\nReturn a JSON object with:'
+    body = json.loads(request(f"{urls['OLLAMA_BASE_URL']}/generate", {'prompt': prompt, 'stream': False}))
+    assert json.loads(body['response'])['category'] == "groceries"
+
+def test_openai_batch_classification(urls):
+    """Test that batch prompts get one result per numbered description."""
+    prompt = 'Analyze each numbered transaction\n0. "kino"\n1. "czynsz"\nReturn a JSON object {"results": [...]}'
+    body = json.loads(request(f"{urls['OPENAI_BASE_URL']}/chat/completions",
+                              {'model': 'gpt-4', 'messages': [{'role': 'user', 'content': prompt}]}))
+    results = json.loads(body['choices'][0]['message']['content'])['results']
+    assert [result['index'] for result in results] == [0, 1]
+    assert body['usage']['completion_tokens'] > 0
+
+def test_openai_chat_stream(urls):
+    """Test server-sent events ending with [DONE]."""
+    body = request(f"{urls['OPENAI_BASE_URL']}/chat/completions",
+                   {'model': 'gpt-4', 'stream': True, 'messages': [{'role': 'user', 'content': "Hi"}]})
+    data = [line[len("data: "):] for line in body.splitlines() if line.startswith("data: ")]
+    assert data[-1] == "[DONE]"
+    chunks = [json.loads(item) for item in data[:-1]]
+    assert chunks[-1]['choices'][0]['finish_reason'] == "stop"
+    assert len("".join(chunk['choices'][0]['delta'].get('content', '') for chunk in chunks).split()) == 5
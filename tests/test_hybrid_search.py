@@ -0,0 +1,42 @@
+from services.hybrid_search import BM25Index, reciprocal_rank_fusion
+
+def make_index():
+    index = BM25Index()
+    index.add([
+        ("1", "Netflix subscription (expense, entertainment)", {"type": "expense", "category": "entertainment", "timestamp": 100.0}),
+        ("2", "Lidl groceries (expense, groceries)", {"type": "expense", "category": "groceries", "timestamp": 200.0}),
+        ("3", "Netflix refund (income, entertainment)", {"type": "income", "category": "entertainment", "timestamp": 300.0}),
+    ])
+    return index
+
+def test_bm25_ranks_matching_documents():
+    """Test that documents sharing query terms are returned, best match first."""
+    results = make_index().search("netflix subscription", 5)
+    assert [doc_id for doc_id, _ in results] == ["1", "3"]
+
+def test_bm25_applies_filters():
+    """Test that metadata filters restrict the lexical candidates."""
+    index = make_index()
+    assert [doc_id for doc_id, _ in index.search("netflix", 5, {"type": "income"})] == ["3"]
+    assert index.search("netflix", 5, {"start": 150.0, "end": 250.0}) == []
+
+def test_bm25_replace_and_remove():
+    """Test that re-added documents replace their old text and removed ones disappear."""
+    index = make_index()
+    index.add([("1", "Spotify subscription (expense, entertainment)", {"type": "expense"})])
+    index.remove(["3"])
+    assert index.search("netflix", 5) == []
+    assert [doc_id for doc_id, _ in index.search("spotify", 5)] == ["1"]
+    assert len(index) == 2
+
+def test_bm25_skips_metadata_terms_and_honours_allow_list():
+    """Test that type/category words are not indexed and ids outside the allow-list are not scored."""
+    index = make_index()
+    assert index.search("expense", 5) == []
+    assert index.search("groceries", 5) == []
+    assert [doc_id for doc_id, _ in index.search("netflix", 5, ids=["3"])] == ["3"]
+    assert index.search("netflix", 5, {"category": "groceries"}) == []
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    """Test that ids ranked by both retrievers come first."""
+    assert set(reciprocal_rank_fusion([["a", "b", "c"], ["c", "b"]])[:2]) == {"b", "c"}
@@ -0,0 +1,58 @@
+import io
+import json
+import logging
+import pytest
+from utils import logging_config
+from utils.logging_config import JsonFormatter, SamplingFilter, configure_logging, parse_levels, shutdown_logging
+
+def make_record(msg="Fetched %d rows", args=(3,), **extra):
+    record = logging.LogRecord("models.transaction", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_extra_fields():
+    """Test that records become one JSON object with their extra fields."""
+    entry = json.loads(JsonFormatter().format(make_record(rows=3, sample_rate=0.5)))
+    assert entry['msg'] == "Fetched 3 rows"
+    assert entry['logger'] == "models.transaction"
+    assert entry['rows'] == 3
+    assert 'sample_rate' not in entry
+
+def test_sampling_filter(monkeypatch):
+    """Test that sampled records are kept with the given probability."""
+    sampling = SamplingFilter()
+    assert sampling.filter(make_record())
+    monkeypatch.setattr(logging_config.random, 'random', lambda: 0.5)
+    assert not sampling.filter(make_record(sample_rate=0.1))
+    assert sampling.filter(make_record(sample_rate=0.9))
+
+def test_parse_levels():
+    """Test parsing of per-subsystem level overrides."""
+    assert parse_levels("models.database=debug, services=WARNING") == {
+        'models.database': 'DEBUG', 'services': 'WARNING'
+    }
+
+@pytest.fixture
+def isolated_logging(monkeypatch):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    monkeypatch.setattr(logging_config, '_listener', None)
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    for name in logging_config.DEFAULT_LEVELS:
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+def test_configure_logging_queues_records(isolated_logging):
+    """Test that records reach the stream through the queue listener, filtered by subsystem level."""
+    stream = io.StringIO()
+    listener = configure_logging(fmt='json', stream=stream)
+    assert configure_logging() is listener
+
+    logging.getLogger("models.database").info("hidden")
+    logging.getLogger("services.rag_service").info("Embedding sync: %d embedded", 2)
+    shutdown_logging()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line['msg'] for line in lines] == ["Embedding sync: 2 embedded"]
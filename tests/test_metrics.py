@@ -0,0 +1,86 @@
+import urllib.request
+import pytest
+from utils import metrics
+from utils.metrics import Registry, register_cache, start_metrics_server, stop_metrics_server
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+def test_counter_and_gauge_exposition(registry):
+    """Test the text format of labelled counters and gauges."""
+    tokens = registry.counter('llm_tokens_total', "Tokens.", ['provider', 'direction'])
+    tokens.inc(12, provider='openai', direction='prompt')
+    tokens.inc(3, provider='openai', direction='prompt')
+    in_use = registry.gauge('db_pool_connections_in_use', "In use.")
+    in_use.inc()
+    in_use.inc()
+    in_use.dec()
+
+    text = registry.render()
+    assert "# TYPE llm_tokens_total counter" in text
+    assert 'llm_tokens_total{provider="openai",direction="prompt"} 15' in text
+    assert "db_pool_connections_in_use 1" in text
+
+def test_counter_rejects_decrease_and_wrong_labels(registry):
+    """Test that counters only go up and label names are checked."""
+    counter = registry.counter('db_query_errors_total', "Errors.", ['operation'])
+    with pytest.raises(ValueError):
+        counter.inc(-1, operation='execute')
+    with pytest.raises(ValueError):
+        counter.inc(provider='openai')
+
+def test_histogram_buckets_are_cumulative(registry):
+    """Test histogram buckets, sum and count."""
+    latency = registry.histogram('db_query_duration_seconds', "Latency.", ['operation'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value, operation='fetch_all')
+
+    text = registry.render()
+    assert 'db_query_duration_seconds_bucket{operation="fetch_all",le="0.1"} 1' in text
+    assert 'db_query_duration_seconds_bucket{operation="fetch_all",le="1"} 3' in text
+    assert 'db_query_duration_seconds_bucket{operation="fetch_all",le="+Inf"} 4' in text
+    assert 'db_query_duration_seconds_count{operation="fetch_all"} 4' in text
+    assert latency.get(operation='fetch_all') == (pytest.approx(6.05), 4)
+
+def test_timed_records_failures(registry):
+    """Test that the timing decorator observes calls that raise."""
+    latency = registry.histogram('llm_request_duration_seconds', "Latency.", ['provider'])
+
+    @latency.timed(provider='ollama')
+    def failing():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        failing()
+    assert latency.get(provider='ollama')[1] == 1
+
+def test_registry_returns_existing_metric(registry):
+    """Test that re-registering returns the same metric and conflicts are rejected."""
+    first = registry.counter('page_views_total', "Views.", ['page'])
+    assert registry.counter('page_views_total', "Views.", ['page']) is first
+    with pytest.raises(ValueError):
+        registry.gauge('page_views_total', "Views.", ['page'])
+
+def test_cache_collector(monkeypatch):
+    """Test that registered caches are read at scrape time."""
+    class FakeCache:
+        hits, misses = 3, 1
+
+    monkeypatch.setattr(metrics, '_caches', {})
+    register_cache('semantic', FakeCache())
+    text = metrics.get_registry().render()
+    assert 'cache_hits_total{cache="semantic"} 3' in text
+    assert 'cache_hit_ratio{cache="semantic"} 0.75' in text
+
+def test_metrics_endpoint():
+    """Test scraping the HTTP endpoint."""
+    metrics.counter('test_scrapes_total', "Scrapes.").inc()
+    server = start_metrics_server(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith("text/plain")
+            assert "test_scrapes_total 1" in response.read().decode('utf-8')
+    finally:
+        stop_metrics_server()
@@ -0,0 +1,46 @@
+from services.prompt_budget import PromptAssembler, bound_history, count_tokens
+
+def template(query, context, conversation):
+    return f"Context:\n{context}\n{conversation}\nQuestion: {query}"
+
+def make_history(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Message number {i}. More text."}
+            for i in range(count)]
+
+def test_count_tokens_estimate():
+    """Test the character-based estimate used without a tokenizer."""
+    assert count_tokens("", "ollama") == 0
+    assert count_tokens("a" * 35, "ollama", "llama2") == 10
+
+def test_assemble_keeps_prompt_within_budget():
+    """Test that context items and history are trimmed to the budget."""
+    context = "Relevant transactions:\n" + "\n".join(f"{i}. [2024-09-0{i % 9 + 1}] Item {i} (10.00 PLN)" for i in range(200))
+    assembler = PromptAssembler("ollama", "llama2", budget=400)
+    prompt, report = assembler.assemble(template, "How much?", context, make_history(100))
+
+    assert report['prompt_tokens'] <= 400
+    assert 0 < report['context_items'] < report['context_items_total']
+    assert 0 < report['history_messages'] < 100
+    assert "Relevant transactions:" in prompt
+    assert "0. [2024-09-01] Item 0" in prompt
+    assert "Message number 99." in prompt
+    assert "Message number 0." not in prompt
+
+def test_small_inputs_are_kept_whole():
+    """Test that nothing is dropped when everything fits."""
+    prompt, report = PromptAssembler("openai", "gpt-4o-mini", budget=2000).assemble(
+        template, "Hi", "Relevant transactions:\n1. Rent", make_history(2), "User: earlier question"
+    )
+    assert report['context_items'] == 1
+    assert report['history_messages'] == 2
+    assert "Earlier in the conversation:\nUser: earlier question" in prompt
+
+def test_bound_history_folds_old_messages_into_summary():
+    """Test that the history stays bounded and dropped messages are summarized."""
+    history, summary = bound_history(make_history(25), None, max_messages=20)
+    assert len(history) == 20
+    assert history[0]["content"].startswith("Message number 5")
+    assert summary.splitlines() == [
+        "User: Message number 0.", "Assistant: Message number 1.", "User: Message number 2.",
+        "Assistant: Message number 3.", "User: Message number 4."
+    ]
@@ -0,0 +1,55 @@
+import pytest
+from datetime import date, datetime
+from services.query_understanding import parse_query, parse_period
+
+TODAY = date(2024, 10, 15)
+CATEGORIES = ['groceries', 'transportation', 'entertainment', 'salary']
+
+@pytest.mark.parametrize("query,expected", [
+    ("How much did I spend in September?", (datetime(2024, 9, 1), datetime(2024, 10, 1))),
+    ("Ile wydałem we wrześniu 2023?", (datetime(2023, 9, 1), datetime(2023, 10, 1))),
+    ("expenses in december", (datetime(2023, 12, 1), datetime(2024, 1, 1))),
+    ("spending last month", (datetime(2024, 9, 1), datetime(2024, 10, 1))),
+    ("wydatki w tym roku", (datetime(2024, 1, 1), datetime(2025, 1, 1))),
+    ("income in 2022", (datetime(2022, 1, 1), datetime(2023, 1, 1))),
+    ("groceries in the last 7 days", (datetime(2024, 10, 9), datetime(2024, 10, 16))),
+    ("what are my biggest expenses?", (None, None)),
+])
+def test_parse_period(query, expected):
+    """Test that month names, relative periods and years become date ranges."""
+    assert parse_period(query, TODAY) == expected
+
+def test_parse_query_extracts_category_and_type():
+    """Test that category prefixes and spending verbs become filters."""
+    filters = parse_query("How much did I spend on transport in September?", CATEGORIES, TODAY)
+    assert filters == {
+        'start': datetime(2024, 9, 1),
+        'end': datetime(2024, 10, 1),
+        'category': 'transportation',
+        'type': 'expense'
+    }
+
+def test_parse_query_without_filters():
+    """Test that a generic question yields no filters."""
+    assert parse_query("Give me some saving tips", CATEGORIES, TODAY) == {}
+
+def test_income_detected_in_polish():
+    """Test that Polish income words are recognised."""
+    assert parse_query("Jaka była moja wypłata w maju?", CATEGORIES, TODAY)['type'] == 'income'
+
+@pytest.mark.parametrize("query,expected", [
+    ("How may I save money on groceries?", (None, None)),
+    ("May I see my spending?", (None, None)),
+    ("What did I spend in May?", (datetime(2024, 5, 1), datetime(2024, 6, 1))),
+    ("spending since 3rd of may", (datetime(2024, 5, 1), datetime(2024, 6, 1))),
+    ("may 2023 expenses", (datetime(2023, 5, 1), datetime(2023, 6, 1))),
+])
+def test_english_may_needs_month_context(query, expected):
+    """Test that the verb "may" is not read as the month."""
+    assert parse_period(query, TODAY) == expected
+
+def test_category_prefix_must_be_unambiguous():
+    """Test that a generic word is not turned into a multi-word category filter."""
+    categories = ['income tax', 'investment income', 'groceries']
+    assert 'category' not in parse_query("What is my income?", categories, TODAY)
+    assert parse_query("How much income tax did I pay?", categories, TODAY)['category'] == 'income tax'
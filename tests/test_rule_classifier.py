@@ -0,0 +1,53 @@
+import pytest
+from services.rule_classifier import (
+    CategoryPredictor, classify_with_rules, extract_amount, extract_cycle, CONFIDENCE_THRESHOLD
+)
+
+@pytest.fixture
+def predictor():
+    """Provide a predictor trained on a couple of historical descriptions."""
+    return CategoryPredictor().fit([
+        {'description': 'Ubezpieczenie samochodu', 'category': 'insurance'},
+        {'description': 'Test expense for groceries', 'category': 'groceries'},
+    ])
+
+@pytest.mark.parametrize("description,amount,currency", [
+    ("internet domowy 20zł miesięcznie", 20.0, 'PLN'),
+    ("wypłata 5000 złotych", 5000.0, 'PLN'),
+    ("czynsz 1500 PLN", 1500.0, 'PLN'),
+    ("1 500,50 zł", 1500.5, 'PLN'),
+    ("coffee 12.50 EUR", 12.5, 'EUR'),
+])
+def test_extract_amount(description, amount, currency):
+    """Test amount and currency extraction from common formats."""
+    extracted_amount, extracted_currency, _ = extract_amount(description)
+    assert extracted_amount == amount
+    assert extracted_currency == currency
+
+@pytest.mark.parametrize("description,cycle", [
+    ("internet 20zł miesięcznie", 'monthly'),
+    ("ubezpieczenie 900 zł rocznie", 'yearly'),
+    ("kieszonkowe 50 zł tygodniowo", 'weekly'),
+    ("gym 100 PLN per month", 'monthly'),
+    ("czynsz 1500 PLN", 'none'),
+])
+def test_extract_cycle(description, cycle):
+    """Test cycle detection with Polish and English keywords."""
+    assert extract_cycle(description) == cycle
+
+def test_typical_entries_skip_llm(predictor):
+    """Test that typical entries are classified with high confidence."""
+    result = classify_with_rules("wypłata 5000 złotych", predictor)
+    assert result['type'] == 'income'
+    assert result['category'] == 'salary'
+    assert result['confidence'] >= CONFIDENCE_THRESHOLD
+
+def test_history_predictor(predictor):
+    """Test that unknown keywords fall back to the history-based predictor."""
+    result = classify_with_rules("ubezpieczenie samochodu 900 zł rocznie", predictor)
+    assert result['category'] == 'insurance'
+    assert result['cycle'] == 'yearly'
+
+def test_foreign_currency_goes_to_llm(predictor):
+    """Test that amounts in other currencies are left to the LLM."""
+    assert classify_with_rules("netflix 12 EUR", predictor)['confidence'] < CONFIDENCE_THRESHOLD
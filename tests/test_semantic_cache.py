@@ -0,0 +1,36 @@
+import pytest
+from services.semantic_cache import SemanticCache
+
+def test_similar_query_hits():
+    """Test that a sufficiently similar query returns the cached answer."""
+    cache = SemanticCache(threshold=0.95)
+    cache.set([1.0, 0.0, 0.0], 1, {'response': 'You spent 500 PLN'})
+    assert cache.get([0.99, 0.05, 0.0], 1) == {'response': 'You spent 500 PLN'}
+    assert cache.get([0.0, 1.0, 0.0], 1) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_data_version_change_invalidates():
+    """Test that answers are not reused after the transaction data changed."""
+    cache = SemanticCache()
+    cache.set([1.0, 0.0], 1, {'response': 'old'})
+    assert cache.get([1.0, 0.0], 2) is None
+    assert cache.stats()['entries'] == 0
+
+def test_lru_eviction():
+    """Test that the least recently used answer is evicted first."""
+    cache = SemanticCache(max_entries=2)
+    cache.set([1.0, 0.0, 0.0], 1, {'response': 'a'})
+    cache.set([0.0, 1.0, 0.0], 1, {'response': 'b'})
+    cache.get([1.0, 0.0, 0.0], 1)
+    cache.set([0.0, 0.0, 1.0], 1, {'response': 'c'})
+    assert cache.get([0.0, 1.0, 0.0], 1) is None
+    assert cache.get([1.0, 0.0, 0.0], 1) == {'response': 'a'}
+
+def test_scope_separates_answers():
+    """Test that a similar question about another period does not reuse the answer."""
+    cache = SemanticCache()
+    september = (('start', '2024-09-01 00:00:00'),)
+    cache.set([1.0, 0.0], 1, {'response': 'September'}, september)
+    assert cache.get([1.0, 0.0], 1, (('start', '2024-10-01 00:00:00'),)) is None
+    assert cache.get([1.0, 0.0], 1, september) == {'response': 'September'}
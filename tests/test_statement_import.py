@@ -0,0 +1,140 @@
+import io
+from collections import Counter
+import pandas as pd
+from services.rule_classifier import CategoryPredictor
+from services.statement_import import (
+    CategoryAssigner, KnownFingerprints, detect_format, fingerprint_rows, normalize_amounts, normalize_dates,
+    normalize_statement, parse_camt, parse_mt940, read_statement
+)
+
+CSV_EXPORT = """Numer rachunku;PL61 1090 1014 0000 0712 1981 2874
+Waluta;PLN
+
+Data operacji;Opis operacji;Kontrahent;Kwota
+05.03.2024;Zakupy spożywcze;BIEDRONKA;-1 234,56
+06.03.2024;Wynagrodzenie;ACME SP. Z O.O.;5 000,00
+nie data;Uszkodzony wiersz;;abc
+""".encode('cp1250')
+
+MT940_STATEMENT = """:20:STATEMENT
+:25:PL61109010140000071219812874
+:28C:00001
+:60F:C240301PLN1000,00
+:61:2403050305D45,99NTRFNONREF//BANKREF1
+:86:020~00IBK~20Opłata za prąd~32PGE OBROT SA
+:61:240306C5000,00NTRFREF2
+:86:Wynagrodzenie marzec
+:62F:C240306PLN5954,01
+-}"""
+
+CAMT_STATEMENT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>
+<Ntry><Amt Ccy="PLN">120.50</Amt><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>2024-03-07</Dt></BookgDt>
+<AcctSvcrRef>REF-1</AcctSvcrRef><NtryDtls><TxDtls><RltdPties><Cdtr><Nm>ORLEN</Nm></Cdtr></RltdPties>
+<RmtInf><Ustrd>Paliwo</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+</Stmt></BkToCstmrStmt></Document>"""
+
+def test_detect_format():
+    """Test format detection from file names and content."""
+    assert detect_format('wyciag.csv', b'Data;Kwota') == 'csv'
+    assert detect_format('export.txt', MT940_STATEMENT.encode()[:200]) == 'mt940'
+    assert detect_format('statement', CAMT_STATEMENT[:100]) == 'camt'
+
+def test_csv_header_detection_and_normalization():
+    """Test skipping the account preamble, cp1250 decoding and dropping invalid rows."""
+    source, chunks = read_statement(io.BytesIO(CSV_EXPORT), 'wyciag.csv')
+    df, invalid = normalize_statement(pd.concat(list(chunks)))
+    assert source == 'csv'
+    assert invalid == 1
+    assert list(df['amount']) == [1234.56, 5000.0]
+    assert list(df['type']) == ['expense', 'income']
+    assert df['description'][0] == 'Zakupy spożywcze BIEDRONKA'
+    assert df['created_at'][0] == pd.Timestamp('2024-03-05')
+
+def test_utf8_detected_when_head_splits_a_character():
+    """Test that a UTF-8 character cut at the 64 KB sniffing boundary does not switch to cp1250."""
+    head = "Data operacji;Opis operacji;Kwota\n" + "05.03.2024;Zakupy;-1,00\n" * 2000 + "05.03.2024;"
+    padding = "x" * (64 * 1024 - 1 - len(head))
+    data = (head + padding + "ż;-2,00\n").encode('utf-8')
+    assert data[64 * 1024 - 1:64 * 1024 + 1] == "ż".encode('utf-8')
+
+    _, chunks = read_statement(io.BytesIO(data), 'wyciag.csv')
+    descriptions = pd.concat(list(chunks))['description']
+    assert descriptions.iloc[-1].endswith("ż")
+
+def test_parse_mt940():
+    """Test statement lines with structured and free-text :86: fields."""
+    records = list(parse_mt940(MT940_STATEMENT))
+    assert records[0] == {'date': '2024-03-05', 'amount': '-45,99', 'description': 'Opłata za prąd PGE OBROT SA',
+                          'external_id': 'BANKREF1'}
+    assert records[1]['amount'] == '5000,00'
+    assert records[1]['description'] == 'Wynagrodzenie marzec'
+
+def test_parse_camt():
+    """Test reading namespaced CAMT.053 entries."""
+    records = list(parse_camt(io.BytesIO(CAMT_STATEMENT)))
+    assert records == [{'date': '2024-03-07', 'amount': '-120.50', 'description': 'Paliwo ORLEN',
+                        'external_id': 'REF-1', 'currency': 'PLN'}]
+
+def test_normalize_amounts_and_dates():
+    """Test decimal separators, thousand separators and mixed date formats."""
+    amounts = normalize_amounts(pd.Series(['1,234.56', '-1 234,56', '45', '12,5', 'n/a']))
+    assert list(amounts[:4]) == [1234.56, -1234.56, 45.0, 12.5]
+    assert pd.isna(amounts[4])
+
+    dates = normalize_dates(pd.Series(['2024-03-05', '05.03.2024', '2024-03-05T10:00:00', '']))
+    assert list(dates[:3]) == [pd.Timestamp('2024-03-05')] * 3
+    assert pd.isna(dates[3])
+
+def statement_rows(descriptions, days=('2024-03-05',) * 3):
+    return pd.DataFrame({
+        'created_at': pd.to_datetime(list(days)),
+        'amount': [9.99] * len(days),
+        'type': ['expense'] * len(days),
+        'description': list(descriptions),
+        'external_id': [''] * len(days),
+    })
+
+def test_fingerprints_are_deterministic_and_keep_repeats():
+    """Test that fingerprints ignore case and spacing but separate repeated identical rows."""
+    first = fingerprint_rows(statement_rows(['Kawa  Żabka', 'KAWA ŻABKA', 'Kawa Zabka']), Counter())
+    again = fingerprint_rows(statement_rows(['kawa żabka', 'Kawa Żabka', 'kawa zabka']), Counter())
+    assert list(first) == list(again)
+    assert first.nunique() == 3
+    assert all(len(fingerprint) == 40 for fingerprint in first)
+
+def test_known_fingerprints_prefilter():
+    """Test that stored fingerprints are loaded once per day range and filtered in memory."""
+    class FakeTransactionModel:
+        calls = 0
+
+        def get_import_fingerprints(self, start, end):
+            self.calls += 1
+            return set(stored)
+
+    df = statement_rows(['KAWA'] * 3, days=['2024-03-05', '2024-03-05', '2024-03-06'])
+    df['fingerprint'] = fingerprint_rows(df, Counter())
+    stored = [df['fingerprint'][0]]
+    model = FakeTransactionModel()
+    known = KnownFingerprints(model)
+
+    assert list(known.unknown(df)) == [False, True, True]
+    known.unknown(df)
+    assert model.calls == 1
+
+def test_category_assigner_sends_unknown_descriptions_once():
+    """Test that only descriptions the local classifiers miss reach the LLM, once each."""
+    class FakeAIService:
+        calls = []
+
+        def classify_transactions(self, descriptions):
+            self.calls.append(list(descriptions))
+            return [{'category': 'Hobby'} for _ in descriptions]
+
+    predictor = CategoryPredictor().fit([{'description': 'ORLEN stacja', 'category': 'transportation'}])
+    assigner = CategoryAssigner(FakeAIService(), predictor)
+    descriptions = pd.Series(['ORLEN stacja 7', 'Sklep modelarski', 'Sklep modelarski'])
+    categories = assigner.assign(descriptions, pd.Series(['expense'] * 3))
+
+    assert list(categories) == ['transportation', 'hobby', 'hobby']
+    assert FakeAIService.calls == [['Sklep modelarski']]
@@ -0,0 +1,21 @@
+import pytest
+from services.streaming import MeteredStream, get_recent_stream_metrics
+
+def test_metered_stream_passes_chunks_through():
+    """Test that the metered stream yields the original text and counts tokens."""
+    stream = MeteredStream(iter(["Hello", "", " world", "!"]), "ollama", "llama2")
+    assert "".join(stream) == "Hello world!"
+    assert stream.metrics.tokens == 3
+    assert stream.metrics.time_to_first_token is not None
+    assert stream.metrics.total_time >= stream.metrics.time_to_first_token
+
+def test_metrics_recorded_on_error():
+    """Test that metrics are recorded even when the provider stream fails."""
+    def failing():
+        yield "partial"
+        raise RuntimeError("connection reset")
+
+    stream = MeteredStream(failing(), "openai", "gpt-3.5-turbo")
+    with pytest.raises(RuntimeError):
+        list(stream)
+    assert get_recent_stream_metrics()[-1]['tokens'] == 1
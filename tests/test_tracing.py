@@ -0,0 +1,111 @@
+import json
+import pytest
+from utils import tracing
+import threading
+from utils.tracing import TraceCollector, enable_tracing, record_span, span, start_trace, traced
+
+@pytest.fixture
+def collector(monkeypatch, tmp_path):
+    collector = TraceCollector(export='none', path=str(tmp_path))
+    monkeypatch.setattr(tracing, '_collector', collector)
+    monkeypatch.setattr(tracing, 'TRACING_ENABLED', True)
+    return collector
+
+def test_spans_are_nested_under_the_trace(collector):
+    """Test that child spans share the trace id and point at their parent."""
+    @traced("work.step")
+    def step():
+        with span("db.fetch_all") as current:
+            current.set('rows', 3)
+
+    with start_trace("streamlit.rerun") as root:
+        step()
+        step()
+
+    spans = collector.get_trace(root.trace_id)
+    assert [s['name'] for s in spans] == ["streamlit.rerun", "work.step", "db.fetch_all", "work.step", "db.fetch_all"]
+    by_id = {s['span_id']: s for s in spans}
+    assert spans[0]['parent_id'] is None
+    assert by_id[spans[2]['parent_id']]['name'] == "work.step"
+    assert spans[2]['attributes'] == {'rows': 3}
+    assert all(s['duration_ms'] >= 0 for s in spans)
+
+def test_start_trace_begins_a_new_trace(collector):
+    """Test that a root span ignores any span already active."""
+    with span("outer") as outer:
+        with start_trace("inner") as inner:
+            pass
+    assert inner.trace_id != outer.trace_id
+    assert collector.get_trace(inner.trace_id)[0]['parent_id'] is None
+
+def test_errors_are_recorded(collector):
+    """Test that a failing block is still recorded with the error type."""
+    with pytest.raises(ValueError):
+        with start_trace("failing") as root:
+            raise ValueError("boom")
+    assert collector.get_trace(root.trace_id)[0]['attributes'] == {'error': 'ValueError'}
+
+def test_record_span_uses_given_parent(collector):
+    """Test recording an interval measured outside the parent's block."""
+    with start_trace("chat") as root:
+        pass
+    record_span("openai.stream", root.start, 0.25, parent=root, tokens=10)
+    spans = collector.get_trace(root.trace_id)
+    assert spans[1]['parent_id'] == root.span_id
+    assert spans[1]['duration_ms'] == pytest.approx(250)
+
+def test_disabled_tracing_records_nothing(collector, monkeypatch):
+    """Test that nothing is collected while tracing is off."""
+    monkeypatch.setattr(tracing, 'TRACING_ENABLED', False)
+    with start_trace("rerun") as root:
+        with span("db.execute") as current:
+            current.set('rows', 1)
+    assert root.trace_id is None
+    assert collector._traces == {}
+
+def test_session_tracing_stays_in_its_context(collector, monkeypatch):
+    """Test that enabling tracing for one session does not trace others."""
+    monkeypatch.setattr(tracing, 'TRACING_ENABLED', False)
+    other = []
+
+    def other_session():
+        with start_trace("rerun") as root:
+            other.append(root.trace_id)
+
+    with enable_tracing():
+        with start_trace("rerun") as root:
+            thread = threading.Thread(target=other_session)
+            thread.start()
+            thread.join()
+    assert collector.get_trace(root.trace_id)[0]['name'] == "rerun"
+    assert other == [None]
+    assert not tracing.is_tracing_enabled()
+
+def test_collector_keeps_recent_traces(collector):
+    """Test that only the most recent traces stay in memory."""
+    collector.max_traces = 2
+    trace_ids = []
+    for _ in range(3):
+        with start_trace("rerun") as root:
+            trace_ids.append(root.trace_id)
+    assert list(collector._traces) == trace_ids[1:]
+
+@pytest.mark.parametrize("export, suffix", [('jsonl', 'jsonl'), ('chrome', 'json')])
+def test_export_formats(collector, tmp_path, export, suffix):
+    """Test JSON lines and Chrome trace-event exports."""
+    collector.export = export
+    with start_trace("rerun", page="dashboard"):
+        with span("db.fetch_one"):
+            pass
+
+    [path] = tmp_path.glob(f"trace-*.{suffix}")
+    text = path.read_text()
+    if export == 'chrome':
+        # The file is left open-ended; closing it gives a valid JSON array
+        events = json.loads(text.rstrip().rstrip(',') + "]")
+        assert {event['ph'] for event in events} == {'X'}
+        assert events[1]['args']['page'] == "dashboard"
+    else:
+        events = [json.loads(line) for line in text.splitlines()]
+        assert events[1]['attributes'] == {'page': "dashboard"}
+    assert [event['name'] for event in events] == ["db.fetch_one", "rerun"]
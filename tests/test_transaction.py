@@ -0,0 +1,75 @@
+import uuid
+from pathlib import Path
+from datetime import date, datetime
+from models.transaction import Transaction
+
+def test_aggregates_expand_recurring_transactions(mock_db):
+    """Test that a recurring transaction counts once per occurrence in the range."""
+    transaction = Transaction()
+    category = f"rent-{uuid.uuid4().hex[:8]}"
+    transaction.create_transaction("Czynsz", 1500.0, 'expense', category, 'monthly',
+                                   start_date=date(2024, 1, 10), end_date=date(2024, 12, 31))
+    transaction.create_transaction("Klucze", 20.0, 'expense', category, 'none')
+
+    totals = transaction.get_aggregates(datetime(2024, 3, 1), datetime(2024, 6, 1), category=category)
+    assert [(row['type'], float(row['total']), row['count']) for row in totals] == [('expense', 4500.0, 3)]
+
+    months = transaction.get_aggregates(datetime(2024, 11, 1), datetime(2025, 3, 1),
+                                        category=category, group_by='month')
+    assert [row['month'] for row in months] == ['2024-11', '2024-12']
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE transactions (
+    id SERIAL PRIMARY KEY,
+    description TEXT NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    cycle VARCHAR(10) NOT NULL,
+    start_date DATE,
+    end_date DATE,
+    due_date DATE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    transaction_text TEXT,
+    metadata JSONB
+);
+CREATE TABLE budgets (
+    id SERIAL PRIMARY KEY,
+    category VARCHAR(50) NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    period VARCHAR(10) NOT NULL CHECK (period IN ('monthly', 'yearly')),
+    start_date DATE NOT NULL,
+    end_date DATE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    notification_threshold DECIMAL(5,2) CHECK (notification_threshold BETWEEN 0 AND 100),
+    metadata JSONB
+);
+INSERT INTO transactions (description, amount, type, category, cycle) VALUES
+    ('Lidl', 40.00, 'expense', 'groceries', 'none'),
+    ('Biedronka', 60.00, 'expense', 'groceries', 'none'),
+    ('Wypłata', 5000.00, 'income', 'salary', 'none');
+"""
+
+def test_schema_migrates_legacy_category_column(mock_db):
+    """Test that the schema script upgrades a database created before the categories table."""
+    schema = f"legacy_{uuid.uuid4().hex[:8]}"
+    conn = mock_db._get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema}")
+            cur.execute(LEGACY_SCHEMA)
+            cur.execute(Path('assets/schema.sql').read_text())
+            # Running it again on the migrated layout changes nothing
+            cur.execute(Path('assets/schema.sql').read_text())
+            cur.execute("SELECT name, usage_count, total_expenses, total_income FROM categories ORDER BY name")
+            assert [(name, count, float(expenses), float(income)) for name, count, expenses, income in cur.fetchall()] == [
+                ('groceries', 2, 100.0, 0.0), ('salary', 1, 0.0, 5000.0)
+            ]
+            cur.execute("""
+                SELECT c.name FROM transactions t JOIN categories c ON c.id = t.category_id ORDER BY t.id
+            """)
+            assert [row[0] for row in cur.fetchall()] == ['groceries', 'groceries', 'salary']
+    finally:
+        conn.rollback()
+        mock_db._return_connection(conn)
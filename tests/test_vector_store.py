@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+
+pytest.importorskip("faiss")
+
+from services.vector_store import FaissVectorStore
+
+VECTORS = {
+    "rent": [1.0, 0.0, 0.0],
+    "groceries": [0.0, 1.0, 0.0],
+    "salary": [0.0, 0.0, 1.0],
+    "new rent": [0.9, 0.1, 0.0],
+}
+
+def embed(documents):
+    return np.array([VECTORS[doc] for doc in documents], dtype=np.float32)
+
+def fill(store):
+    store.upsert(["1", "2", "3"], ["rent", "groceries", "salary"],
+                 [{"content_hash": doc} for doc in ["rent", "groceries", "salary"]])
+    store.flush()
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_query_returns_nearest_document(tmp_path, index_type):
+    """Test that queries map FAISS ids back to the stored transactions."""
+    store = FaissVectorStore(embed, dim=3, path=str(tmp_path), index_type=index_type)
+    fill(store)
+    results = store.query([0.0, 0.9, 0.1], k=1)
+    assert results[0]['id'] == "2"
+    assert results[0]['document'] == "groceries"
+    assert store.get_hashes(["1", "4"]) == {"1": "rent"}
+    assert [doc for _, doc, _ in store.documents(["2", "4"])] == ["groceries"]
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_replace_and_delete(tmp_path, index_type):
+    """Test that replaced and deleted ids are not returned."""
+    store = FaissVectorStore(embed, dim=3, path=str(tmp_path), index_type=index_type)
+    fill(store)
+    store.upsert(["1"], ["new rent"], [{"content_hash": "new rent"}])
+    store.delete(["3"])
+    store.flush()
+
+    results = store.query([1.0, 0.0, 0.0], k=3)
+    assert [result['id'] for result in results] == ["1", "2"]
+    assert results[0]['document'] == "new rent"
+    assert store.all_ids() == {"1", "2"}
+
+def test_index_reloaded_from_disk(tmp_path):
+    """Test that a persisted index is memory-mapped and still writable."""
+    fill(FaissVectorStore(embed, dim=3, path=str(tmp_path)))
+    store = FaissVectorStore(embed, dim=3, path=str(tmp_path))
+    assert store.count() == 3
+    assert store.query([0.0, 0.0, 1.0], k=1)[0]['id'] == "3"
+
+    store.delete(["3"])
+    store.flush()
+    assert store.query([0.0, 0.0, 1.0], k=1)[0]['id'] != "3"
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+def test_query_applies_metadata_filters(tmp_path, index_type):
+    """Test that filters restrict the search to matching ids."""
+    store = FaissVectorStore(embed, dim=3, path=str(tmp_path), index_type=index_type)
+    store.upsert(["1", "2", "3"], ["rent", "groceries", "salary"], [
+        {"content_hash": "rent", "type": "expense", "timestamp": 100.0},
+        {"content_hash": "groceries", "type": "expense", "timestamp": 200.0},
+        {"content_hash": "salary", "type": "income", "timestamp": 300.0},
+    ])
+    store.flush()
+    results = store.query([1.0, 0.0, 0.0], k=2, filters={"type": "expense", "start": 150.0})
+    assert [result['id'] for result in results] == ["2"]
+    assert store.query([1.0, 0.0, 0.0], k=2, filters={"type": "transfer"}) == []
+
+def test_hnsw_widens_search_past_tombstones(tmp_path, monkeypatch):
+    """Test that a query still finds k live documents when the nearest vectors are tombstoned."""
+    monkeypatch.setattr(FaissVectorStore, 'REBUILD_STALE_RATIO', 1.0)
+    store = FaissVectorStore(embed, dim=3, path=str(tmp_path), index_type="hnsw")
+    stale_ids = [str(id_) for id_ in range(10, 20)]
+    store.upsert(stale_ids, ["rent"] * 10, [{"content_hash": "rent"}] * 10)
+    store.upsert(["2"], ["groceries"], [{"content_hash": "groceries"}])
+    store.delete(stale_ids)
+    store.flush()
+
+    assert store._stale_count() == 10
+    assert [result['id'] for result in store.query([1.0, 0.0, 0.0], k=1)] == ["2"]
+
+def test_hnsw_replaced_vector_is_not_matched(tmp_path, monkeypatch):
+    """Test that an updated document is found by its new embedding, not the one it replaced."""
+    monkeypatch.setattr(FaissVectorStore, 'REBUILD_STALE_RATIO', 1.0)
+    store = FaissVectorStore(embed, dim=3, path=str(tmp_path), index_type="hnsw")
+    fill(store)
+    store.upsert(["1"], ["salary"], [{"content_hash": "salary", "category": "income"}])
+    store.flush()
+
+    for reopened in (store, FaissVectorStore(embed, dim=3, path=str(tmp_path), index_type="hnsw")):
+        results = {result['id']: result for result in reopened.query([1.0, 0.0, 0.0], k=3)}
+        assert results["1"]['document'] == "salary"
+        assert results["1"]['distance'] == pytest.approx(1.0)
+        assert reopened.query([1.0, 0.0, 0.0], k=1, filters={"category": "income"})[0]['distance'] == pytest.approx(1.0)
@@ -22,8 +22,15 @@ TRANSLATIONS = {
             'api_key': 'API Key',
             'api_key_help': 'Enter your OpenAI API key',
             'model': 'Model',
+            'show_trace': 'Show request trace',
+            'show_trace_help': 'Record timing spans and show a waterfall of the current page render',
             'close': 'Close Settings'
         },
+        'trace': {
+            'title': '⏱️ Request Trace',
+            'empty': 'No spans recorded for this page render yet.',
+            'summary': '{spans} spans · {total:.0f} ms recorded'
+        },
         'chat': {
             'title': 'Financial Chat Assistant',
             'intro': '💬 Ask me anything about your finances! For example:',
@@ -38,7 +45,10 @@ TRANSLATIONS = {
             'error': 'An error occurred while processing your question. Please try again.',
             'clear_chat': 'Clear Chat',
             'context_title': '🔍 Relevant Transaction Context',
-            'missing_api_key': 'OpenAI API key is required for the chat assistant to work. Please add it in the settings.'
+            'missing_api_key': 'OpenAI API key is required for the chat assistant to work. Please add it in the settings.',
+            'stream_metrics': 'First token after {ttft:.2f}s · {rate:.1f} tokens/s',
+            'cached_answer': 'Answered from cache',
+            'prompt_size': 'Prompt {tokens}/{budget} tokens · {items} context items · {messages} earlier messages'
         },
         'budget': {
             'title': 'Budget Planning',
@@ -121,6 +131,17 @@ TRANSLATIONS = {
             'processing': 'Processing transaction...',
             'success': 'Transaction analyzed successfully!',
             'error': 'Could not process the transaction. Please try again.'
+        },
+        'import': {
+            'title': '📄 Import Bank Statement',
+            'file': 'Statement file (CSV, MT940 or CAMT XML)',
+            'use_ai': 'Use AI for unrecognized descriptions',
+            'use_ai_help': 'Descriptions the local rules cannot categorize are sent to the selected model in batches',
+            'start': 'Import',
+            'progress': 'Imported {inserted} of {rows} rows...',
+            'summary': 'Imported {inserted} transactions from {format} in {seconds:.1f}s · {duplicates} duplicates skipped · {invalid} invalid rows',
+            'categorized': '{categorized_locally} descriptions categorized locally · {categorized_by_llm} by AI',
+            'error': 'Could not import the statement'
         }
     },
     'pl': {
@@ -146,8 +167,15 @@ TRANSLATIONS = {
             'api_key': 'Klucz API',
             'api_key_help': 'Wprowadź swój klucz API OpenAI',
             'model': 'Model',
+            'show_trace': 'Pokaż śledzenie żądania',
+            'show_trace_help': 'Rejestruj czasy operacji i pokaż wykres kaskadowy renderowania strony',
             'close': 'Zamknij ustawienia'
         },
+        'trace': {
+            'title': '⏱️ Śledzenie żądania',
+            'empty': 'Brak zarejestrowanych operacji dla tego renderowania strony.',
+            'summary': '{spans} operacji · {total:.0f} ms zarejestrowano'
+        },
         'chat': {
             'title': 'Asystent Finansowy',
             'intro': '💬 Zapytaj mnie o cokolwiek związanego z Twoimi finansami! Na przykład:',
@@ -162,7 +190,10 @@ TRANSLATIONS = {
             'error': 'Wystąpił błąd podczas przetwarzania Twojego pytania. Spróbuj ponownie.',
             'clear_chat': 'Wyczyść czat',
             'context_title': '🔍 Powiązane transakcje',
-            'missing_api_key': 'Klucz API OpenAI jest wymagany do działania asystenta czatu. Dodaj go w ustawieniach.'
+            'missing_api_key': 'Klucz API OpenAI jest wymagany do działania asystenta czatu. Dodaj go w ustawieniach.',
+            'stream_metrics': 'Pierwszy token po {ttft:.2f}s · {rate:.1f} tokenów/s',
+            'cached_answer': 'Odpowiedź z pamięci podręcznej',
+            'prompt_size': 'Prompt {tokens}/{budget} tokenów · {items} elementów kontekstu · {messages} wcześniejszych wiadomości'
         },
         'budget': {
             'title': 'Planowanie budżetu',
@@ -245,6 +276,17 @@ TRANSLATIONS = {
             'processing': 'Przetwarzanie transakcji...',
             'success': 'Transakcja przeanalizowana pomyślnie!',
             'error': 'Nie udało się przetworzyć transakcji. Spróbuj ponownie.'
+        },
+        'import': {
+            'title': '📄 Import wyciągu bankowego',
+            'file': 'Plik wyciągu (CSV, MT940 lub CAMT XML)',
+            'use_ai': 'Użyj AI dla nierozpoznanych opisów',
+            'use_ai_help': 'Opisy, których lokalne reguły nie skategoryzują, są wysyłane partiami do wybranego modelu',
+            'start': 'Importuj',
+            'progress': 'Zaimportowano {inserted} z {rows} wierszy...',
+            'summary': 'Zaimportowano {inserted} transakcji z {format} w {seconds:.1f}s · pominięto {duplicates} duplikatów · {invalid} błędnych wierszy',
+            'categorized': '{categorized_locally} opisów skategoryzowano lokalnie · {categorized_by_llm} przez AI',
+            'error': 'Nie udało się zaimportować wyciągu'
         }
     }
 }
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Default levels per subsystem; LOG_LEVELS="models.database=DEBUG,services=INFO" overrides them
+DEFAULT_LEVELS = {
+    'models.database': 'WARNING',
+    'models': 'INFO',
+    'services': 'INFO',
+    'components': 'INFO',
+    # Chatty third-party libraries
+    'httpx': 'WARNING',
+    'urllib3': 'WARNING',
+    'chromadb': 'WARNING',
+    'sentence_transformers': 'WARNING',
+}
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_INTERNAL_EXTRAS = {'sample_rate'}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "logger=LEVEL,logger=LEVEL" into a dict."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+def record_fields(record: logging.LogRecord) -> dict:
+    """Return the structured fields passed to a log call via ``extra``."""
+    return {
+        key: value for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES and key not in _INTERNAL_EXTRAS
+    }
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable format with ``extra`` fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+class SamplingFilter(logging.Filter):
+    """Keep a record with probability ``sample_rate`` (passed via ``extra``, default 1)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, 'sample_rate', 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue records without formatting them, so the caller only pays for the enqueue.
+
+    The stock QueueHandler formats in the calling thread to make records
+    picklable; the queue here never leaves the process, so formatting is
+    left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def configure_logging(level: Optional[str] = None, levels: Optional[Dict[str, str]] = None,
+                      fmt: Optional[str] = None, stream=None) -> QueueListener:
+    """Route all logging through a non-blocking queue to a single stream handler.
+
+    Safe to call more than once (Streamlit re-runs the script); only the
+    first call installs handlers. Environment: LOG_LEVEL (root level,
+    default WARNING), LOG_LEVELS (per-subsystem overrides) and LOG_FORMAT
+    ("json" or "text").
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = TextFormatter() if (fmt or os.environ.get('LOG_FORMAT', 'json')) == 'text' else JsonFormatter()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(formatter)
+
+        records = queue.SimpleQueue()
+        handler = DeferredQueueHandler(records)
+        handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level or os.environ.get('LOG_LEVEL', 'WARNING').upper())
+
+        subsystem_levels = dict(DEFAULT_LEVELS)
+        subsystem_levels.update(levels or parse_levels(os.environ.get('LOG_LEVELS', '')))
+        for name, subsystem_level in subsystem_levels.items():
+            logging.getLogger(name).setLevel(subsystem_level)
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,283 @@
+import os
+import math
+import time
+import logging
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# METRICS_PORT enables the scrape endpoint; it binds to localhost unless METRICS_HOST says otherwise
+METRICS_PORT = os.environ.get('METRICS_PORT')
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+
+# Latency buckets in seconds, from a fast query to a slow LLM completion
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize a metric family with one value per combination of label values."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield ``(name, formatted labels, value)`` for every series."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the series for the given labels; counters never go down."""
+        if amount < 0:
+            raise ValueError("Counters can only be increased")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize a histogram with cumulative ``le`` buckets plus a sum and count per series."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def timed(self, **labels) -> Callable:
+        """Decorator that observes the wall time of each call, including failed ones."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def get(self, **labels) -> Tuple[float, int]:
+        """Return the (sum, count) of a series."""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return (series[1], series[2]) if series else (0.0, 0)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = [(key, (list(series[0]), series[1], series[2])) for key, series in self._values.items()]
+        for key, (counts, total, count) in sorted(values):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = ('le', _format_value(bound))
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+class Registry:
+    def __init__(self):
+        """Initialize an empty registry of metric families and collect-time callbacks."""
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Return the registered counter, creating it on first use."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Return the registered gauge, creating it on first use."""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Return the registered histogram, creating it on first use."""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]):
+        """Add a callback that builds metrics from existing state at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {str(e)}")
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+_registry = Registry()
+
+def get_registry() -> Registry:
+    return _registry
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _registry.counter(name, documentation, labelnames)
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return _registry.gauge(name, documentation, labelnames)
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _registry.histogram(name, documentation, labelnames, buckets)
+
+# Caches already count their own hits and misses; they are read at scrape time
+_caches: Dict[str, object] = {}
+
+def register_cache(name: str, cache):
+    """Expose the ``hits`` and ``misses`` counters of a process-wide cache."""
+    _caches[name] = cache
+
+def _collect_caches() -> List[Metric]:
+    hits = Counter('cache_hits_total', "Cache lookups answered from the cache.", ['cache'])
+    misses = Counter('cache_misses_total', "Cache lookups that missed.", ['cache'])
+    hit_ratio = Gauge('cache_hit_ratio', "Share of lookups answered from the cache.", ['cache'])
+    for name, cache in list(_caches.items()):
+        hits.inc(cache.hits, cache=name)
+        misses.inc(cache.misses, cache=name)
+        total = cache.hits + cache.misses
+        hit_ratio.set(cache.hits / total if total else 0.0, cache=name)
+    return [hits, misses, hit_ratio]
+
+_registry.register_collector(_collect_caches)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = _registry
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the app log
+        pass
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+def start_metrics_server(port: Optional[int] = None, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Serve ``/metrics`` on a background thread, once per process.
+
+    Uses METRICS_PORT when ``port`` is not given and does nothing when
+    neither is set.
+    """
+    global _server
+    port = port if port is not None else (int(METRICS_PORT) if METRICS_PORT else None)
+    if port is None:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint on {host}:{port}: {str(e)}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info("Serving metrics on http://%s:%d/metrics", host, _server.server_port)
+        return _server
+
+def stop_metrics_server():
+    """Stop the metrics endpoint if it is running."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import uuid
+import logging
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# TRACING=1 records spans; TRACE_EXPORT picks "jsonl", "chrome" or "none" for the file export
+TRACING_ENABLED = os.environ.get('TRACING', '0') == '1'
+TRACE_EXPORT = os.environ.get('TRACE_EXPORT', 'jsonl').lower()
+TRACE_PATH = os.environ.get('TRACE_PATH', '.cache/traces')
+
+# Finished spans of the most recent traces kept in memory for the waterfall panel
+MAX_TRACES = 20
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+# Per-session switch (the settings toggle); each Streamlit session reruns in its own context
+_session_tracing: contextvars.ContextVar[bool] = contextvars.ContextVar('session_tracing', default=False)
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start', 'duration', 'thread', 'attributes')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        """Initialize a span that starts now."""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.thread = threading.get_ident()
+        self.attributes = attributes
+
+    def set(self, key: str, value):
+        """Attach an attribute, e.g. a row count known only after the work is done."""
+        self.attributes[key] = value
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'duration_ms': self.duration * 1000 if self.duration is not None else None,
+            'thread': self.thread,
+            'attributes': self.attributes,
+        }
+
+class _NoopSpan:
+    """Stand-in yielded when tracing is off, so call sites need no checks."""
+    __slots__ = ()
+    trace_id = None
+    span_id = None
+
+    def set(self, key: str, value):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class TraceCollector:
+    def __init__(self, export: str = TRACE_EXPORT, path: str = TRACE_PATH, max_traces: int = MAX_TRACES):
+        """Initialize the store of finished spans and the file exporter."""
+        self.export = export
+        self.path = path
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _open(self):
+        os.makedirs(self.path, exist_ok=True)
+        suffix = 'json' if self.export == 'chrome' else 'jsonl'
+        file = open(os.path.join(self.path, f"trace-{os.getpid()}.{suffix}"), 'a', buffering=1)
+        if self.export == 'chrome' and file.tell() == 0:
+            # The trace-event format accepts an array without its closing bracket
+            file.write("[\n")
+        return file
+
+    def _export_line(self, span: Span) -> str:
+        if self.export == 'chrome':
+            event = {
+                'name': span.name, 'cat': span.name.split('.')[0], 'ph': 'X',
+                'ts': int(span.start * 1e6), 'dur': int(span.duration * 1e6),
+                'pid': os.getpid(), 'tid': span.thread,
+                'args': dict(span.attributes, trace_id=span.trace_id,
+                             span_id=span.span_id, parent_id=span.parent_id),
+            }
+            return json.dumps(event, default=str) + ",\n"
+        return json.dumps(span.as_dict(), default=str) + "\n"
+
+    def add(self, span: Span):
+        """Record a finished span and append it to the export file."""
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+            if self.export in ('jsonl', 'chrome'):
+                try:
+                    if self._file is None:
+                        self._file = self._open()
+                    self._file.write(self._export_line(span))
+                except OSError as e:
+                    logger.warning("Disabling trace export: %s", e)
+                    self.export = 'none'
+
+    def get_trace(self, trace_id: str) -> List[dict]:
+        """Return the finished spans of a trace, ordered by start time."""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        return [span.as_dict() for span in sorted(spans, key=lambda span: span.start)]
+
+_collector = TraceCollector()
+
+def get_collector() -> TraceCollector:
+    return _collector
+
+def set_tracing_enabled(enabled: bool):
+    """Turn span recording on or off at runtime for the whole process."""
+    global TRACING_ENABLED
+    TRACING_ENABLED = enabled
+
+def is_tracing_enabled() -> bool:
+    """Whether spans are recorded here: process-wide (TRACING=1) or for the current session."""
+    return TRACING_ENABLED or _session_tracing.get()
+
+@contextmanager
+def enable_tracing(enabled: bool = True) -> Iterator:
+    """Record spans inside the block, and in contexts copied from it, without affecting other sessions."""
+    token = _session_tracing.set(enabled)
+    try:
+        yield
+    finally:
+        _session_tracing.reset(token)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator:
+    """Time a block as a child of the current span (or as a new trace when there is none).
+
+    Yields the span so attributes can be added once they are known. When
+    tracing is off this costs a flag and a context variable check.
+    """
+    if not (TRACING_ENABLED or _session_tracing.get()):
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.set('error', type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        _collector.add(current)
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator:
+    """Start a new root span regardless of any span already active in this context."""
+    token = _current_span.set(None)
+    try:
+        with span(name, **attributes) as root:
+            yield root
+    finally:
+        _current_span.reset(token)
+
+def record_span(name: str, start: float, duration: float, parent: Optional[Span] = None, **attributes):
+    """Record an already measured interval, e.g. a stream consumed by another caller."""
+    if not (TRACING_ENABLED or _session_tracing.get()):
+        return
+    parent = parent or _current_span.get()
+    recorded = Span(name, parent.trace_id if parent else uuid.uuid4().hex[:16],
+                    parent.span_id if parent else None, attributes)
+    recorded.start = start
+    recorded.duration = duration
+    _collector.add(recorded)
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator that runs the function inside a span named after it by default."""
+    def decorator(func):
+        span_name = name or f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (TRACING_ENABLED or _session_tracing.get()):
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator